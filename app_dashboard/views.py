@@ -2,7 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from django.db.models import Sum, Count, Q, F, Avg
+from django.db.models import Sum, Count, Q, F, Avg, Min, Max, ExpressionWrapper, DecimalField
 from django.utils import timezone
 from django.shortcuts import render
 from django.contrib.auth.decorators import login_required
@@ -12,7 +12,7 @@ import json
 from app_dashboard.models import DashboardMetric
 from app_dashboard.serializers import DashboardMetricSerializer
 from app_dashboard.reporting import ComprehensiveReports
-from app_inventory.models import Inventory, StockTransaction, LumberProduct
+from app_inventory.models import Inventory, StockTransaction, LumberProduct, StockMovementDaily
 from app_inventory.services import InventoryService
 from app_sales.models import SalesOrder
 from app_delivery.models import Delivery
@@ -129,16 +129,19 @@ class DashboardMetricViewSet(viewsets.ReadOnlyModelViewSet):
         days = int(request.query_params.get('days', 30))
         cutoff_date = timezone.now() - timedelta(days=days)
         
-        # Get all products with price changes in the period
-        price_changes = StockTransaction.objects.filter(
+        # Get all products with costed receipts in the period from the daily rollup
+        price_changes = StockMovementDaily.objects.filter(
             transaction_type='stock_in',
-            created_at__gte=cutoff_date,
-            cost_per_unit__isnull=False
+            day__gte=cutoff_date.date(),
+            costed_count__gt=0
         ).values('product__id', 'product__name', 'product__sku').annotate(
-            min_cost=F('cost_per_unit'),
-            max_cost=F('cost_per_unit'),
-            avg_cost=Avg('cost_per_unit')
-        ).order_by('product__id').distinct()
+            min_cost=Min('min_unit_cost'),
+            max_cost=Max('max_unit_cost'),
+            avg_cost=ExpressionWrapper(
+                Sum('unit_cost_total') / Sum('costed_count'),
+                output_field=DecimalField(max_digits=10, decimal_places=2)
+            )
+        ).order_by('product__id')
         
         return Response({
             'period_days': days,
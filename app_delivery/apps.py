@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class AppDeliveryConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app_delivery"
+
+    def ready(self):
+        import app_delivery.signals
@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from app_delivery.planning import TruckLoadPlanner
+
+
+class Command(BaseCommand):
+    help = 'Pack loaded deliveries onto trucks by area and capacity and print trip sheets (read-only)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--vehicle',
+            action='append',
+            default=[],
+            metavar='PLATE:DRIVER:MAX_BF:MAX_PIECES',
+            help='Available truck; repeat for each truck (default: one generic truck)'
+        )
+        parser.add_argument(
+            '--no-consolidate',
+            action='store_true',
+            help='Keep every area on its own trucks even when they leave half empty'
+        )
+
+    def handle(self, *args, **options):
+        vehicles = []
+        for spec in options['vehicle']:
+            try:
+                plate_number, driver_name, max_board_feet, max_pieces = spec.split(':')
+                vehicles.append({
+                    'plate_number': plate_number,
+                    'driver_name': driver_name,
+                    'max_board_feet': float(max_board_feet),
+                    'max_pieces': int(max_pieces),
+                })
+            except ValueError:
+                raise CommandError(f"Invalid --vehicle '{spec}', expected PLATE:DRIVER:MAX_BF:MAX_PIECES")
+
+        try:
+            plan = TruckLoadPlanner.plan(vehicles=vehicles, consolidate=not options['no_consolidate'])
+        except ValueError as e:
+            raise CommandError(str(e))
+        for sheet in plan['trips']:
+            self.stdout.write(TruckLoadPlanner.format_trip_sheet(sheet))
+            self.stdout.write('')
+
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{plan['delivery_count']} deliveries on {plan['trip_count']} trip(s), "
+                f"average load {plan['avg_board_feet_utilization']}% of board-feet capacity"
+            )
+        )
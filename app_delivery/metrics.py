@@ -0,0 +1,191 @@
+"""
+Delivery KPIs computed with database aggregates
+
+Status counts come from one conditional-aggregate query and turnaround
+times (delivered_at - created_at) from duration aggregates, so no delivery
+rows are loaded into Python. Results are cached briefly and dropped
+whenever a delivery changes (see app_delivery.signals).
+"""
+from datetime import timedelta
+from django.core.cache import cache
+from django.db.models import Avg, Count, DurationField, ExpressionWrapper, F, Max, Min, Q
+from django.utils import timezone
+from app_delivery.models import Delivery
+
+
+TURNAROUND = ExpressionWrapper(F('delivered_at') - F('created_at'), output_field=DurationField())
+
+
+def _hours(duration):
+    return round(duration.total_seconds() / 3600, 1) if duration is not None else None
+
+
+class DeliveryMetricsService:
+    """Shared, cached delivery KPIs for the warehouse dashboard and reports"""
+
+    VERSION_KEY = 'delivery_metrics_version'
+    CACHE_TIMEOUT = 60
+
+    @staticmethod
+    def status_counts(deliveries=None):
+        """
+        Deliveries per status plus the total, in one query
+
+        Args:
+            deliveries: Queryset to count (default: all deliveries)
+
+        Returns:
+            Dict: total and one count per Delivery status
+        """
+        deliveries = Delivery.objects.all() if deliveries is None else deliveries
+        return deliveries.aggregate(
+            total=Count('id'),
+            **{
+                status: Count('id', filter=Q(status=status))
+                for status, _ in Delivery.STATUS_CHOICES
+            }
+        )
+
+    @staticmethod
+    def turnaround(deliveries, percentiles=()):
+        """
+        Turnaround time statistics for delivered deliveries
+
+        Average, min and max come from one aggregate query; each percentile
+        is one ordered single-row lookup in the database.
+
+        Args:
+            deliveries: Queryset of deliveries to measure
+            percentiles: e.g. (50, 90); nearest-rank, 50 is the upper median
+
+        Returns:
+            Dict: count, avg_hours, min_hours, max_hours and p<N>_hours
+        """
+        completed = deliveries.filter(status='delivered', delivered_at__isnull=False)
+        stats = completed.aggregate(
+            count=Count('id'),
+            avg=Avg(TURNAROUND),
+            min=Min(TURNAROUND),
+            max=Max(TURNAROUND)
+        )
+        result = {
+            'count': stats['count'],
+            'avg_hours': _hours(stats['avg']),
+            'min_hours': _hours(stats['min']),
+            'max_hours': _hours(stats['max']),
+        }
+
+        ordered = completed.annotate(turnaround=TURNAROUND).order_by('turnaround').values_list('turnaround', flat=True)
+        for percentile in percentiles:
+            value = None
+            if stats['count']:
+                rank = min(stats['count'] - 1, stats['count'] * percentile // 100)
+                value = ordered[rank]
+            result[f'p{percentile}_hours'] = _hours(value)
+        return result
+
+    @staticmethod
+    def overview():
+        """
+        Warehouse dashboard KPIs
+
+        Returns:
+            Dict: Status counts, 7-day average delivery time and completion rate
+        """
+        def compute():
+            counts = DeliveryMetricsService.status_counts()
+            recent = DeliveryMetricsService.turnaround(
+                Delivery.objects.filter(delivered_at__gte=timezone.now() - timedelta(days=7))
+            )
+            total = counts['total']
+            return {
+                'total_deliveries': total,
+                'pending': counts['pending'],
+                'on_picking': counts['on_picking'],
+                'loaded': counts['loaded'],
+                'in_transit': counts['out_for_delivery'],
+                'delivered': counts['delivered'],
+                'avg_delivery_time_hours': recent['avg_hours'] or 0,
+                'completion_rate': round((counts['delivered'] / total * 100), 1) if total > 0 else 0
+            }
+        return DeliveryMetricsService._cached('overview', compute)
+
+    @staticmethod
+    def daily_summary(summary_date):
+        """
+        Deliveries created on a day and turnaround of those delivered that day
+
+        Args:
+            summary_date: Date to report on
+
+        Returns:
+            Dict: Daily counts, average delivery time and completion rate
+        """
+        def compute():
+            counts = Delivery.objects.filter(created_at__date=summary_date).aggregate(
+                created=Count('id'),
+                delivered=Count('id', filter=Q(status='delivered', delivered_at__date=summary_date)),
+                pending=Count('id', filter=Q(status='pending')),
+                in_progress=Count('id', filter=Q(status__in=['on_picking', 'loaded'])),
+                in_transit=Count('id', filter=Q(status='out_for_delivery'))
+            )
+            delivered_today = DeliveryMetricsService.turnaround(
+                Delivery.objects.filter(delivered_at__date=summary_date)
+            )
+            created = counts['created']
+            return {
+                'date': summary_date,
+                'deliveries_created': created,
+                'delivered_today': counts['delivered'],
+                'pending': counts['pending'],
+                'in_progress': counts['in_progress'],
+                'in_transit': counts['in_transit'],
+                'avg_delivery_time_hours': delivered_today['avg_hours'] or None,
+                'completion_rate': round((counts['delivered'] / created * 100), 1) if created > 0 else 0
+            }
+        return DeliveryMetricsService._cached(f'daily:{summary_date.isoformat()}', compute)
+
+    @staticmethod
+    def turnaround_report(days=30):
+        """
+        Turnaround times of deliveries completed in the last N days
+
+        Args:
+            days: Period in days
+
+        Returns:
+            Dict: Completed count and average/min/max/median/p90 hours
+        """
+        def compute():
+            stats = DeliveryMetricsService.turnaround(
+                Delivery.objects.filter(delivered_at__gte=timezone.now() - timedelta(days=days)),
+                percentiles=(50, 90)
+            )
+            return {
+                'period_days': days,
+                'completed_deliveries': stats['count'],
+                'avg_turnaround_hours': stats['avg_hours'],
+                'min_turnaround_hours': stats['min_hours'],
+                'max_turnaround_hours': stats['max_hours'],
+                'median_turnaround_hours': stats['p50_hours'],
+                'p90_turnaround_hours': stats['p90_hours']
+            }
+        return DeliveryMetricsService._cached(f'turnaround:{days}', compute)
+
+    @staticmethod
+    def invalidate():
+        """Drop every cached metric by moving to a new version"""
+        try:
+            cache.incr(DeliveryMetricsService.VERSION_KEY)
+        except ValueError:
+            cache.set(DeliveryMetricsService.VERSION_KEY, 1, None)
+
+    @staticmethod
+    def _cached(name, compute):
+        version = cache.get(DeliveryMetricsService.VERSION_KEY, 0)
+        key = f'delivery_metrics:{version}:{name}'
+        result = cache.get(key)
+        if result is None:
+            result = compute()
+            cache.set(key, result, DeliveryMetricsService.CACHE_TIMEOUT)
+        return result
@@ -0,0 +1,271 @@
+"""
+Truck load planning for loaded deliveries
+
+Deliveries waiting in the 'loaded' queue are grouped by address area and
+packed onto trucks with first-fit decreasing on two dimensions (board feet
+and pieces). Trucks left under-filled are then consolidated across areas
+so that fewer trucks leave half empty. The planner reads the queue with a
+single query and works in memory; it never changes delivery records.
+"""
+import re
+from decimal import Decimal
+from django.db.models import Sum, Value
+from django.db.models.functions import Coalesce
+from app_delivery.models import Delivery
+
+
+# Address parts that carry no locality information
+AREA_NOISE = re.compile(r'^(philippines|ph|\d{4})$')
+UNKNOWN_AREA = 'unspecified'
+
+
+def address_area(address):
+    """
+    Locality of a free-text address, used to keep trips local
+
+    The last two comma-separated parts (usually city/municipality and
+    province), ignoring country names and ZIP codes.
+
+    'Purok 2, Brgy. Sabang, Lipa City, Batangas 4217' -> 'lipa city, batangas'
+    """
+    parts = [
+        re.sub(r'\s+\d{4}$', '', ' '.join(part.split()).lower())
+        for part in (address or '').split(',')
+    ]
+    parts = [part for part in parts if part and not AREA_NOISE.match(part)]
+    if not parts:
+        return UNKNOWN_AREA
+    return ', '.join(parts[-2:])
+
+
+class TruckLoadPlanner:
+    """Pack loaded deliveries onto trucks and produce trip sheets"""
+
+    DEFAULT_MAX_BOARD_FEET = 3000
+    DEFAULT_MAX_PIECES = 500
+    # Trips filled below this share of capacity are merged into others when possible
+    CONSOLIDATE_BELOW = Decimal('0.5')
+
+    @staticmethod
+    def load_queue():
+        """
+        Loaded deliveries with their board feet, pieces and address, in one query
+
+        Returns:
+            List[Dict]: One entry per delivery
+        """
+        rows = Delivery.objects.filter(status='loaded').annotate(
+            total_bf=Coalesce(Sum('sales_order__sales_order_items__board_feet'), Value(Decimal('0'))),
+            total_pieces=Coalesce(Sum('sales_order__sales_order_items__quantity_pieces'), Value(0))
+        ).values(
+            'id', 'delivery_number', 'created_at', 'sales_order__so_number',
+            'sales_order__customer__name', 'sales_order__customer__phone_number',
+            'sales_order__customer__address', 'total_bf', 'total_pieces'
+        ).order_by('created_at', 'id')
+
+        return [{
+            'delivery_id': row['id'],
+            'delivery_number': row['delivery_number'],
+            'so_number': row['sales_order__so_number'],
+            'customer_name': row['sales_order__customer__name'],
+            'customer_phone': row['sales_order__customer__phone_number'],
+            'customer_address': row['sales_order__customer__address'],
+            'area': address_area(row['sales_order__customer__address']),
+            'board_feet': Decimal(row['total_bf']),
+            'pieces': row['total_pieces'],
+            'created_at': row['created_at'],
+        } for row in rows]
+
+    @staticmethod
+    def plan(vehicles=None, deliveries=None, consolidate=True):
+        """
+        Pack deliveries onto trucks
+
+        Args:
+            vehicles: List of dicts with plate_number, driver_name,
+                max_board_feet and max_pieces; each trip goes on the smallest
+                truck its first (largest) delivery fits on, and a truck may do
+                several trips. Default: one generic truck of
+                DEFAULT_MAX_BOARD_FEET / DEFAULT_MAX_PIECES.
+            deliveries: Entries shaped like load_queue() (default: the loaded queue)
+            consolidate: Merge under-filled trips across areas
+
+        Returns:
+            Dict: trips (trip sheets), delivery and trip counts, average utilization
+
+        Raises:
+            ValueError: If a truck capacity is not a positive number
+        """
+        vehicles = TruckLoadPlanner._vehicles(vehicles)
+        deliveries = TruckLoadPlanner.load_queue() if deliveries is None else deliveries
+
+        areas = {}
+        for delivery in deliveries:
+            areas.setdefault(delivery['area'], []).append(delivery)
+
+        trips = []
+        # Biggest areas first, so their trips come first on the sheets
+        for area, stops in sorted(areas.items(), key=lambda item: -sum(d['board_feet'] for d in item[1])):
+            area_trips = []
+            for delivery in sorted(stops, key=lambda d: TruckLoadPlanner._size(d, vehicles[0]), reverse=True):
+                trip = next((trip for trip in area_trips if TruckLoadPlanner._fits(trip, delivery)), None)
+                if trip is None:
+                    trip = TruckLoadPlanner._open_trip(delivery, vehicles)
+                    area_trips.append(trip)
+                TruckLoadPlanner._add(trip, delivery)
+            trips.extend(area_trips)
+
+        if consolidate:
+            trips = TruckLoadPlanner._consolidate(trips)
+
+        sheets = [TruckLoadPlanner._trip_sheet(number, trip) for number, trip in enumerate(trips, start=1)]
+        return {
+            'delivery_count': len(deliveries),
+            'trip_count': len(sheets),
+            'avg_board_feet_utilization': (
+                round(sum(sheet['board_feet_utilization'] for sheet in sheets) / len(sheets), 1) if sheets else 0
+            ),
+            'trips': sheets,
+        }
+
+    @staticmethod
+    def format_trip_sheet(sheet):
+        """
+        Plain-text trip sheet for printing
+
+        Args:
+            sheet: One entry of plan()['trips']
+
+        Returns:
+            str: Trip sheet
+        """
+        lines = [
+            f"TRIP {sheet['trip_number']}  {sheet['plate_number']}  {sheet['driver_name']}",
+            f"Areas: {' / '.join(sheet['areas'])}",
+            f"Load: {sheet['total_board_feet']:.2f} bf ({sheet['board_feet_utilization']}%), "
+            f"{sheet['total_pieces']} pcs ({sheet['pieces_utilization']}%)",
+        ]
+        if sheet['oversize']:
+            lines.append('WARNING: exceeds truck capacity, split the load')
+        for number, stop in enumerate(sheet['stops'], start=1):
+            lines.append(
+                f"  {number}. {stop['delivery_number']} / {stop['so_number']}  {stop['customer_name']}"
+                f"  {stop['customer_phone'] or '-'}"
+            )
+            lines.append(f"     {stop['customer_address'] or '-'}")
+            lines.append(f"     {stop['pieces']} pcs, {stop['board_feet']:.2f} bf")
+        return '\n'.join(lines)
+
+    @staticmethod
+    def _vehicles(vehicles):
+        """
+        Normalized trucks, largest first
+
+        Raises:
+            ValueError: If a capacity is zero, negative or not a number
+        """
+        if not vehicles:
+            vehicles = [{}]
+        normalized = []
+        for vehicle in vehicles:
+            max_board_feet = vehicle.get('max_board_feet')
+            max_pieces = vehicle.get('max_pieces')
+            max_board_feet = Decimal(str(
+                TruckLoadPlanner.DEFAULT_MAX_BOARD_FEET if max_board_feet is None else max_board_feet
+            ))
+            max_pieces = int(TruckLoadPlanner.DEFAULT_MAX_PIECES if max_pieces is None else max_pieces)
+            if not max_board_feet.is_finite() or max_board_feet <= 0 or max_pieces <= 0:
+                raise ValueError("Truck capacities must be positive numbers")
+            normalized.append({
+                'plate_number': vehicle.get('plate_number') or 'Not assigned',
+                'driver_name': vehicle.get('driver_name') or 'Not assigned',
+                'max_board_feet': max_board_feet,
+                'max_pieces': max_pieces,
+            })
+        # Largest trucks are dispatched first
+        normalized.sort(key=lambda vehicle: (vehicle['max_board_feet'], vehicle['max_pieces']), reverse=True)
+        return normalized
+
+    @staticmethod
+    def _size(delivery, vehicle):
+        """Share of a truck a delivery needs on its tighter dimension"""
+        return max(delivery['board_feet'] / vehicle['max_board_feet'], Decimal(delivery['pieces']) / vehicle['max_pieces'])
+
+    @staticmethod
+    def _open_trip(delivery, vehicles):
+        """New trip on the smallest truck the delivery fits on, else the largest (oversize)"""
+        vehicle = next(
+            (
+                vehicle for vehicle in reversed(vehicles)
+                if delivery['board_feet'] <= vehicle['max_board_feet'] and delivery['pieces'] <= vehicle['max_pieces']
+            ),
+            vehicles[0]
+        )
+        return {'vehicle': vehicle, 'stops': [], 'board_feet': Decimal('0'), 'pieces': 0}
+
+    @staticmethod
+    def _fits(trip, delivery):
+        vehicle = trip['vehicle']
+        return (
+            trip['board_feet'] + delivery['board_feet'] <= vehicle['max_board_feet']
+            and trip['pieces'] + delivery['pieces'] <= vehicle['max_pieces']
+        )
+
+    @staticmethod
+    def _add(trip, delivery):
+        trip['stops'].append(delivery)
+        trip['board_feet'] += delivery['board_feet']
+        trip['pieces'] += delivery['pieces']
+
+    @staticmethod
+    def _fill(trip):
+        vehicle = trip['vehicle']
+        return max(trip['board_feet'] / vehicle['max_board_feet'], Decimal(trip['pieces']) / vehicle['max_pieces'])
+
+    @staticmethod
+    def _consolidate(trips):
+        """Move whole under-filled trips into the fullest trip they fit on"""
+        threshold = TruckLoadPlanner.CONSOLIDATE_BELOW
+        for trip in sorted(trips, key=TruckLoadPlanner._fill):
+            if not trip['stops'] or TruckLoadPlanner._fill(trip) >= threshold:
+                continue
+            candidates = [
+                other for other in trips
+                if other is not trip and other['stops'] and TruckLoadPlanner._fits(other, trip)
+            ]
+            if not candidates:
+                continue
+            target = max(candidates, key=TruckLoadPlanner._fill)
+            for delivery in trip['stops']:
+                TruckLoadPlanner._add(target, delivery)
+            trip['stops'] = []
+        return [trip for trip in trips if trip['stops']]
+
+    @staticmethod
+    def _trip_sheet(number, trip):
+        vehicle = trip['vehicle']
+        # Stops grouped by area, oldest orders first within an area
+        stops = sorted(trip['stops'], key=lambda d: (d['area'], d['created_at']))
+        return {
+            'trip_number': number,
+            'plate_number': vehicle['plate_number'],
+            'driver_name': vehicle['driver_name'],
+            'areas': list(dict.fromkeys(stop['area'] for stop in stops)),
+            'total_board_feet': float(trip['board_feet']),
+            'total_pieces': trip['pieces'],
+            'board_feet_utilization': round(float(trip['board_feet'] / vehicle['max_board_feet'] * 100), 1),
+            'pieces_utilization': round(trip['pieces'] / vehicle['max_pieces'] * 100, 1),
+            # Only a single delivery larger than the truck can overfill it
+            'oversize': trip['board_feet'] > vehicle['max_board_feet'] or trip['pieces'] > vehicle['max_pieces'],
+            'stops': [{
+                'delivery_id': stop['delivery_id'],
+                'delivery_number': stop['delivery_number'],
+                'so_number': stop['so_number'],
+                'customer_name': stop['customer_name'],
+                'customer_phone': stop['customer_phone'],
+                'customer_address': stop['customer_address'],
+                'area': stop['area'],
+                'board_feet': float(stop['board_feet']),
+                'pieces': stop['pieces'],
+            } for stop in stops],
+        }
@@ -6,6 +6,7 @@ from django.db.models import Count, Sum, Avg, Q, F
 from django.utils import timezone
 from datetime import timedelta, date
 from app_delivery.models import Delivery, DeliveryLog
+from app_delivery.metrics import DeliveryMetricsService
 from app_sales.models import SalesOrder
 
 
@@ -26,39 +27,7 @@ class DeliveryReports:
         if not summary_date:
             summary_date = timezone.now().date()
         
-        deliveries = Delivery.objects.filter(created_at__date=summary_date)
-        
-        delivered = deliveries.filter(status='delivered', delivered_at__date=summary_date).count()
-        pending = deliveries.filter(status='pending').count()
-        in_progress = deliveries.filter(status__in=['on_picking', 'loaded']).count()
-        in_transit = deliveries.filter(status='out_for_delivery').count()
-        
-        # Calculate metrics
-        delivered_today = Delivery.objects.filter(
-            status='delivered',
-            delivered_at__date=summary_date
-        )
-        
-        avg_time = None
-        if delivered_today.exists():
-            times = []
-            for d in delivered_today:
-                if d.delivered_at:
-                    time_taken = (d.delivered_at - d.created_at).total_seconds() / 3600
-                    times.append(time_taken)
-            if times:
-                avg_time = sum(times) / len(times)
-        
-        return {
-            'date': summary_date,
-            'deliveries_created': deliveries.count(),
-            'delivered_today': delivered,
-            'pending': pending,
-            'in_progress': in_progress,
-            'in_transit': in_transit,
-            'avg_delivery_time_hours': round(avg_time, 1) if avg_time else None,
-            'completion_rate': round((delivered / deliveries.count() * 100), 1) if deliveries.count() > 0 else 0
-        }
+        return DeliveryMetricsService.daily_summary(summary_date)
     
     @staticmethod
     def delivery_turnaround_time(days=30):
@@ -71,40 +40,7 @@ class DeliveryReports:
         Returns:
             Dict with turnaround metrics
         """
-        cutoff_date = timezone.now() - timedelta(days=days)
-        
-        completed = Delivery.objects.filter(
-            status='delivered',
-            delivered_at__gte=cutoff_date,
-            delivered_at__isnull=False
-        )
-        
-        times = []
-        for d in completed:
-            time_taken = (d.delivered_at - d.created_at).total_seconds() / 3600
-            times.append(time_taken)
-        
-        if not times:
-            return {
-                'period_days': days,
-                'completed_deliveries': 0,
-                'avg_turnaround_hours': None,
-                'min_turnaround_hours': None,
-                'max_turnaround_hours': None,
-                'median_turnaround_hours': None
-            }
-        
-        times.sort()
-        median = times[len(times) // 2]
-        
-        return {
-            'period_days': days,
-            'completed_deliveries': len(times),
-            'avg_turnaround_hours': round(sum(times) / len(times), 1),
-            'min_turnaround_hours': round(min(times), 1),
-            'max_turnaround_hours': round(max(times), 1),
-            'median_turnaround_hours': round(median, 1)
-        }
+        return DeliveryMetricsService.turnaround_report(days=days)
     
     @staticmethod
     def delivery_by_driver(days=30):
@@ -1,13 +1,18 @@
 """
 Delivery management services
 """
+from base64 import urlsafe_b64decode, urlsafe_b64encode
 from decimal import Decimal
-from django.db import transaction, IntegrityError
+from django.db import transaction
+from django.db.models import Case, When, Count, Sum, Value, IntegerField, Prefetch, Q
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from datetime import datetime
 from app_delivery.models import Delivery, DeliveryLog
-from app_sales.models import SalesOrder
+from app_delivery.metrics import DeliveryMetricsService
+from app_sales.models import SalesOrder, SalesOrderItem
+from core.services import DocumentSequenceService
 
 
 class DeliveryService:
@@ -23,6 +28,10 @@ class DeliveryService:
         'cancelled': []
     }
     
+    # Statuses shown on the picking list and in the dispatch queue
+    PICKING_STATUSES = ['pending', 'on_picking']
+    DISPATCH_STATUSES = ['loaded', 'out_for_delivery']
+    
     @staticmethod
     @transaction.atomic
     def create_delivery_from_order(sales_order_id, created_by=None):
@@ -48,13 +57,10 @@ class DeliveryService:
         # Create delivery
         delivery = Delivery.objects.create(
             sales_order=so,
-            status='pending'
+            status='pending',
+            delivery_number=DeliveryService._generate_delivery_number()
         )
         
-        # Generate delivery number
-        delivery.delivery_number = DeliveryService._generate_delivery_number()
-        delivery.save()
-        
         # Create initial log entry
         DeliveryLog.objects.create(
             delivery=delivery,
@@ -69,47 +75,39 @@ class DeliveryService:
     def _generate_delivery_number():
         """Generate unique delivery number"""
         today = datetime.now().strftime('%Y%m%d')
-        count = Delivery.objects.filter(delivery_number__startswith=f'DLV-{today}').count() + 1
-        return f'DLV-{today}-{count:04d}'
+        return DocumentSequenceService.next_number(
+            f'DLV-{today}-', model=Delivery, field='delivery_number'
+        )
 
     @staticmethod
     @transaction.atomic
-    def create_delivery_for_order(sales_order, created_by=None, max_retries=5):
-        """Create a Delivery for the given SalesOrder, retrying on unique constraint failures.
+    def create_delivery_for_order(sales_order, created_by=None):
+        """Create a Delivery for the given SalesOrder.
 
         Returns the Delivery instance. If a Delivery already exists for the order, returns it.
-        Raises IntegrityError if unable to create a unique delivery number after retries.
+        Delivery numbers come from the row-locked sequence counter, so they cannot
+        collide and need no retry loop.
         """
         try:
             return Delivery.objects.get(sales_order=sales_order)
         except Delivery.DoesNotExist:
             pass
 
-        # Try generating and inserting a unique delivery_number, retrying on conflicts
-        for _ in range(max_retries):
-            delivery_number = DeliveryService._generate_delivery_number()
-            try:
-                delivery = Delivery.objects.create(
-                    sales_order=sales_order,
-                    status='pending',
-                    delivery_number=delivery_number
-                )
-
-                # Create initial log entry
-                DeliveryLog.objects.create(
-                    delivery=delivery,
-                    status='pending',
-                    notes=f'Delivery created for {sales_order.so_number}',
-                    updated_by=created_by
-                )
+        delivery = Delivery.objects.create(
+            sales_order=sales_order,
+            status='pending',
+            delivery_number=DeliveryService._generate_delivery_number()
+        )
 
-                return delivery
-            except IntegrityError:
-                # Another process created the same delivery_number, retry
-                continue
+        # Create initial log entry
+        DeliveryLog.objects.create(
+            delivery=delivery,
+            status='pending',
+            notes=f'Delivery created for {sales_order.so_number}',
+            updated_by=created_by
+        )
 
-        # If we reach here, retries exhausted
-        raise IntegrityError('Could not generate a unique delivery_number after retries')
+        return delivery
     
     @staticmethod
     @transaction.atomic
@@ -171,86 +169,203 @@ class DeliveryService:
         return delivery
     
     @staticmethod
-    def get_picking_list(status_filter='pending'):
+    def get_picking_list(status_filter=None, limit=None):
         """
         Get picking list for warehouse staff
         
+        Args:
+            status_filter: Filter by delivery status (default: all of PICKING_STATUSES)
+            limit: Maximum number of deliveries to return
+            
+        Returns:
+            List of deliveries with items to pick, in-progress picks first
+        """
+        deliveries = DeliveryService.picking_queryset(status_filter)
+        if limit is not None:
+            deliveries = deliveries[:limit]
+        return [DeliveryService.picking_entry(delivery) for delivery in deliveries]
+    
+    @staticmethod
+    def get_picking_page(status_filter=None, cursor=None, page_size=25):
+        """
+        One page of the picking list, keyset-paginated
+        
+        The cursor holds the (priority, created_at, id) of the last delivery
+        on the previous page, so paging needs no OFFSET and stays stable
+        while deliveries move on. priority is computed, so each page still
+        sorts the open picking set; that set is small (pending/on_picking).
+        
         Args:
             status_filter: Filter by delivery status
+            cursor: Opaque cursor from the previous page's next_cursor
+            page_size: Deliveries per page
+            
+        Returns:
+            Dict: items and next_cursor (None on the last page)
+            
+        Raises:
+            ValidationError: If the cursor is malformed
+        """
+        deliveries = DeliveryService.picking_queryset(status_filter)
+        if cursor:
+            priority, created_at, delivery_id = DeliveryService._decode_picking_cursor(cursor)
+            deliveries = deliveries.filter(
+                Q(priority__lt=priority)
+                | Q(priority=priority, created_at__gt=created_at)
+                | Q(priority=priority, created_at=created_at, id__gt=delivery_id)
+            )
+        
+        page = list(deliveries[:page_size + 1])
+        next_cursor = None
+        if len(page) > page_size:
+            page = page[:page_size]
+            last = page[-1]
+            next_cursor = DeliveryService._encode_picking_cursor(last.priority, last.created_at, last.id)
+        
+        return {
+            'items': [DeliveryService.picking_entry(delivery) for delivery in page],
+            'next_cursor': next_cursor
+        }
+    
+    @staticmethod
+    def picking_queryset(status_filter=None):
+        """
+        Open deliveries in picking order, with customers and products loaded
+        
+        Args:
+            status_filter: Only deliveries in this picking status
+            
+        Returns:
+            QuerySet: Deliveries annotated with priority (1 = picking in progress)
+        """
+        statuses = DeliveryService.PICKING_STATUSES
+        if status_filter:
+            statuses = [status_filter] if status_filter in statuses else []
+        
+        return Delivery.objects.filter(status__in=statuses).annotate(
+            priority=Case(When(status='on_picking', then=Value(1)), default=Value(0), output_field=IntegerField())
+        ).select_related('sales_order__customer').prefetch_related(
+            Prefetch(
+                'sales_order__sales_order_items',
+                queryset=SalesOrderItem.objects.select_related('product').order_by('id')
+            )
+        ).order_by('-priority', 'created_at', 'id')
+    
+    @staticmethod
+    def picking_entry(delivery):
+        """Picking list row for a delivery from picking_queryset()"""
+        so = delivery.sales_order
+        return {
+            'delivery_id': delivery.id,
+            'delivery_number': delivery.delivery_number,
+            'so_number': so.so_number,
+            'customer_name': so.customer.name,
+            'customer_phone': so.customer.phone_number,
+            'customer_address': so.customer.address,
+            'status': delivery.status,
+            'items': [
+                {
+                    'product_id': item.product.id,
+                    'product_name': item.product.name,
+                    'sku': item.product.sku,
+                    'quantity_pieces': item.quantity_pieces,
+                    'board_feet': float(item.board_feet),
+                    'dimensions': f"{item.product.thickness}\" x {item.product.width}\" x {item.product.length}ft"
+                }
+                for item in so.sales_order_items.all()
+            ],
+            'created_at': delivery.created_at,
+            'priority': delivery.priority  # Priority to in-progress
+        }
+    
+    @staticmethod
+    def count_picking_list(status_filter=None):
+        """
+        Count deliveries on the picking list
+        
+        Args:
+            status_filter: Only deliveries in this picking status
             
         Returns:
-            List of deliveries with items to pick
+            int: Number of deliveries
         """
-        if status_filter not in ['pending', 'on_picking']:
-            status_filter = 'pending'
-        
-        deliveries = Delivery.objects.filter(
-            status__in=['pending', 'on_picking']
-        ).select_related('sales_order', 'sales_order__customer').prefetch_related(
-            'sales_order__sales_order_items'
-        ).order_by('created_at')
-        
-        picking_list = []
-        for delivery in deliveries:
-            so = delivery.sales_order
-            picking_list.append({
-                'delivery_id': delivery.id,
-                'delivery_number': delivery.delivery_number,
-                'so_number': so.so_number,
-                'customer_name': so.customer.name,
-                'customer_phone': so.customer.phone_number,
-                'customer_address': so.customer.address,
-                'status': delivery.status,
-                'items': [
-                    {
-                        'product_id': item.product.id,
-                        'product_name': item.product.name,
-                        'sku': item.product.sku,
-                        'quantity_pieces': item.quantity_pieces,
-                        'board_feet': float(item.board_feet),
-                        'dimensions': f"{item.product.thickness}\" x {item.product.width}\" x {item.product.length}ft"
-                    }
-                    for item in so.sales_order_items.all()
-                ],
-                'created_at': delivery.created_at,
-                'priority': 1 if delivery.status == 'on_picking' else 0  # Priority to in-progress
-            })
-        
-        # Sort by priority and creation date
-        picking_list.sort(key=lambda x: (-x['priority'], x['created_at']))
-        return picking_list
+        return DeliveryService.picking_queryset(status_filter).count()
+    
+    @staticmethod
+    def _encode_picking_cursor(priority, created_at, delivery_id):
+        payload = f"{priority}|{created_at.isoformat()}|{delivery_id}"
+        return urlsafe_b64encode(payload.encode()).decode()
     
     @staticmethod
-    def get_delivery_queue():
+    def _decode_picking_cursor(cursor):
+        try:
+            priority, created_at, delivery_id = urlsafe_b64decode(cursor.encode()).decode().split('|')
+            return int(priority), datetime.fromisoformat(created_at), int(delivery_id)
+        except (ValueError, UnicodeError):
+            raise ValidationError("Invalid cursor")
+    
+    @staticmethod
+    def get_delivery_queue(status=None, limit=None):
         """
         Get delivery queue for dispatch
         
+        Item counts and board feet are aggregated in the same query as the
+        deliveries, so the queue costs one query however many trucks are loaded.
+        
+        Args:
+            status: Only deliveries in this dispatch status (default: all of DISPATCH_STATUSES)
+            limit: Maximum number of deliveries to return
+            
         Returns:
             List of ready-to-dispatch deliveries
         """
-        deliveries = Delivery.objects.filter(
-            status__in=['loaded', 'out_for_delivery']
-        ).select_related('sales_order', 'sales_order__customer').order_by('status', 'created_at')
-        
-        queue = []
-        for delivery in deliveries:
-            so = delivery.sales_order
-            queue.append({
-                'delivery_id': delivery.id,
-                'delivery_number': delivery.delivery_number,
-                'so_number': so.so_number,
-                'customer_name': so.customer.name,
-                'customer_phone': so.customer.phone_number,
-                'customer_address': so.customer.address,
-                'status': delivery.status,
-                'driver_name': delivery.driver_name or 'Not assigned',
-                'plate_number': delivery.plate_number or 'Not assigned',
-                'total_items': so.sales_order_items.count(),
-                'total_bf': float(sum(item.board_feet for item in so.sales_order_items.all())),
-                'created_at': delivery.created_at
-            })
-        
-        return queue
+        deliveries = DeliveryService._dispatch_queryset(status).annotate(
+            total_items=Count('sales_order__sales_order_items'),
+            total_bf=Coalesce(Sum('sales_order__sales_order_items__board_feet'), Value(Decimal('0')))
+        ).values(
+            'id', 'delivery_number', 'status', 'driver_name', 'plate_number', 'created_at',
+            'sales_order__so_number', 'sales_order__customer__name',
+            'sales_order__customer__phone_number', 'sales_order__customer__address',
+            'total_items', 'total_bf'
+        ).order_by('status', 'created_at')
+        if limit is not None:
+            deliveries = deliveries[:limit]
+        
+        return [{
+            'delivery_id': row['id'],
+            'delivery_number': row['delivery_number'],
+            'so_number': row['sales_order__so_number'],
+            'customer_name': row['sales_order__customer__name'],
+            'customer_phone': row['sales_order__customer__phone_number'],
+            'customer_address': row['sales_order__customer__address'],
+            'status': row['status'],
+            'driver_name': row['driver_name'] or 'Not assigned',
+            'plate_number': row['plate_number'] or 'Not assigned',
+            'total_items': row['total_items'],
+            'total_bf': float(row['total_bf']),
+            'created_at': row['created_at']
+        } for row in deliveries]
+    
+    @staticmethod
+    def count_delivery_queue(status=None):
+        """
+        Count deliveries in the dispatch queue
+        
+        Args:
+            status: Only deliveries in this dispatch status
+            
+        Returns:
+            int: Number of deliveries
+        """
+        return DeliveryService._dispatch_queryset(status).count()
+    
+    @staticmethod
+    def _dispatch_queryset(status=None):
+        """Deliveries in the dispatch queue, optionally narrowed to one status"""
+        statuses = DeliveryService.DISPATCH_STATUSES
+        if status:
+            statuses = [status] if status in statuses else []
+        return Delivery.objects.filter(status__in=statuses)
     
     @staticmethod
     def get_delivery_metrics():
@@ -258,56 +373,23 @@ class DeliveryService:
         Get delivery metrics summary
         
         Returns:
-            Dict with delivery KPIs
+            Dict with delivery KPIs (cached, see DeliveryMetricsService)
         """
-        from django.db.models import Count, Q, Avg
-        from datetime import timedelta
-        
-        total = Delivery.objects.count()
-        pending = Delivery.objects.filter(status='pending').count()
-        on_picking = Delivery.objects.filter(status='on_picking').count()
-        loaded = Delivery.objects.filter(status='loaded').count()
-        in_transit = Delivery.objects.filter(status='out_for_delivery').count()
-        delivered = Delivery.objects.filter(status='delivered').count()
-        
-        # Calculate average delivery time
-        delivered_with_time = Delivery.objects.filter(
-            status='delivered',
-            delivered_at__isnull=False
-        ).annotate(
-            delivery_time=(
-                Delivery._meta.get_field('delivered_at').get_prep_value
-            )
-        )
-        
-        # Simpler approach: get last 7 days delivered
-        recent_delivered = Delivery.objects.filter(
-            status='delivered',
-            delivered_at__gte=timezone.now() - timedelta(days=7)
-        )
-        
-        avg_time_hours = 0
-        if recent_delivered.exists():
-            total_time = sum((d.delivered_at - d.created_at).total_seconds() 
-                           for d in recent_delivered if d.delivered_at)
-            avg_time_hours = (total_time / len(recent_delivered)) / 3600 if recent_delivered.count() > 0 else 0
-        
-        return {
-            'total_deliveries': total,
-            'pending': pending,
-            'on_picking': on_picking,
-            'loaded': loaded,
-            'in_transit': in_transit,
-            'delivered': delivered,
-            'avg_delivery_time_hours': round(avg_time_hours, 1),
-            'completion_rate': round((delivered / total * 100), 1) if total > 0 else 0
-        }
+        return DeliveryMetricsService.overview()
     
     @staticmethod
+    @transaction.atomic
     def bulk_update_status(delivery_ids, new_status, notes='', updated_by=None):
         """
         Bulk update delivery status
         
+        Current statuses are read with one locked SELECT and checked against
+        VALID_TRANSITIONS; valid deliveries are moved with one UPDATE per
+        source status and their log entries written with one bulk insert.
+        Where row locks are not available (SQLite), a delivery changed by
+        someone else between the SELECT and its UPDATE is reported as
+        failed and gets no log entry.
+        
         Args:
             delivery_ids: List of delivery IDs
             new_status: New status for all
@@ -315,30 +397,78 @@ class DeliveryService:
             updated_by: User updating
             
         Returns:
-            Dict with success/failure counts
+            Dict with success/failure counts and a result per delivery ID
         """
-        success_count = 0
-        failed_count = 0
-        errors = []
-        
+        ids = []
+        results = {}
         for delivery_id in delivery_ids:
             try:
-                DeliveryService.update_status(
-                    delivery_id=delivery_id,
-                    new_status=new_status,
-                    notes=notes,
-                    updated_by=updated_by
+                delivery_id = int(delivery_id)
+            except (TypeError, ValueError):
+                # Keyed by repr() so unhashable junk (lists, dicts) cannot break the dict
+                results[repr(delivery_id)] = {'delivery_id': delivery_id, 'updated': False, 'error': 'Invalid delivery ID'}
+                continue
+            if delivery_id not in results:
+                ids.append(delivery_id)
+                results[delivery_id] = None
+        
+        current = dict(
+            Delivery.objects.select_for_update().filter(id__in=ids).values_list('id', 'status')
+        )
+        
+        by_source = {}
+        for delivery_id in ids:
+            current_status = current.get(delivery_id)
+            valid_next = DeliveryService.VALID_TRANSITIONS.get(current_status, [])
+            result = {'delivery_id': delivery_id, 'previous_status': current_status, 'updated': False}
+            if current_status is None:
+                result['error'] = 'Delivery not found'
+            elif new_status not in valid_next:
+                result['error'] = (
+                    f"Invalid status transition from {current_status} to {new_status}. "
+                    f"Valid options: {', '.join(valid_next)}"
                 )
-                success_count += 1
-            except ValidationError as e:
-                failed_count += 1
-                errors.append(f"Delivery {delivery_id}: {str(e)}")
-            except Exception as e:
-                failed_count += 1
-                errors.append(f"Delivery {delivery_id}: {str(e)}")
+            else:
+                by_source.setdefault(current_status, []).append(delivery_id)
+            results[delivery_id] = result
+        
+        now = timezone.now()
+        fields = {'status': new_status, 'updated_at': now}
+        if new_status == 'delivered':
+            fields['delivered_at'] = now
+        
+        moved = []
+        for source_status, group in by_source.items():
+            # The status guard keeps the UPDATE honest even without row locks (SQLite)
+            count = Delivery.objects.filter(id__in=group, status=source_status).update(**fields)
+            if count != len(group):
+                # Some rows changed status after the SELECT; only the ones stamped by this UPDATE moved
+                won = set(Delivery.objects.filter(
+                    id__in=group, status=new_status, updated_at=now
+                ).values_list('id', flat=True))
+                for delivery_id in group:
+                    if delivery_id not in won:
+                        results[delivery_id]['error'] = (
+                            f"Delivery is no longer {source_status}; it was changed by another update"
+                        )
+                group = [delivery_id for delivery_id in group if delivery_id in won]
+            moved.extend(group)
+        
+        if moved:
+            DeliveryLog.objects.bulk_create([
+                DeliveryLog(delivery_id=delivery_id, status=new_status, notes=notes, updated_by=updated_by)
+                for delivery_id in moved
+            ])
+            for delivery_id in moved:
+                results[delivery_id]['updated'] = True
+                results[delivery_id]['status'] = new_status
+            # QuerySet.update() skips the Delivery signals
+            transaction.on_commit(DeliveryMetricsService.invalidate)
         
+        failed = [result for result in results.values() if not result['updated']]
         return {
-            'success': success_count,
-            'failed': failed_count,
-            'errors': errors
+            'success': len(moved),
+            'failed': len(failed),
+            'errors': [f"Delivery {result['delivery_id']}: {result['error']}" for result in failed],
+            'results': list(results.values())
         }
@@ -0,0 +1,11 @@
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from app_delivery.models import Delivery
+from app_delivery.metrics import DeliveryMetricsService
+
+
+@receiver([post_save, post_delete], sender=Delivery)
+def invalidate_delivery_metrics(sender, instance, **kwargs):
+    """Recompute delivery KPIs once the change is committed"""
+    transaction.on_commit(DeliveryMetricsService.invalidate)
@@ -1,3 +1,458 @@
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+from app_inventory.tests import make_product
+from app_sales.models import Customer, SalesOrder, SalesOrderItem
+from app_delivery.models import Delivery, DeliveryLog
+from app_delivery.metrics import DeliveryMetricsService
+from app_delivery.planning import TruckLoadPlanner, address_area
+from app_delivery.services import DeliveryService
 
-# Create your tests here.
+
+def make_order(customer=None, **kwargs):
+    """Sales order for a (shared) test customer"""
+    customer = customer or Customer.objects.get_or_create(
+        name='Test Customer', defaults={'phone_number': '09170000000'}
+    )[0]
+    return SalesOrder.objects.create(customer=customer, payment_type='cash', **kwargs)
+
+
+def make_delivery(status='pending', items=(), customer=None, **kwargs):
+    """Delivery in the given status for a new order with (product, pieces) items"""
+    order = make_order(customer)
+    for product, pieces in items:
+        board_feet = product.board_feet_for(pieces)
+        SalesOrderItem.objects.create(
+            sales_order=order, product=product, quantity_pieces=pieces, board_feet=board_feet,
+            unit_price=product.price_per_board_foot, subtotal=board_feet * product.price_per_board_foot
+        )
+    return Delivery.objects.create(
+        sales_order=order, status=status,
+        delivery_number=DeliveryService._generate_delivery_number(), **kwargs
+    )
+
+
+class CreateDeliveryTests(TestCase):
+    """Delivery creation and numbering"""
+
+    def test_creates_pending_delivery_with_log(self):
+        delivery = DeliveryService.create_delivery_for_order(make_order())
+
+        self.assertEqual(delivery.status, 'pending')
+        self.assertRegex(delivery.delivery_number, r'^DLV-\d{8}-0001$')
+        self.assertEqual(DeliveryLog.objects.filter(delivery=delivery, status='pending').count(), 1)
+
+    def test_existing_delivery_is_returned_not_duplicated(self):
+        order = make_order()
+        first = DeliveryService.create_delivery_for_order(order)
+        second = DeliveryService.create_delivery_for_order(order)
+
+        self.assertEqual(first.pk, second.pk)
+        self.assertEqual(Delivery.objects.count(), 1)
+
+    def test_numbers_do_not_collide_across_orders(self):
+        numbers = {DeliveryService.create_delivery_for_order(make_order()).delivery_number for _ in range(3)}
+        self.assertEqual(len(numbers), 3)
+
+    def test_create_from_order_rejects_a_second_delivery(self):
+        order = make_order()
+        DeliveryService.create_delivery_from_order(order.id)
+        with self.assertRaises(ValidationError):
+            DeliveryService.create_delivery_from_order(order.id)
+
+
+class DeliveryQueueTests(TestCase):
+    """DeliveryService.get_delivery_queue and the dispatch_queue endpoint"""
+
+    def setUp(self):
+        self.product = make_product(pieces=None)
+        self.loaded = make_delivery('loaded', items=[(self.product, 3), (self.product, 2)])
+        self.out = make_delivery('out_for_delivery', driver_name='Juan', plate_number='ABC-1234')
+        make_delivery('pending', items=[(self.product, 1)])
+
+    def test_queue_lists_dispatch_statuses_with_totals(self):
+        queue = DeliveryService.get_delivery_queue()
+
+        self.assertEqual([row['delivery_id'] for row in queue], [self.loaded.id, self.out.id])
+        self.assertEqual(queue[0]['total_items'], 2)
+        self.assertAlmostEqual(queue[0]['total_bf'], 26.67, places=2)
+        self.assertEqual(queue[0]['driver_name'], 'Not assigned')
+        self.assertEqual(queue[1]['total_items'], 0)
+        self.assertEqual(queue[1]['total_bf'], 0.0)
+        self.assertEqual(queue[1]['plate_number'], 'ABC-1234')
+
+    def test_status_filter_and_limit(self):
+        self.assertEqual([row['delivery_id'] for row in DeliveryService.get_delivery_queue(status='out_for_delivery')], [self.out.id])
+        self.assertEqual(DeliveryService.get_delivery_queue(status='pending'), [])
+        self.assertEqual(len(DeliveryService.get_delivery_queue(limit=1)), 1)
+
+    def test_count_matches_the_queue(self):
+        self.assertEqual(DeliveryService.count_delivery_queue(), 2)
+        self.assertEqual(DeliveryService.count_delivery_queue('loaded'), 1)
+        self.assertEqual(DeliveryService.count_delivery_queue('delivered'), 0)
+
+    def test_queue_is_one_query(self):
+        for _ in range(3):
+            make_delivery('loaded', items=[(self.product, 4)])
+        with CaptureQueriesContext(connection) as queries:
+            queue = DeliveryService.get_delivery_queue()
+        self.assertEqual(len(queue), 5)
+        self.assertEqual(len(queries), 1)
+
+    def test_endpoint_reports_the_full_count_when_limited(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='staff', password='x'))
+
+        limited = client.get('/api/warehouse/dispatch_queue/', {'limit': 1}).json()
+        self.assertEqual(limited['total_items'], 2)
+        self.assertEqual(len(limited['items']), 1)
+
+        # A bad limit is ignored rather than rejected
+        unlimited = client.get('/api/warehouse/dispatch_queue/', {'limit': 'abc', 'status': 'loaded'}).json()
+        self.assertEqual(unlimited['total_items'], 1)
+        self.assertEqual(unlimited['items'][0]['delivery_id'], self.loaded.id)
+
+
+class PickingListTests(TestCase):
+    """Keyset-paginated picking list"""
+
+    def setUp(self):
+        self.product = make_product(pieces=None)
+        self.deliveries = [
+            make_delivery('on_picking' if i % 3 == 0 else 'pending', items=[(self.product, i + 1)])
+            for i in range(7)
+        ]
+        make_delivery('loaded', items=[(self.product, 1)])
+        # Shared timestamps leave the id as the only tie-breaker
+        Delivery.objects.filter(id__in=[d.id for d in self.deliveries[:4]]).update(
+            created_at=self.deliveries[0].created_at
+        )
+
+    def expected_order(self, deliveries):
+        return [
+            d.id for d in sorted(
+                deliveries,
+                key=lambda d: (d.status != 'on_picking', Delivery.objects.get(id=d.id).created_at, d.id)
+            )
+        ]
+
+    def walk(self, page_size, status_filter=None):
+        ids, cursor = [], None
+        while True:
+            page = DeliveryService.get_picking_page(status_filter, cursor=cursor, page_size=page_size)
+            ids.extend(item['delivery_id'] for item in page['items'])
+            cursor = page['next_cursor']
+            if cursor is None:
+                return ids
+
+    def test_pages_cover_the_full_list_in_priority_order(self):
+        full = [entry['delivery_id'] for entry in DeliveryService.get_picking_list()]
+
+        self.assertEqual(full, self.expected_order(self.deliveries))
+        for page_size in (1, 2, 3, 7, 10):
+            with self.subTest(page_size=page_size):
+                self.assertEqual(self.walk(page_size), full)
+
+    def test_status_filter(self):
+        on_picking = [d for d in self.deliveries if d.status == 'on_picking']
+
+        self.assertEqual(self.walk(2, 'on_picking'), self.expected_order(on_picking))
+        self.assertEqual(DeliveryService.count_picking_list('on_picking'), len(on_picking))
+        self.assertEqual(DeliveryService.count_picking_list('loaded'), 0)
+
+    def test_entries_carry_their_items(self):
+        entry = DeliveryService.get_picking_page(page_size=1)['items'][0]
+
+        self.assertEqual(entry['delivery_id'], self.deliveries[0].id)
+        self.assertEqual(entry['priority'], 1)
+        self.assertEqual(entry['items'][0]['sku'], self.product.sku)
+        self.assertEqual(entry['items'][0]['quantity_pieces'], 1)
+
+    def test_page_query_count_does_not_grow_with_page_size(self):
+        with CaptureQueriesContext(connection) as small:
+            DeliveryService.get_picking_page(page_size=2)
+        with CaptureQueriesContext(connection) as large:
+            DeliveryService.get_picking_page(page_size=7)
+        self.assertEqual(len(small), len(large))
+
+    def test_invalid_cursor_is_rejected(self):
+        for cursor in ('not-a-cursor', 'bm9waXBlcw=='):
+            with self.subTest(cursor=cursor), self.assertRaises(ValidationError):
+                DeliveryService.get_picking_page(cursor=cursor)
+
+    def test_endpoint_follows_next_cursor(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='picker', password='x'))
+
+        first = client.get('/api/warehouse/picking_list/', {'page_size': 4}).json()
+        self.assertEqual(first['total_items'], 7)
+        self.assertEqual(len(first['items']), 4)
+        self.assertIn('cursor=', first['next'])
+
+        second = client.get('/api/warehouse/picking_list/', {'page_size': 4, 'cursor': first['next_cursor']}).json()
+        self.assertEqual(len(second['items']), 3)
+        self.assertIsNone(second['next_cursor'])
+        self.assertEqual(
+            [item['delivery_id'] for item in first['items'] + second['items']],
+            self.expected_order(self.deliveries)
+        )
+
+        response = client.get('/api/warehouse/picking_list/', {'cursor': 'garbage'})
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': 'Invalid cursor'})
+
+
+class DeliveryMetricsTests(TestCase):
+    """DeliveryMetricsService aggregates and caching"""
+
+    def setUp(self):
+        cache.clear()
+        now = timezone.now()
+        self.pending = make_delivery('pending')
+        make_delivery('loaded')
+        # Delivered 1, 2, 3 and 10 hours after creation
+        for hours in (1, 2, 3, 10):
+            delivery = make_delivery('delivered')
+            Delivery.objects.filter(id=delivery.id).update(
+                created_at=now - timedelta(hours=hours), delivered_at=now
+            )
+
+    def test_status_counts_in_one_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            counts = DeliveryMetricsService.status_counts()
+
+        self.assertEqual(len(queries), 1)
+        self.assertEqual(counts['total'], 6)
+        self.assertEqual((counts['pending'], counts['loaded'], counts['delivered'], counts['on_picking']), (1, 1, 4, 0))
+
+    def test_turnaround_statistics_and_percentiles(self):
+        stats = DeliveryMetricsService.turnaround(Delivery.objects.all(), percentiles=(50, 90))
+
+        self.assertEqual(stats['count'], 4)
+        self.assertEqual((stats['min_hours'], stats['max_hours'], stats['avg_hours']), (1.0, 10.0, 4.0))
+        self.assertEqual(stats['p50_hours'], 3.0)
+        self.assertEqual(stats['p90_hours'], 10.0)
+
+    def test_turnaround_of_nothing_delivered(self):
+        stats = DeliveryMetricsService.turnaround(Delivery.objects.filter(status='pending'), percentiles=(50,))
+        self.assertEqual(stats, {'count': 0, 'avg_hours': None, 'min_hours': None, 'max_hours': None, 'p50_hours': None})
+
+    def test_overview(self):
+        overview = DeliveryMetricsService.overview()
+
+        self.assertEqual(overview['total_deliveries'], 6)
+        self.assertEqual(overview['delivered'], 4)
+        self.assertEqual(overview['completion_rate'], 66.7)
+        self.assertEqual(overview['avg_delivery_time_hours'], 4.0)
+
+    def test_overview_is_cached_until_a_delivery_changes(self):
+        DeliveryMetricsService.overview()
+        with CaptureQueriesContext(connection) as queries:
+            DeliveryMetricsService.overview()
+        self.assertEqual(len(queries), 0)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            DeliveryService.update_status(self.pending.id, 'on_picking')
+        overview = DeliveryMetricsService.overview()
+        self.assertEqual((overview['pending'], overview['on_picking']), (0, 1))
+
+    def test_turnaround_report(self):
+        report = DeliveryMetricsService.turnaround_report(days=30)
+
+        self.assertEqual(report['completed_deliveries'], 4)
+        self.assertEqual(report['median_turnaround_hours'], 3.0)
+        self.assertEqual(report['p90_turnaround_hours'], 10.0)
+
+
+class BulkUpdateStatusTests(TestCase):
+    """DeliveryService.bulk_update_status"""
+
+    def setUp(self):
+        self.first = make_delivery('pending')
+        self.second = make_delivery('pending')
+        self.loaded = make_delivery('loaded')
+
+    def results(self, outcome):
+        return {result['delivery_id']: result for result in outcome['results']}
+
+    def test_moves_valid_deliveries_and_logs_each(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            outcome = DeliveryService.bulk_update_status([self.first.id, str(self.second.id)], 'on_picking', notes='Wave 1')
+
+        self.assertEqual((outcome['success'], outcome['failed']), (2, 0))
+        self.assertEqual(Delivery.objects.filter(status='on_picking').count(), 2)
+        self.assertEqual(DeliveryLog.objects.filter(status='on_picking', notes='Wave 1').count(), 2)
+        self.assertEqual(len(callbacks), 1)
+
+    def test_invalid_source_states_are_rejected(self):
+        outcome = DeliveryService.bulk_update_status([self.first.id, self.loaded.id], 'on_picking')
+        results = self.results(outcome)
+
+        self.assertEqual((outcome['success'], outcome['failed']), (1, 1))
+        self.assertFalse(results[self.loaded.id]['updated'])
+        self.assertIn('Invalid status transition from loaded to on_picking', results[self.loaded.id]['error'])
+        self.assertEqual(Delivery.objects.get(id=self.loaded.id).status, 'loaded')
+        self.assertFalse(DeliveryLog.objects.filter(delivery=self.loaded).exists())
+
+    def test_delivered_sets_delivered_at(self):
+        DeliveryService.bulk_update_status([self.loaded.id], 'delivered')
+        self.assertIsNotNone(Delivery.objects.get(id=self.loaded.id).delivered_at)
+
+    def test_unknown_invalid_and_duplicate_ids(self):
+        outcome = DeliveryService.bulk_update_status(
+            [self.first.id, self.first.id, 999999, 'abc', [1], {'id': 1}], 'on_picking'
+        )
+
+        self.assertEqual((outcome['success'], outcome['failed']), (1, 4))
+        self.assertIn('Delivery 999999: Delivery not found', outcome['errors'])
+        self.assertEqual(outcome['errors'].count("Delivery {'id': 1}: Invalid delivery ID"), 1)
+        self.assertEqual(DeliveryLog.objects.filter(delivery=self.first).count(), 1)
+
+    def test_delivery_changed_after_the_select_is_not_reported_as_updated(self):
+        def stale_select():
+            snapshot = list(Delivery.objects.values_list('id', 'status'))
+            # Another request moves the second delivery before our UPDATE runs
+            Delivery.objects.filter(id=self.second.id).update(status='on_picking')
+            locked = mock.Mock()
+            locked.filter.return_value.values_list.return_value = snapshot
+            return locked
+
+        with mock.patch.object(Delivery.objects, 'select_for_update', side_effect=stale_select):
+            outcome = DeliveryService.bulk_update_status([self.first.id, self.second.id], 'on_picking')
+        results = self.results(outcome)
+
+        self.assertEqual((outcome['success'], outcome['failed']), (1, 1))
+        self.assertTrue(results[self.first.id]['updated'])
+        self.assertFalse(results[self.second.id]['updated'])
+        self.assertIn('no longer pending', results[self.second.id]['error'])
+        self.assertEqual(list(DeliveryLog.objects.values_list('delivery_id', flat=True)), [self.first.id])
+
+    def test_endpoint_rejects_a_non_list(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='bulk', password='x'))
+
+        response = client.post('/api/warehouse/bulk_status_change/', {'delivery_ids': '12', 'status': 'on_picking'}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+        response = client.post(
+            '/api/deliveries/bulk_status_update/',
+            {'delivery_ids': [{'id': 1}, self.first.id], 'status': 'on_picking'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['success'], 1)
+
+
+def stop(number, board_feet, pieces=10, area='lipa city, batangas'):
+    """Planner input shaped like TruckLoadPlanner.load_queue()"""
+    return {
+        'delivery_id': number, 'delivery_number': f'DLV-{number}', 'so_number': f'SO-{number}',
+        'customer_name': 'Test Customer', 'customer_phone': '', 'customer_address': area,
+        'area': area, 'board_feet': Decimal(board_feet), 'pieces': pieces,
+        'created_at': timezone.now() + timedelta(minutes=number),
+    }
+
+
+class TruckLoadPlannerTests(TestCase):
+    """TruckLoadPlanner packing and trip sheets"""
+
+    SMALL = {'plate_number': 'SML-50', 'max_board_feet': 50, 'max_pieces': 100}
+    LARGE = {'plate_number': 'LRG-100', 'max_board_feet': 100, 'max_pieces': 100}
+
+    def plates(self, plan):
+        return [trip['plate_number'] for trip in plan['trips']]
+
+    def test_address_area(self):
+        self.assertEqual(address_area('Purok 2, Brgy. Sabang, Lipa City, Batangas 4217'), 'lipa city, batangas')
+        self.assertEqual(address_area('Lipa  City, Batangas, Philippines'), 'lipa city, batangas')
+        self.assertEqual(address_area(''), 'unspecified')
+        self.assertEqual(address_area(None), 'unspecified')
+
+    def test_delivery_goes_on_the_smallest_truck_it_fits(self):
+        plan = TruckLoadPlanner.plan(vehicles=[self.SMALL, self.LARGE], deliveries=[stop(1, '80')])
+        self.assertEqual(self.plates(plan), ['LRG-100'])
+        self.assertFalse(plan['trips'][0]['oversize'])
+
+        plan = TruckLoadPlanner.plan(vehicles=[self.LARGE, self.SMALL], deliveries=[stop(1, '30')])
+        self.assertEqual(self.plates(plan), ['SML-50'])
+
+    def test_every_trip_gets_a_truck_that_fits(self):
+        plan = TruckLoadPlanner.plan(
+            vehicles=[self.SMALL, self.LARGE],
+            deliveries=[stop(1, '80'), stop(2, '90', area='tanauan city, batangas')],
+            consolidate=False
+        )
+        self.assertEqual(self.plates(plan), ['LRG-100', 'LRG-100'])
+        self.assertFalse(any(trip['oversize'] for trip in plan['trips']))
+
+    def test_oversize_delivery_falls_back_to_the_largest_truck(self):
+        plan = TruckLoadPlanner.plan(vehicles=[self.SMALL, self.LARGE], deliveries=[stop(1, '120')])
+
+        self.assertEqual(self.plates(plan), ['LRG-100'])
+        self.assertTrue(plan['trips'][0]['oversize'])
+        self.assertIn('WARNING', TruckLoadPlanner.format_trip_sheet(plan['trips'][0]))
+
+    def test_pieces_limit_is_respected(self):
+        plan = TruckLoadPlanner.plan(
+            vehicles=[{'plate_number': 'PCS', 'max_board_feet': 1000, 'max_pieces': 20}],
+            deliveries=[stop(1, '10', pieces=15), stop(2, '10', pieces=15)]
+        )
+        self.assertEqual(plan['trip_count'], 2)
+
+    def test_areas_stay_apart_unless_consolidated(self):
+        deliveries = [stop(1, '20'), stop(2, '30'), stop(3, '10', area='tanauan city, batangas')]
+
+        separate = TruckLoadPlanner.plan(vehicles=[self.LARGE], deliveries=deliveries, consolidate=False)
+        self.assertEqual(separate['trip_count'], 2)
+        self.assertEqual(sorted(len(trip['areas']) for trip in separate['trips']), [1, 1])
+
+        merged = TruckLoadPlanner.plan(vehicles=[self.LARGE], deliveries=deliveries)
+        self.assertEqual(merged['trip_count'], 1)
+        self.assertEqual(merged['trips'][0]['total_board_feet'], 60.0)
+        self.assertEqual(merged['trips'][0]['areas'], ['lipa city, batangas', 'tanauan city, batangas'])
+        self.assertEqual(merged['delivery_count'], 3)
+
+    def test_plan_reads_the_loaded_queue(self):
+        product = make_product(pieces=None)
+        customer = Customer.objects.create(name='Ana', phone_number='0917', address='Sabang, Lipa City, Batangas 4217')
+        loaded = make_delivery('loaded', items=[(product, 3)], customer=customer)
+        make_delivery('pending', items=[(product, 5)])
+
+        plan = TruckLoadPlanner.plan()
+
+        self.assertEqual(plan['delivery_count'], 1)
+        trip = plan['trips'][0]
+        self.assertEqual(trip['stops'][0]['delivery_id'], loaded.id)
+        self.assertEqual(trip['areas'], ['lipa city, batangas'])
+        self.assertEqual((trip['total_board_feet'], trip['total_pieces']), (16.0, 3))
+
+    def test_non_positive_capacities_are_rejected(self):
+        for vehicle in ({'max_board_feet': 0}, {'max_pieces': 0}, {'max_board_feet': -50, 'max_pieces': -1},
+                        {'max_board_feet': 'NaN'}):
+            with self.subTest(vehicle=vehicle), self.assertRaises(ValueError):
+                TruckLoadPlanner.plan(vehicles=[vehicle], deliveries=[stop(1, '10')])
+
+    def test_command_reports_non_positive_capacities(self):
+        with self.assertRaisesMessage(CommandError, 'positive'):
+            call_command('plan_truck_loads', vehicle=['ABC-1:Juan:-50:-1'], stdout=StringIO())
+
+    def test_endpoint_rejects_bad_capacities(self):
+        client = APIClient()
+        client.force_authenticate(get_user_model().objects.create_user(username='planner', password='x'))
+
+        for vehicle in ({'max_board_feet': 'lots'}, {'max_board_feet': -50, 'max_pieces': -1}):
+            response = client.post('/api/warehouse/plan_loads/', {'vehicles': [vehicle]}, format='json')
+            self.assertEqual(response.status_code, 400)
+        response = client.post('/api/warehouse/plan_loads/', {'vehicles': [self.LARGE]}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['trip_count'], 0)
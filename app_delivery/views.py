@@ -105,7 +105,7 @@ class DeliveryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def picking_list(self, request):
         """Get warehouse picking list"""
-        picking_list = DeliveryService.get_picking_list()
+        picking_list = DeliveryService.get_picking_list(status_filter=request.query_params.get('status'))
         return Response({
             'count': len(picking_list),
             'items': picking_list
@@ -114,7 +114,7 @@ class DeliveryViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['get'])
     def dispatch_queue(self, request):
         """Get dispatch queue for loaded/out-for-delivery items"""
-        queue = DeliveryService.get_delivery_queue()
+        queue = DeliveryService.get_delivery_queue(status=request.query_params.get('status'))
         return Response({
             'count': len(queue),
             'queue': queue
@@ -146,6 +146,10 @@ class DeliveryViewSet(viewsets.ModelViewSet):
             return Response({'error': 'delivery_ids and status are required'}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
+        if not isinstance(delivery_ids, list):
+            return Response({'error': 'delivery_ids must be a list'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
         result = DeliveryService.bulk_update_status(
             delivery_ids=delivery_ids,
             new_status=new_status,
@@ -5,8 +5,24 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.utils.urls import replace_query_param
+from django.core.exceptions import ValidationError
 from app_delivery.models import Delivery
 from app_delivery.services import DeliveryService
+from app_delivery.planning import TruckLoadPlanner
+
+
+PICKING_PAGE_SIZE = 25
+PICKING_MAX_PAGE_SIZE = 100
+
+
+def _limit_param(request, name='limit'):
+    """Positive integer query param (?limit= by default), or None"""
+    try:
+        limit = int(request.query_params.get(name, ''))
+    except ValueError:
+        return None
+    return limit if limit > 0 else None
 
 
 class WarehouseViewSet(viewsets.ViewSet):
@@ -16,35 +32,54 @@ class WarehouseViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def dashboard(self, request):
         """Get warehouse dashboard overview"""
-        picking_list = DeliveryService.get_picking_list()
-        dispatch_queue = DeliveryService.get_delivery_queue()
+        picking_list = DeliveryService.get_picking_list(limit=10)
+        dispatch_queue = DeliveryService.get_delivery_queue(limit=10)
         metrics = DeliveryService.get_delivery_metrics()
         
         return Response({
             'metrics': metrics,
             'picking_list': {
-                'count': len(picking_list),
-                'items': picking_list[:10]  # Show top 10
+                'count': DeliveryService.count_picking_list(),
+                'items': picking_list  # Show top 10
             },
             'dispatch_queue': {
-                'count': len(dispatch_queue),
-                'items': dispatch_queue[:10]  # Show top 10
+                'count': DeliveryService.count_delivery_queue(),
+                'items': dispatch_queue  # Show top 10
             }
         })
     
     @action(detail=False, methods=['get'])
     def picking_list(self, request):
-        """Get detailed picking list for warehouse staff"""
-        picking_list = DeliveryService.get_picking_list()
+        """
+        Get detailed picking list for warehouse staff
         
+        Query params:
+            status: 'pending' or 'on_picking' (default: both)
+            cursor: next_cursor from the previous page
+            page_size: Deliveries per page (default 25, max 100)
+        """
         # Allow filtering by status
         status_filter = request.query_params.get('status')
-        if status_filter:
-            picking_list = [item for item in picking_list if item['status'] == status_filter]
+        page_size = min(_limit_param(request, 'page_size') or PICKING_PAGE_SIZE, PICKING_MAX_PAGE_SIZE)
+        
+        try:
+            page = DeliveryService.get_picking_page(
+                status_filter=status_filter,
+                cursor=request.query_params.get('cursor'),
+                page_size=page_size
+            )
+        except ValidationError as e:
+            return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+        
+        next_url = None
+        if page['next_cursor']:
+            next_url = replace_query_param(request.build_absolute_uri(), 'cursor', page['next_cursor'])
         
         return Response({
-            'total_items': len(picking_list),
-            'items': picking_list
+            'total_items': DeliveryService.count_picking_list(status_filter),
+            'next': next_url,
+            'next_cursor': page['next_cursor'],
+            'items': page['items']
         })
     
     @action(detail=False, methods=['post'])
@@ -115,18 +150,42 @@ class WarehouseViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def dispatch_queue(self, request):
         """Get dispatch queue (items ready to ship)"""
-        queue = DeliveryService.get_delivery_queue()
-        
         # Filter by status if requested
         status_filter = request.query_params.get('status')
-        if status_filter:
-            queue = [item for item in queue if item['status'] == status_filter]
+        limit = _limit_param(request)
+        queue = DeliveryService.get_delivery_queue(status=status_filter, limit=limit)
         
         return Response({
-            'total_items': len(queue),
+            'total_items': len(queue) if limit is None else DeliveryService.count_delivery_queue(status_filter),
             'items': queue
         })
     
+    @action(detail=False, methods=['post'])
+    def plan_loads(self, request):
+        """
+        Plan truck trips for the loaded queue (nothing is saved)
+        
+        Expected payload:
+        {
+            "vehicles": [
+                {"plate_number": "ABC-1234", "driver_name": "John Doe",
+                 "max_board_feet": 3000, "max_pieces": 500}
+            ],
+            "consolidate": true
+        }
+        """
+        vehicles = request.data.get('vehicles') or []
+        try:
+            plan = TruckLoadPlanner.plan(
+                vehicles=vehicles,
+                consolidate=request.data.get('consolidate', True) not in (False, 'false', '0')
+            )
+        except (TypeError, ValueError, ArithmeticError, AttributeError):
+            return Response({'error': 'vehicles must be a list of objects with positive numeric capacities'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(plan)
+    
     @action(detail=False, methods=['post'])
     def assign_driver(self, request):
         """
@@ -187,6 +246,10 @@ class WarehouseViewSet(viewsets.ViewSet):
                 'error': 'delivery_ids and status are required'
             }, status=status.HTTP_400_BAD_REQUEST)
         
+        if not isinstance(delivery_ids, list):
+            return Response({'error': 'delivery_ids must be a list'},
+                           status=status.HTTP_400_BAD_REQUEST)
+        
         result = DeliveryService.bulk_update_status(
             delivery_ids=delivery_ids,
             new_status=new_status,
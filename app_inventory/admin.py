@@ -1,5 +1,7 @@
 from django.contrib import admin
-from app_inventory.models import LumberCategory, LumberProduct, Inventory, StockTransaction, InventorySnapshot
+from app_inventory.models import (
+    LumberCategory, LumberProduct, Inventory, StockTransaction, InventorySnapshot, StockReservation
+)
 
 
 @admin.register(LumberCategory)
@@ -16,8 +18,8 @@ class LumberProductAdmin(admin.ModelAdmin):
 
 @admin.register(Inventory)
 class InventoryAdmin(admin.ModelAdmin):
-    list_display = ('product', 'quantity_pieces', 'total_board_feet', 'last_updated')
-    readonly_fields = ('last_updated',)
+    list_display = ('product', 'quantity_pieces', 'reserved_pieces', 'total_board_feet', 'last_updated')
+    readonly_fields = ('reserved_pieces', 'last_updated')
 
 
 @admin.register(StockTransaction)
@@ -32,3 +34,9 @@ class InventorySnapshotAdmin(admin.ModelAdmin):
     list_display = ('product', 'quantity_pieces', 'total_board_feet', 'snapshot_date')
     list_filter = ('snapshot_date', 'product')
     readonly_fields = ('snapshot_date',)
+
+
+@admin.register(StockReservation)
+class StockReservationAdmin(admin.ModelAdmin):
+    list_display = ('product', 'quantity_pieces', 'cart_item', 'expires_at', 'created_at')
+    readonly_fields = ('product', 'cart_item', 'quantity_pieces', 'expires_at', 'created_at', 'updated_at')
@@ -0,0 +1,30 @@
+"""
+Signed stock deltas over the StockTransaction ledger
+
+Ledger rows store positive quantities. Direction comes from the transaction
+type, and for adjustments from the "(+)" / "(-)" suffix that
+InventoryService.adjust_stock appends to the reason.
+"""
+from django.db.models import Case, When, F, Q, IntegerField, DecimalField
+
+
+# Rows that remove stock
+OUTGOING = Q(transaction_type='stock_out') | Q(transaction_type='adjustment', reason__endswith='(-)')
+
+
+def signed_pieces():
+    """Expression for the signed piece delta of a ledger row"""
+    return Case(
+        When(OUTGOING, then=-F('quantity_pieces')),
+        default=F('quantity_pieces'),
+        output_field=IntegerField()
+    )
+
+
+def signed_board_feet():
+    """Expression for the signed board-feet delta of a ledger row"""
+    return Case(
+        When(OUTGOING, then=-F('board_feet')),
+        default=F('board_feet'),
+        output_field=DecimalField(max_digits=12, decimal_places=2)
+    )
@@ -0,0 +1,115 @@
+import threading
+import time
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, OperationalError
+from django.db.models import Sum
+from app_inventory.models import LumberCategory, LumberProduct, Inventory, StockTransaction
+from app_inventory.services import InventoryService
+
+
+BENCH_SKU = 'BENCH-CONCURRENCY'
+
+
+class Command(BaseCommand):
+    help = 'Stress-test concurrent stock outs against one product and verify the final count is exact'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--threads', type=int, default=8, help='Number of concurrent cashiers')
+        parser.add_argument('--sales', type=int, default=50, help='Sales attempted per thread')
+        parser.add_argument('--pieces', type=int, default=1, help='Pieces per sale')
+        parser.add_argument('--stock', type=int, default=300, help='Initial stock in pieces')
+        parser.add_argument('--keep', action='store_true', help='Keep the benchmark product afterwards')
+
+    def handle(self, *args, **options):
+        threads = options['threads']
+        sales = options['sales']
+        pieces = options['pieces']
+        initial_stock = options['stock']
+
+        product = self._setup_product(initial_stock)
+        counters = {'sold': 0, 'rejected': 0, 'retries': 0, 'errors': 0}
+        lock = threading.Lock()
+
+        def cashier():
+            try:
+                for _ in range(sales):
+                    while True:
+                        try:
+                            InventoryService.stock_out(
+                                product_id=product.id,
+                                quantity_pieces=pieces,
+                                reason='benchmark',
+                                reference_id=BENCH_SKU
+                            )
+                            outcome = 'sold'
+                        except ValueError:
+                            outcome = 'rejected'
+                        except OperationalError:
+                            # SQLite serializes writers; back off and retry
+                            with lock:
+                                counters['retries'] += 1
+                            time.sleep(0.005)
+                            continue
+                        except Exception:
+                            outcome = 'errors'
+                        with lock:
+                            counters[outcome] += 1
+                        break
+            finally:
+                connection.close()
+
+        workers = [threading.Thread(target=cashier) for _ in range(threads)]
+        started = time.perf_counter()
+        for worker in workers:
+            worker.start()
+        for worker in workers:
+            worker.join()
+        elapsed = time.perf_counter() - started
+
+        inventory = Inventory.objects.get(product=product)
+        ledger_out = StockTransaction.objects.filter(
+            product=product, transaction_type='stock_out'
+        ).aggregate(total=Sum('quantity_pieces'))['total'] or 0
+        expected = initial_stock - counters['sold'] * pieces
+
+        attempts = threads * sales
+        self.stdout.write(f'Attempts: {attempts} ({threads} threads x {sales} sales of {pieces} pcs)')
+        self.stdout.write(f"Sold: {counters['sold']}, rejected: {counters['rejected']}, "
+                          f"lock retries: {counters['retries']}, errors: {counters['errors']}")
+        self.stdout.write(f'Elapsed: {elapsed:.2f}s ({attempts / elapsed:.0f} sales/s)')
+        self.stdout.write(f'Final stock: {inventory.quantity_pieces} (expected {expected}, ledger out {ledger_out})')
+
+        exact = (
+            inventory.quantity_pieces == expected
+            and ledger_out == counters['sold'] * pieces
+            and inventory.quantity_pieces >= 0
+            and counters['errors'] == 0
+        )
+
+        if not options['keep']:
+            product.delete()
+
+        if not exact:
+            raise CommandError('Stock count drifted under concurrency')
+        self.stdout.write(self.style.SUCCESS('Final stock count is exact'))
+
+    def _setup_product(self, initial_stock):
+        category, _ = LumberCategory.objects.get_or_create(name='Benchmark')
+        LumberProduct.objects.filter(sku=BENCH_SKU).delete()
+        product = LumberProduct.objects.create(
+            name='Concurrency Benchmark 2x4x8',
+            category=category,
+            thickness=Decimal('2'),
+            width=Decimal('4'),
+            length=Decimal('8'),
+            price_per_board_foot=Decimal('1.00'),
+            sku=BENCH_SKU,
+            is_active=False
+        )
+        Inventory.objects.create(
+            product=product,
+            quantity_pieces=initial_stock,
+            total_board_feet=product.board_feet_for(initial_stock)
+        )
+        return product
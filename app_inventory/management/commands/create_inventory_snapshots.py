@@ -1,27 +1,24 @@
 from django.core.management.base import BaseCommand
-from django.utils import timezone
-from app_inventory.models import Inventory, InventorySnapshot
+from app_inventory.services import InventorySnapshotService
 
 
 class Command(BaseCommand):
-    help = 'Create daily inventory snapshots for historical tracking'
+    help = 'Create daily inventory snapshots for historical tracking and backfill missed days'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--backfill-days',
+            type=int,
+            default=30,
+            help='Rebuild missing snapshots this many days back from the stock ledger (default: 30)'
+        )
     
     def handle(self, *args, **options):
-        today = timezone.now().date()
-        created_count = 0
-        
-        for inventory in Inventory.objects.all():
-            snapshot, created = InventorySnapshot.objects.get_or_create(
-                product=inventory.product,
-                snapshot_date=today,
-                defaults={
-                    'quantity_pieces': inventory.quantity_pieces,
-                    'total_board_feet': inventory.total_board_feet,
-                }
-            )
-            if created:
-                created_count += 1
+        result = InventorySnapshotService.build_snapshots(backfill_days=options['backfill_days'])
         
         self.stdout.write(
-            self.style.SUCCESS(f'Successfully created {created_count} inventory snapshots for {today}')
+            self.style.SUCCESS(
+                f"Successfully wrote {result['written']} inventory snapshots for {result['snapshot_date']} "
+                f"({result['backfilled']} backfilled)"
+            )
         )
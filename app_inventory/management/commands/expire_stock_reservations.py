@@ -0,0 +1,37 @@
+import time
+from django.core.management.base import BaseCommand
+from app_inventory.reservations import StockReservationService
+
+
+class Command(BaseCommand):
+    help = 'Release expired cart stock holds in bulk, once or continuously as a background sweeper'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Keep running and sweep every N seconds (default: sweep once and exit)'
+        )
+        parser.add_argument('--batch-size', type=int, default=1000, help='Holds released per transaction (default: 1000)')
+        parser.add_argument(
+            '--resync',
+            action='store_true',
+            help='Repair: recompute reserved counters from the holds table before sweeping'
+        )
+
+    def handle(self, *args, **options):
+        if options['resync']:
+            corrected = StockReservationService.resync_reserved_pieces()
+            self.stdout.write(f"Corrected reserved pieces on {corrected} inventory row(s)")
+
+        while True:
+            result = StockReservationService.expire_holds(batch_size=options['batch_size'])
+            if result['expired'] or not options['interval']:
+                self.stdout.write(
+                    self.style.SUCCESS(
+                        f"Released {result['expired']} expired hold(s) ({result['pieces']} pieces)"
+                    )
+                )
+            if not options['interval']:
+                break
+            time.sleep(options['interval'])
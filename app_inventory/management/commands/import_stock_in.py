@@ -0,0 +1,49 @@
+from django.core.management.base import BaseCommand, CommandError
+from core.models import CustomUser
+from app_inventory.receiving import BulkReceivingService
+
+
+class Command(BaseCommand):
+    help = 'Receive stock from a CSV or XLSX sheet with sku, pieces, cost and reference columns'
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='Path to the .csv or .xlsx receiving sheet')
+        parser.add_argument('--supplier', type=int, help='Supplier ID for price history')
+        parser.add_argument('--user', help='Username recorded on the stock transactions')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows posted per batch (the whole sheet is one transaction)')
+        parser.add_argument('--dry-run', action='store_true', help='Validate the sheet without receiving stock')
+
+    def handle(self, *args, **options):
+        created_by = None
+        if options['user']:
+            created_by = CustomUser.objects.filter(username=options['user']).first()
+            if created_by is None:
+                raise CommandError(f"User '{options['user']}' not found")
+
+        try:
+            with open(options['path'], 'rb') as file_obj:
+                result = BulkReceivingService.import_file(
+                    file_obj,
+                    options['path'],
+                    supplier_id=options['supplier'],
+                    created_by=created_by,
+                    chunk_size=options['chunk_size'],
+                    dry_run=options['dry_run']
+                )
+        except (OSError, ValueError) as e:
+            raise CommandError(str(e))
+
+        for error in result['errors']:
+            self.stdout.write(self.style.WARNING(f"Line {error['line']} ({error['sku']}): {error['error']}"))
+
+        if options['dry_run']:
+            summary = (
+                f"Validated {result['rows']} row(s): {result['received']} would be received, "
+                f"{result['pieces']} pieces ({len(result['errors'])} rejected). Nothing was received"
+            )
+        else:
+            summary = (
+                f"Received {result['received']} of {result['rows']} row(s), {result['pieces']} pieces"
+                f" ({len(result['errors'])} rejected)"
+            )
+        self.stdout.write(self.style.SUCCESS(summary))
@@ -0,0 +1,27 @@
+from datetime import datetime
+from django.core.management.base import BaseCommand, CommandError
+from app_inventory.rollups import StockMovementRollupService
+
+
+class Command(BaseCommand):
+    help = 'Rebuild the daily stock movement rollup from the stock transaction ledger'
+    
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--since',
+            type=str,
+            help='Only rebuild days on or after this date (YYYY-MM-DD); default rebuilds everything'
+        )
+    
+    def handle(self, *args, **options):
+        since = None
+        if options['since']:
+            try:
+                since = datetime.strptime(options['since'], '%Y-%m-%d').date()
+            except ValueError:
+                raise CommandError('--since must be in YYYY-MM-DD format')
+        
+        written = StockMovementRollupService.rebuild(since=since)
+        
+        scope = f'since {since}' if since else 'for the full ledger'
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {written} stock movement rollup rows {scope}'))
@@ -0,0 +1,54 @@
+from decimal import Decimal
+from django.core.management.base import BaseCommand
+from app_inventory.reconciliation import InventoryReconciliationService
+
+
+class Command(BaseCommand):
+    help = 'Compare inventory counters against the stock transaction ledger and optionally repair drift'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--repair',
+            choices=['counters', 'ledger'],
+            help=(
+                "'counters' resets Inventory to the ledger balance; "
+                "'ledger' posts reconciliation adjustments so the ledger matches Inventory"
+            )
+        )
+        parser.add_argument('--tolerance', type=str, default='0.01', help='Board-feet drift to ignore (default: 0.01)')
+        parser.add_argument('--chunk-size', type=int, default=500, help='Rows streamed per round trip (default: 500)')
+        parser.add_argument('--limit', type=int, default=50, help='Maximum drift lines to print (default: 50)')
+
+    def handle(self, *args, **options):
+        drift_count = 0
+        drifts = []
+        for drift in InventoryReconciliationService.iter_drift(
+            tolerance=Decimal(options['tolerance']),
+            chunk_size=options['chunk_size']
+        ):
+            drift_count += 1
+            if drift_count <= options['limit']:
+                self.stdout.write(
+                    f"Product {drift['product_id']}: "
+                    f"pieces {drift['counter_pieces']} vs ledger {drift['ledger_pieces']} "
+                    f"({drift['pieces_drift']:+d}), "
+                    f"BF {drift['counter_board_feet']} vs ledger {drift['ledger_board_feet']} "
+                    f"({drift['board_feet_drift']:+})"
+                    + ('' if drift['inventory_id'] else ' [no inventory row]')
+                )
+            if options['repair']:
+                # Only drifted rows are kept, so memory tracks drift, not catalog size
+                drifts.append(drift)
+
+        if not drift_count:
+            self.stdout.write(self.style.SUCCESS('Inventory counters match the ledger'))
+            return
+
+        self.stdout.write(self.style.WARNING(f'{drift_count} product(s) drifted from the ledger'))
+
+        if options['repair'] == 'counters':
+            repaired = InventoryReconciliationService.repair_counters(drifts, batch_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'Reset {repaired} inventory row(s) to the ledger balance'))
+        elif options['repair'] == 'ledger':
+            written = InventoryReconciliationService.repair_ledger(drifts, batch_size=options['chunk_size'])
+            self.stdout.write(self.style.SUCCESS(f'Posted {written} reconciliation adjustment(s) to the ledger'))
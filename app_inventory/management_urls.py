@@ -11,6 +11,7 @@ urlpatterns = [
     path('categories/', management_views.categories_management, name='categories'),
     path('products/', management_views.products_management, name='products'),
     path('stock-in/', management_views.stock_in_management, name='stock_in'),
+    path('stock-in/import/', management_views.stock_in_import, name='stock_in_import'),
     path('stock-out/', management_views.stock_out_management, name='stock_out'),
     path('inventory-levels/', management_views.inventory_levels, name='inventory_levels'),
     path('transaction-history/', management_views.transaction_history, name='transaction_history'),
@@ -18,6 +18,8 @@ from app_inventory.models import (
 )
 from app_inventory.services import InventoryService
 from app_inventory.reporting import InventoryReports
+from app_inventory.receiving import BulkReceivingService
+from app_supplier.models import Supplier
 
 
 def is_admin_or_inventory_manager(user):
@@ -208,13 +210,57 @@ def stock_in_management(request):
         transaction_type='stock_in'
     ).select_related('product', 'created_by').order_by('-created_at')[:20]
     
+    suppliers = Supplier.objects.filter(is_active=True).only('id', 'company_name').order_by('company_name')
+    
     context = {
         'products': products,
         'recent_stock_in': recent_stock_in,
+        'suppliers': suppliers,
     }
     return render(request, 'inventory/management/stock_in.html', context)
 
 
+@login_required
+@user_passes_test(is_admin_or_inventory_manager)
+def stock_in_import(request):
+    """Receive a whole CSV/XLSX receiving sheet in one upload"""
+    
+    if request.method != 'POST':
+        return JsonResponse({'success': False, 'message': 'POST a receiving sheet'}, status=405)
+    
+    upload = request.FILES.get('file')
+    if upload is None:
+        return JsonResponse({'success': False, 'message': 'No file uploaded'}, status=400)
+    
+    dry_run = request.POST.get('dry_run') in ('1', 'true', 'on')
+    try:
+        result = BulkReceivingService.import_file(
+            upload,
+            upload.name,
+            supplier_id=request.POST.get('supplier_id') or None,
+            created_by=request.user,
+            dry_run=dry_run
+        )
+    except ValueError as e:
+        return JsonResponse({'success': False, 'message': str(e)}, status=400)
+    
+    if dry_run:
+        message = (
+            f"Validated {result['rows']} rows: {result['received']} would be received "
+            f"({result['pieces']} pieces), {len(result['errors'])} rejected. Nothing was received"
+        )
+    else:
+        message = (
+            f"Received {result['received']} of {result['rows']} rows "
+            f"({result['pieces']} pieces, {len(result['errors'])} rejected)"
+        )
+    return JsonResponse({
+        'success': not result['errors'],
+        'message': message,
+        **result
+    })
+
+
 @login_required
 @user_passes_test(is_admin_or_inventory_manager)
 def stock_out_management(request):
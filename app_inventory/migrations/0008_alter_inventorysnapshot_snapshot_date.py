@@ -0,0 +1,19 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:14
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventory', '0007_alter_lumberproduct_category'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='inventorysnapshot',
+            name='snapshot_date',
+            field=models.DateField(db_index=True, default=django.utils.timezone.localdate),
+        ),
+    ]
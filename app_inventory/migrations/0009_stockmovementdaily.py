@@ -0,0 +1,79 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:15
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import Count, DecimalField, F, Max, Min, Sum
+from django.db.models.functions import TruncDate
+
+
+def populate_rollup(apps, schema_editor):
+    """Aggregate the existing ledger into the new rollup table"""
+    StockTransaction = apps.get_model('app_inventory', 'StockTransaction')
+    StockMovementDaily = apps.get_model('app_inventory', 'StockMovementDaily')
+
+    grouped = StockTransaction.objects.annotate(day=TruncDate('created_at')).values(
+        'product_id', 'day', 'transaction_type', 'reason'
+    ).annotate(
+        transaction_count=Count('id'),
+        total_pieces=Sum('quantity_pieces'),
+        total_board_feet=Sum('board_feet'),
+        total_cost=Sum(F('cost_per_unit') * F('quantity_pieces'),
+                       output_field=DecimalField(max_digits=16, decimal_places=2)),
+        unit_cost_total=Sum('cost_per_unit'),
+        costed_count=Count('cost_per_unit'),
+        min_unit_cost=Min('cost_per_unit'),
+        max_unit_cost=Max('cost_per_unit')
+    ).order_by()
+
+    StockMovementDaily.objects.bulk_create([
+        StockMovementDaily(
+            product_id=row['product_id'],
+            day=row['day'],
+            transaction_type=row['transaction_type'],
+            reason=row['reason'] or '',
+            transaction_count=row['transaction_count'],
+            quantity_pieces=row['total_pieces'] or 0,
+            board_feet=row['total_board_feet'] or 0,
+            total_cost=row['total_cost'] or 0,
+            unit_cost_total=row['unit_cost_total'] or 0,
+            costed_count=row['costed_count'],
+            min_unit_cost=row['min_unit_cost'],
+            max_unit_cost=row['max_unit_cost']
+        )
+        for row in grouped
+    ], batch_size=1000)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventory', '0008_alter_inventorysnapshot_snapshot_date'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='StockMovementDaily',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('day', models.DateField()),
+                ('transaction_type', models.CharField(choices=[('stock_in', 'Stock In'), ('stock_out', 'Stock Out'), ('adjustment', 'Adjustment')], max_length=20)),
+                ('reason', models.CharField(blank=True, max_length=100)),
+                ('transaction_count', models.IntegerField(default=0)),
+                ('quantity_pieces', models.IntegerField(default=0)),
+                ('board_feet', models.DecimalField(decimal_places=2, default=0, max_digits=14)),
+                ('total_cost', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('unit_cost_total', models.DecimalField(decimal_places=2, default=0, max_digits=16)),
+                ('costed_count', models.IntegerField(default=0)),
+                ('min_unit_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('max_unit_cost', models.DecimalField(blank=True, decimal_places=2, max_digits=10, null=True)),
+                ('product', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='movement_rollups', to='app_inventory.lumberproduct')),
+            ],
+            options={
+                'verbose_name_plural': 'Stock Movement Daily Rollups',
+                'ordering': ['-day'],
+                'indexes': [models.Index(fields=['day', 'transaction_type'], name='app_invento_day_a9ae05_idx'), models.Index(fields=['product', '-day'], name='app_invento_product_e7553d_idx')],
+                'unique_together': {('product', 'day', 'transaction_type', 'reason')},
+            },
+        ),
+        migrations.RunPython(populate_rollup, migrations.RunPython.noop),
+    ]
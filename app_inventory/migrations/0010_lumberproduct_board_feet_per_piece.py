@@ -0,0 +1,32 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:17
+
+from decimal import Decimal
+
+from django.db import migrations, models
+
+
+def backfill_board_feet_per_piece(apps, schema_editor):
+    """Compute board feet per piece for existing products"""
+    LumberProduct = apps.get_model('app_inventory', 'LumberProduct')
+    products = []
+    for product in LumberProduct.objects.only('id', 'thickness', 'width', 'length').iterator(chunk_size=500):
+        bf = (Decimal(product.thickness) * Decimal(product.width) * Decimal(product.length)) / 12
+        product.board_feet_per_piece = bf.quantize(Decimal('0.000001'))
+        products.append(product)
+    LumberProduct.objects.bulk_update(products, ['board_feet_per_piece'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventory', '0009_stockmovementdaily'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lumberproduct',
+            name='board_feet_per_piece',
+            field=models.DecimalField(db_index=True, decimal_places=6, default=0, editable=False, max_digits=12),
+        ),
+        migrations.RunPython(backfill_board_feet_per_piece, migrations.RunPython.noop),
+    ]
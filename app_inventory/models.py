@@ -1,4 +1,5 @@
 from django.db import models
+from django.utils import timezone
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 
@@ -35,11 +36,16 @@ class LumberProduct(models.Model):
     # Image
     image = models.ImageField(upload_to='products/', null=True, blank=True)
     
+    # Stored (Thickness x Width x Length) / 12, kept exact for stock math and SQL filtering
+    board_feet_per_piece = models.DecimalField(max_digits=12, decimal_places=6, default=0, db_index=True, editable=False)
+    
     sku = models.CharField(max_length=100, unique=True)
     is_active = models.BooleanField(default=True)
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    BOARD_FEET_PRECISION = Decimal('0.000001')
+    
     class Meta:
         ordering = ['-created_at']
         indexes = [models.Index(fields=['sku']), models.Index(fields=['category'])]
@@ -47,14 +53,31 @@ class LumberProduct(models.Model):
     def __str__(self):
         return f"{self.name} ({self.thickness}\" x {self.width}\" x {self.length}ft)"
     
+    def save(self, *args, **kwargs):
+        """Recompute stored board feet per piece from the dimensions"""
+        self.board_feet_per_piece = self.compute_board_feet_per_piece()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'thickness', 'width', 'length'} & set(update_fields):
+            kwargs['update_fields'] = set(update_fields) | {'board_feet_per_piece'}
+        super().save(*args, **kwargs)
+    
+    def compute_board_feet_per_piece(self):
+        """Board Feet = (Thickness x Width x Length) / 12"""
+        bf = (Decimal(self.thickness) * Decimal(self.width) * Decimal(self.length)) / 12
+        return bf.quantize(self.BOARD_FEET_PRECISION)
+    
+    def board_feet_for(self, quantity=1):
+        """Exact board feet for a number of pieces, rounded to the ledger's 2 decimals"""
+        per_piece = self.board_feet_per_piece or self.compute_board_feet_per_piece()
+        return (per_piece * quantity).quantize(Decimal('0.01'))
+    
     def calculate_board_feet(self, quantity=1):
         """Board Feet = (Thickness x Width x Length) / 12"""
-        bf = (self.thickness * self.width * self.length) / 12
-        return float(bf) * quantity
+        return float(self.board_feet_for(quantity))
     
     @property
     def board_feet(self):
-        return float((self.thickness * self.width * self.length) / 12)
+        return float(self.board_feet_per_piece or self.compute_board_feet_per_piece())
 
 
 class Inventory(models.Model):
@@ -63,6 +86,9 @@ class Inventory(models.Model):
     quantity_pieces = models.IntegerField(default=0, validators=[MinValueValidator(0)])
     total_board_feet = models.DecimalField(max_digits=12, decimal_places=2, default=0, validators=[MinValueValidator(0)])
     
+    # Pieces held by StockReservation rows, maintained by StockReservationService
+    reserved_pieces = models.IntegerField(default=0, validators=[MinValueValidator(0)])
+    
     last_updated = models.DateTimeField(auto_now=True)
     
     class Meta:
@@ -70,6 +96,11 @@ class Inventory(models.Model):
     
     def __str__(self):
         return f"{self.product.name} - {self.quantity_pieces} pcs ({self.total_board_feet} BF)"
+    
+    @property
+    def available_pieces(self):
+        """Pieces on hand that are not held for a cart (available to promise)"""
+        return max(self.quantity_pieces - self.reserved_pieces, 0)
 
 
 class StockTransaction(models.Model):
@@ -107,7 +138,7 @@ class InventorySnapshot(models.Model):
     quantity_pieces = models.IntegerField()
     total_board_feet = models.DecimalField(max_digits=12, decimal_places=2)
     
-    snapshot_date = models.DateField(auto_now_add=True, db_index=True)
+    snapshot_date = models.DateField(default=timezone.localdate, db_index=True)
     
     class Meta:
         ordering = ['-snapshot_date']
@@ -117,3 +148,55 @@ class InventorySnapshot(models.Model):
     
     def __str__(self):
         return f"{self.product.name} - {self.snapshot_date}"
+
+
+class StockMovementDaily(models.Model):
+    """Daily rollup of the stock transaction ledger for reporting"""
+    product = models.ForeignKey(LumberProduct, on_delete=models.CASCADE, related_name='movement_rollups')
+    day = models.DateField()
+    transaction_type = models.CharField(max_length=20, choices=StockTransaction.TRANSACTION_TYPES)
+    reason = models.CharField(max_length=100, blank=True)
+    
+    transaction_count = models.IntegerField(default=0)
+    quantity_pieces = models.IntegerField(default=0)
+    board_feet = models.DecimalField(max_digits=14, decimal_places=2, default=0)
+    
+    # Cost sums over rows that carry a cost_per_unit
+    total_cost = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    unit_cost_total = models.DecimalField(max_digits=16, decimal_places=2, default=0)
+    costed_count = models.IntegerField(default=0)
+    min_unit_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    max_unit_cost = models.DecimalField(max_digits=10, decimal_places=2, null=True, blank=True)
+    
+    class Meta:
+        ordering = ['-day']
+        verbose_name_plural = 'Stock Movement Daily Rollups'
+        unique_together = ('product', 'day', 'transaction_type', 'reason')
+        indexes = [
+            models.Index(fields=['day', 'transaction_type']),
+            models.Index(fields=['product', '-day']),
+        ]
+    
+    def __str__(self):
+        return f"{self.product.name} - {self.day} {self.transaction_type}"
+
+
+class StockReservation(models.Model):
+    """Time-limited hold on stock for a shopping cart item"""
+    product = models.ForeignKey(LumberProduct, on_delete=models.CASCADE, related_name='reservations')
+    cart_item = models.OneToOneField('app_sales.CartItem', on_delete=models.CASCADE, related_name='reservation')
+    quantity_pieces = models.PositiveIntegerField()
+    
+    expires_at = models.DateTimeField(db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+    
+    class Meta:
+        ordering = ['expires_at']
+    
+    def __str__(self):
+        return f"{self.product.name} - {self.quantity_pieces} pcs until {self.expires_at}"
+    
+    @property
+    def is_expired(self):
+        return self.expires_at <= timezone.now()
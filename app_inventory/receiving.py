@@ -0,0 +1,208 @@
+"""
+Bulk stock-in import for yard receiving (CSV / XLSX)
+"""
+import csv
+import io
+import zipfile
+from decimal import Decimal
+from django.db import DatabaseError, transaction
+from app_inventory.models import LumberProduct
+from app_inventory.services import InventoryService
+from app_supplier.models import Supplier
+
+
+REQUIRED_COLUMNS = ('sku', 'pieces')
+
+
+class BulkReceivingService:
+    """Parse a receiving sheet and post it to inventory in batches"""
+
+    @staticmethod
+    def iter_rows(file_obj, filename):
+        """
+        Stream rows from a CSV or XLSX receiving sheet
+
+        The first row is the header; column names are matched case-insensitively.
+
+        Args:
+            file_obj: Binary file object (upload or opened file)
+            filename: Original file name, used to pick the parser
+
+        Yields:
+            Tuple[int, dict]: (line number, {column: raw value})
+
+        Raises:
+            ValueError: If the format is unsupported or required columns are missing
+        """
+        name = (filename or '').lower()
+        if name.endswith('.xlsx'):
+            rows = BulkReceivingService._iter_xlsx(file_obj)
+        elif name.endswith('.csv'):
+            rows = BulkReceivingService._iter_csv(file_obj)
+        else:
+            raise ValueError("Unsupported file type. Upload a .csv or .xlsx file")
+
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("The file is empty")
+        columns = [str(cell or '').strip().lower() for cell in header]
+        missing = [column for column in REQUIRED_COLUMNS if column not in columns]
+        if missing:
+            raise ValueError(f"Missing required column(s): {', '.join(missing)}")
+
+        for line_number, values in enumerate(rows, start=2):
+            if not any(value not in (None, '') for value in values):
+                continue
+            yield line_number, dict(zip(columns, values))
+
+    @staticmethod
+    def _iter_csv(file_obj):
+        text = io.TextIOWrapper(file_obj, encoding='utf-8-sig', newline='')
+        try:
+            yield from csv.reader(text)
+        finally:
+            text.detach()
+
+    @staticmethod
+    def _iter_xlsx(file_obj):
+        try:
+            from openpyxl import load_workbook
+            from openpyxl.utils.exceptions import InvalidFileException
+        except ImportError:
+            raise ValueError("XLSX import requires openpyxl; upload a .csv file instead")
+        try:
+            workbook = load_workbook(file_obj, read_only=True, data_only=True)
+        except (zipfile.BadZipFile, InvalidFileException):
+            raise ValueError("Not a valid .xlsx file")
+        try:
+            yield from workbook.active.iter_rows(values_only=True)
+        finally:
+            workbook.close()
+
+    @staticmethod
+    def parse_row(values, products_by_sku):
+        """
+        Validate one receiving row
+
+        Args:
+            values: {column: raw value} from iter_rows
+            products_by_sku: Preloaded {sku: LumberProduct} map
+
+        Returns:
+            dict: Item for InventoryService.stock_in_many
+
+        Raises:
+            ValueError: Describing the first problem found in the row
+        """
+        sku = values.get('sku')
+        if isinstance(sku, float) and sku.is_integer():
+            # Spreadsheets hand numeric SKUs back as floats
+            sku = int(sku)
+        sku = str(sku or '').strip()
+        if not sku:
+            raise ValueError("SKU is required")
+        product = products_by_sku.get(sku)
+        if product is None:
+            raise ValueError(f"Unknown SKU '{sku}'")
+
+        try:
+            pieces = Decimal(str(values.get('pieces')).strip())
+            # Infinity and NaN parse as Decimals but are not quantities
+            valid = pieces.is_finite() and pieces == pieces.to_integral_value() and pieces > 0
+        except ArithmeticError:
+            raise ValueError("Pieces must be a whole number")
+        if not valid:
+            raise ValueError("Pieces must be a whole number greater than zero")
+
+        cost_per_unit = None
+        raw_cost = values.get('cost')
+        if raw_cost not in (None, ''):
+            try:
+                cost_per_unit = Decimal(str(raw_cost).strip()).quantize(Decimal('0.01'))
+            except ArithmeticError:
+                raise ValueError(f"Invalid cost '{raw_cost}'")
+            if not cost_per_unit.is_finite():
+                raise ValueError(f"Invalid cost '{raw_cost}'")
+            if cost_per_unit < 0:
+                raise ValueError("Cost cannot be negative")
+
+        return {
+            'product_id': product.id,
+            'quantity_pieces': int(pieces),
+            'cost_per_unit': cost_per_unit,
+            'reference_id': str(values.get('reference') or '').strip()[:100],
+        }
+
+    @staticmethod
+    def import_file(file_obj, filename, supplier_id=None, created_by=None, chunk_size=500, dry_run=False):
+        """
+        Receive every valid row of a receiving sheet
+
+        SKUs are resolved against one preloaded lookup. Valid rows are posted
+        in chunks inside a single transaction, so a database error leaves
+        nothing received; invalid rows are skipped and reported so the rest
+        of the truck can still be received.
+
+        Args:
+            file_obj: Binary file object
+            filename: Original file name (.csv or .xlsx)
+            supplier_id: Supplier ID for price history (optional)
+            created_by: User performing the import
+            chunk_size: Rows posted per batch
+            dry_run: Validate only, without touching inventory
+
+        Returns:
+            Dict: rows, received (or valid, for a dry run), pieces and per-row errors
+
+        Raises:
+            ValueError: If the file or supplier is invalid, or posting failed
+        """
+        if supplier_id not in (None, ''):
+            try:
+                supplier_id = int(supplier_id)
+            except (TypeError, ValueError):
+                raise ValueError(f"Invalid supplier '{supplier_id}'")
+            if not Supplier.objects.filter(pk=supplier_id).exists():
+                raise ValueError(f"Supplier {supplier_id} not found")
+        else:
+            supplier_id = None
+
+        products = LumberProduct.objects.only(
+            'id', 'sku', 'name', 'thickness', 'width', 'length', 'board_feet_per_piece'
+        )
+        products_by_sku = {product.sku: product for product in products}
+        products_by_id = {product.id: product for product in products_by_sku.values()}
+
+        result = {'rows': 0, 'received': 0, 'pieces': 0, 'errors': []}
+        chunk = []
+
+        def flush():
+            if not dry_run:
+                InventoryService.stock_in_many(
+                    chunk, supplier_id=supplier_id, created_by=created_by, products=products_by_id
+                )
+            result['received'] += len(chunk)
+            result['pieces'] += sum(item['quantity_pieces'] for item in chunk)
+            chunk.clear()
+
+        try:
+            with transaction.atomic():
+                for line_number, values in BulkReceivingService.iter_rows(file_obj, filename):
+                    result['rows'] += 1
+                    try:
+                        chunk.append(BulkReceivingService.parse_row(values, products_by_sku))
+                    except ValueError as e:
+                        result['errors'].append({
+                            'line': line_number,
+                            'sku': str(values.get('sku') or ''),
+                            'error': str(e),
+                        })
+                        continue
+                    if len(chunk) >= chunk_size:
+                        flush()
+                if chunk:
+                    flush()
+        except DatabaseError as e:
+            raise ValueError(f"Import failed and was rolled back, no stock was received: {e}")
+
+        return result
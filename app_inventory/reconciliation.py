@@ -0,0 +1,158 @@
+"""
+Reconcile denormalized Inventory counters against the StockTransaction ledger
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+from app_inventory.models import Inventory, StockTransaction
+from app_inventory.ledger import signed_pieces, signed_board_feet
+from app_inventory.rollups import StockMovementRollupService
+from app_inventory.signals import invalidate_product_cache
+
+
+class InventoryReconciliationService:
+    """Detect and repair drift between Inventory and the stock ledger"""
+
+    @staticmethod
+    def iter_drift(tolerance=Decimal('0.01'), chunk_size=500):
+        """
+        Stream products whose counters disagree with their ledger balance
+
+        Ledger balances come from one grouped query and are merge-joined with
+        the Inventory rows on product_id. Both sides are streamed in
+        product_id order, so memory stays bounded regardless of catalog size.
+
+        Args:
+            tolerance: Board-feet difference to ignore (rounding)
+            chunk_size: Rows fetched per round trip on each side
+
+        Yields:
+            Dict: product_id, inventory_id, counter and ledger values, drift
+        """
+        ledger = StockTransaction.objects.values('product_id').annotate(
+            pieces=Sum(signed_pieces()),
+            board_feet=Sum(signed_board_feet())
+        ).order_by('product_id').iterator(chunk_size=chunk_size)
+
+        counters = Inventory.objects.values_list(
+            'id', 'product_id', 'quantity_pieces', 'total_board_feet'
+        ).order_by('product_id').iterator(chunk_size=chunk_size)
+
+        ledger_row = next(ledger, None)
+        counter_row = next(counters, None)
+
+        while ledger_row is not None or counter_row is not None:
+            if counter_row is None or (ledger_row is not None and ledger_row['product_id'] < counter_row[1]):
+                # Ledger activity for a product without an inventory row
+                product_id, inventory_id, counter_pieces, counter_bf = ledger_row['product_id'], None, 0, Decimal('0')
+                ledger_pieces, ledger_bf = ledger_row['pieces'] or 0, ledger_row['board_feet'] or Decimal('0')
+                ledger_row = next(ledger, None)
+            elif ledger_row is None or counter_row[1] < ledger_row['product_id']:
+                # Inventory row without any ledger activity
+                inventory_id, product_id, counter_pieces, counter_bf = counter_row
+                ledger_pieces, ledger_bf = 0, Decimal('0')
+                counter_row = next(counters, None)
+            else:
+                inventory_id, product_id, counter_pieces, counter_bf = counter_row
+                ledger_pieces, ledger_bf = ledger_row['pieces'] or 0, ledger_row['board_feet'] or Decimal('0')
+                ledger_row = next(ledger, None)
+                counter_row = next(counters, None)
+
+            counter_bf = Decimal(str(counter_bf)).quantize(Decimal('0.01'))
+            ledger_bf = Decimal(str(ledger_bf)).quantize(Decimal('0.01'))
+            pieces_drift = counter_pieces - ledger_pieces
+            bf_drift = counter_bf - ledger_bf
+
+            if pieces_drift or abs(bf_drift) > tolerance or inventory_id is None:
+                yield {
+                    'product_id': product_id,
+                    'inventory_id': inventory_id,
+                    'counter_pieces': counter_pieces,
+                    'ledger_pieces': ledger_pieces,
+                    'pieces_drift': pieces_drift,
+                    'counter_board_feet': counter_bf,
+                    'ledger_board_feet': ledger_bf,
+                    'board_feet_drift': bf_drift,
+                }
+
+    @staticmethod
+    @transaction.atomic
+    def repair_counters(drifts, batch_size=500):
+        """
+        Reset Inventory counters to the ledger balance
+
+        Args:
+            drifts: Drift dicts from iter_drift
+            batch_size: Rows per bulk statement
+
+        Returns:
+            int: Number of inventory rows repaired or created
+        """
+        now = timezone.now()
+        to_update = []
+        to_create = []
+        for drift in drifts:
+            values = {
+                'quantity_pieces': drift['ledger_pieces'],
+                'total_board_feet': drift['ledger_board_feet'],
+                'last_updated': now,
+            }
+            if drift['inventory_id'] is None:
+                to_create.append(Inventory(product_id=drift['product_id'], **values))
+            else:
+                to_update.append(Inventory(id=drift['inventory_id'], product_id=drift['product_id'], **values))
+
+        Inventory.objects.bulk_update(
+            to_update, ['quantity_pieces', 'total_board_feet', 'last_updated'], batch_size=batch_size
+        )
+        Inventory.objects.bulk_create(to_create, batch_size=batch_size)
+
+        product_ids = [drift['product_id'] for drift in drifts]
+        transaction.on_commit(lambda: invalidate_product_cache(product_ids))
+        return len(to_update) + len(to_create)
+
+    @staticmethod
+    @transaction.atomic
+    def repair_ledger(drifts, created_by=None, batch_size=500):
+        """
+        Post reconciliation adjustments so the ledger matches the counters
+
+        Use this when the counters reflect a physical count (for example
+        opening stock entered without ledger rows).
+
+        Args:
+            drifts: Drift dicts from iter_drift
+            created_by: User recorded on the adjustment rows
+            batch_size: Rows per bulk insert
+
+        Returns:
+            int: Number of adjustment rows written
+        """
+        rows = []
+        for drift in drifts:
+            if drift['inventory_id'] is None:
+                # No counters to align the ledger with
+                continue
+            pieces = drift['pieces_drift']
+            board_feet = drift['board_feet_drift']
+            if pieces and board_feet and (pieces > 0) != (board_feet > 0):
+                # Opposite directions need one row each
+                parts = [(pieces, Decimal('0')), (0, board_feet)]
+            else:
+                parts = [(pieces, board_feet)]
+            for part_pieces, part_bf in parts:
+                direction = '+' if (part_pieces or part_bf) > 0 else '-'
+                rows.append(StockTransaction(
+                    product_id=drift['product_id'],
+                    transaction_type='adjustment',
+                    quantity_pieces=abs(part_pieces),
+                    board_feet=abs(part_bf),
+                    reason=f"reconciliation ({direction})",
+                    reference_id='RECONCILE',
+                    created_by=created_by
+                ))
+
+        created = StockTransaction.objects.bulk_create(rows, batch_size=batch_size)
+        StockMovementRollupService.record(created)
+        return len(created)
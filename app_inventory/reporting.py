@@ -1,11 +1,14 @@
 """
 Inventory reporting and analytics
 """
+from bisect import bisect_right
 from decimal import Decimal
-from django.db.models import Sum, Count, Avg, Q, F
+from django.core.cache import cache
+from django.db.models import Sum, Count, Avg, Max, Q, F
 from django.utils import timezone
-from datetime import timedelta
-from app_inventory.models import Inventory, StockTransaction, InventorySnapshot, LumberProduct
+from datetime import datetime, timedelta
+from app_inventory.models import Inventory, StockTransaction, InventorySnapshot, LumberProduct, StockMovementDaily
+from app_inventory.ledger import signed_pieces, signed_board_feet
 from app_sales.models import SalesOrder, SalesOrderItem
 
 
@@ -32,23 +35,21 @@ class InventoryReports:
         else:
             end_date = date(year, month + 1, 1)
         
-        purchases = StockTransaction.objects.filter(
-            transaction_type='stock_in',
-            created_at__gte=start_date,
-            created_at__lt=end_date
+        period = StockMovementDaily.objects.filter(day__gte=start_date, day__lt=end_date)
+        
+        purchases = period.filter(
+            transaction_type='stock_in'
         ).values('product__id', 'product__name').annotate(
             total_pieces=Sum('quantity_pieces'),
             total_bf=Sum('board_feet')
-        )
+        ).order_by('product__id')
         
-        usage = StockTransaction.objects.filter(
-            transaction_type='stock_out',
-            created_at__gte=start_date,
-            created_at__lt=end_date
+        usage = period.filter(
+            transaction_type='stock_out'
         ).values('product__id', 'product__name').annotate(
             total_pieces=Sum('quantity_pieces'),
             total_bf=Sum('board_feet')
-        )
+        ).order_by('product__id')
         
         return {
             'period': f'{year}-{month:02d}',
@@ -62,38 +63,44 @@ class InventoryReports:
         Get wastage report (adjustments with negative quantities)
         
         Args:
-            start_date: Start date (default: 30 days ago)
-            end_date: End date (default: today)
+            start_date: Start date or datetime (default: 30 days ago)
+            end_date: End date or datetime (default: today)
             
         Returns:
             Dict with wastage data
         """
-        if not start_date:
-            start_date = timezone.now() - timedelta(days=30)
-        if not end_date:
-            end_date = timezone.now()
+        # The rollup buckets by local day, so the window must too
+        start_date = InventoryReports._local_day(start_date) if start_date else timezone.localdate() - timedelta(days=30)
+        end_date = InventoryReports._local_day(end_date) if end_date else timezone.localdate()
         
-        wastage = StockTransaction.objects.filter(
+        wastage = StockMovementDaily.objects.filter(
             transaction_type='adjustment',
-            created_at__gte=start_date,
-            created_at__lte=end_date,
+            day__gte=start_date,
+            day__lte=end_date,
             reason__icontains='damaged'
         ).values('product__id', 'product__name', 'reason').annotate(
             total_pieces=Sum('quantity_pieces'),
             total_bf=Sum('board_feet'),
-            count=Count('id')
+            count=Sum('transaction_count')
         ).order_by('-total_bf')
         
         total_wastage = sum(float(w['total_bf']) for w in wastage)
         total_pieces_wasted = sum(w['total_pieces'] for w in wastage)
         
         return {
-            'period': f'{start_date.date()} to {end_date.date()}',
+            'period': f'{start_date} to {end_date}',
             'total_pieces_wasted': total_pieces_wasted,
             'total_bf_wasted': total_wastage,
             'items': list(wastage)
         }
     
+    @staticmethod
+    def _local_day(value):
+        """Local calendar date of a date or an aware datetime"""
+        if isinstance(value, datetime):
+            return timezone.localdate(value)
+        return value
+    
     @staticmethod
     def inventory_turnover(days=30):
         """
@@ -107,15 +114,18 @@ class InventoryReports:
         """
         cutoff_date = timezone.now() - timedelta(days=days)
         
+        # Read-only: snapshots (including backfilled days) are written by
+        # the create_inventory_snapshots command
         products = LumberProduct.objects.filter(is_active=True).annotate(
             stock_outs=Count(
                 'stock_transactions',
                 filter=Q(stock_transactions__transaction_type='stock_out',
-                        stock_transactions__created_at__gte=cutoff_date)
+                        stock_transactions__created_at__gte=cutoff_date),
+                distinct=True
             ),
             avg_inventory=Avg(
                 'inventory_snapshots__total_board_feet',
-                filter=Q(inventory_snapshots__snapshot_date__gte=cutoff_date.date())
+                filter=Q(inventory_snapshots__snapshot_date__gte=timezone.localdate() - timedelta(days=days))
             )
         ).filter(stock_outs__gt=0).values(
             'id', 'name', 'stock_outs', 'avg_inventory'
@@ -164,3 +174,134 @@ class InventoryReports:
                 'products': v['products']
             } for k, v in categories.items()}
         }
+    
+    SERIES_GRANULARITIES = ('day', 'week', 'month')
+    SERIES_MAX_POINTS = 1000
+    
+    @staticmethod
+    def stock_level_series(product_id, start_date, end_date, granularity='day'):
+        """
+        Stock level of one product at the end of each period in a range
+        
+        Balances are derived from the live Inventory counter (the newest
+        checkpoint) by walking the daily movement rollup backwards, so the
+        cost depends on the number of days with movement, not on the number
+        of ledger rows. The per-day balances are cached until the product's
+        stock changes again.
+        
+        Args:
+            product_id: LumberProduct ID
+            start_date: First date of the range (date)
+            end_date: Last date of the range (date)
+            granularity: 'day', 'week' or 'month'
+            
+        Returns:
+            Dict with the product, range and a list of points
+            
+        Raises:
+            ValueError: If the range or granularity is invalid
+        """
+        if granularity not in InventoryReports.SERIES_GRANULARITIES:
+            raise ValueError(f"granularity must be one of {', '.join(InventoryReports.SERIES_GRANULARITIES)}")
+        if start_date > end_date:
+            raise ValueError("start_date must be on or before end_date")
+        
+        periods = InventoryReports._series_periods(start_date, end_date, granularity)
+        if len(periods) > InventoryReports.SERIES_MAX_POINTS:
+            raise ValueError(
+                f"Range too large for {granularity} granularity "
+                f"(max {InventoryReports.SERIES_MAX_POINTS} points)"
+            )
+        
+        balances = InventoryReports._daily_balances(product_id)
+        days = balances['days']
+        
+        points = []
+        for period_start, period_end in periods:
+            # Latest movement day on or before the end of the period
+            index = bisect_right(days, period_end.isoformat()) - 1
+            if index >= 0:
+                pieces, board_feet = balances['pieces'][index], balances['board_feet'][index]
+            else:
+                pieces, board_feet = balances['opening']
+            points.append({
+                'period_start': period_start.isoformat(),
+                'as_of': period_end.isoformat(),
+                'quantity_pieces': pieces,
+                'board_feet': float(board_feet),
+            })
+        
+        return {
+            'product_id': int(product_id),
+            'start_date': start_date.isoformat(),
+            'end_date': end_date.isoformat(),
+            'granularity': granularity,
+            'points': points,
+        }
+    
+    @staticmethod
+    def _daily_balances(product_id):
+        """
+        Closing balance after every day with stock movement
+        
+        Returns:
+            Dict: sorted ISO 'days', matching 'pieces' and 'board_feet'
+            balances, and the 'opening' balance before the first movement
+        """
+        counter = Inventory.objects.filter(product_id=product_id).values(
+            'quantity_pieces', 'total_board_feet', 'last_updated'
+        ).first() or {'quantity_pieces': 0, 'total_board_feet': Decimal('0'), 'last_updated': None}
+        last_transaction_id = StockTransaction.objects.filter(
+            product_id=product_id
+        ).aggregate(last=Max('id'))['last']
+        
+        # Any stock movement changes the counter timestamp or the newest ledger id
+        stamp = counter['last_updated'].timestamp() if counter['last_updated'] else 0
+        cache_key = f"stock_series_{product_id}_{stamp}_{last_transaction_id or 0}"
+        balances = cache.get(cache_key)
+        if balances is not None:
+            return balances
+        
+        deltas = list(
+            StockMovementDaily.objects.filter(product_id=product_id).values('day').annotate(
+                pieces=Sum(signed_pieces()),
+                board_feet=Sum(signed_board_feet())
+            ).order_by('day').values_list('day', 'pieces', 'board_feet')
+        )
+        
+        # Running sums backwards from the live counter
+        pieces = counter['quantity_pieces']
+        board_feet = Decimal(str(counter['total_board_feet']))
+        closing = []
+        for day, day_pieces, day_board_feet in reversed(deltas):
+            closing.append((day.isoformat(), pieces, board_feet))
+            pieces -= day_pieces or 0
+            board_feet -= Decimal(str(day_board_feet or 0))
+        closing.reverse()
+        
+        balances = {
+            'days': [day for day, _, _ in closing],
+            'pieces': [day_pieces for _, day_pieces, _ in closing],
+            'board_feet': [day_board_feet.quantize(Decimal('0.01')) for _, _, day_board_feet in closing],
+            'opening': (pieces, board_feet.quantize(Decimal('0.01'))),
+        }
+        cache.set(cache_key, balances, 60 * 60)
+        return balances
+    
+    @staticmethod
+    def _series_periods(start_date, end_date, granularity):
+        """Split a date range into (period_start, period_end) pairs, clipped to the range"""
+        periods = []
+        current = start_date
+        while current <= end_date:
+            if granularity == 'day':
+                period_end = current
+            elif granularity == 'week':
+                period_end = current + timedelta(days=6 - current.weekday())
+            else:
+                next_month = (current.replace(day=1) + timedelta(days=32)).replace(day=1)
+                period_end = next_month - timedelta(days=1)
+            period_end = min(period_end, end_date)
+            periods.append((current, period_end))
+            current = period_end + timedelta(days=1)
+        return periods
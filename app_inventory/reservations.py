@@ -0,0 +1,217 @@
+"""
+Stock reservations: time-limited holds on inventory for shopping carts
+
+Every hold is added to ``Inventory.reserved_pieces`` when it is placed and
+taken off when it is released, expires or is deleted by a cascade (see
+app_inventory.signals), so available-to-promise stock
+(``Inventory.available_pieces``) is read from the inventory row without
+scanning reservations.
+
+Holds only gate what the storefront promises to customers. Stock-outs
+(POS sales, checkout) still validate against the pieces on hand.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from threading import local
+from django.core.exceptions import ValidationError
+from django.db import transaction
+from django.db.models import Case, When, F, Value, IntegerField, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce, Greatest
+from django.utils import timezone
+from app_inventory.models import Inventory, StockReservation
+
+
+# IDs of holds _release() is deleting after taking them off the counters
+# itself, so the post_delete receiver does not release them twice
+_releasing = local()
+
+
+class StockReservationService:
+    """Place, renew, release and expire cart holds"""
+
+    HOLD_TTL = timedelta(minutes=30)
+
+    @staticmethod
+    @transaction.atomic
+    def hold_cart_item(cart_item, ttl=None):
+        """
+        Hold stock for a cart item's current quantity
+
+        An existing hold is resized to the new quantity and its expiry
+        pushed out; only the difference is checked against available stock.
+
+        Args:
+            cart_item: Saved CartItem
+            ttl: Hold duration (default HOLD_TTL)
+
+        Returns:
+            StockReservation: The hold
+
+        Raises:
+            ValidationError: If the extra pieces are not available
+        """
+        expires_at = timezone.now() + (ttl or StockReservationService.HOLD_TTL)
+        reservation = StockReservation.objects.select_for_update().filter(cart_item=cart_item).first()
+        held = reservation.quantity_pieces if reservation else 0
+        delta = cart_item.quantity - held
+
+        if delta > 0:
+            # Conditional increment: succeeds only if the pieces are still free
+            updated = Inventory.objects.filter(
+                product_id=cart_item.product_id,
+                quantity_pieces__gte=F('reserved_pieces') + delta
+            ).update(reserved_pieces=F('reserved_pieces') + delta)
+            if not updated:
+                inventory = Inventory.objects.filter(product_id=cart_item.product_id).first()
+                available = held + (inventory.available_pieces if inventory else 0)
+                raise ValidationError(f"Insufficient stock. Available: {available}")
+        elif delta < 0:
+            Inventory.objects.filter(product_id=cart_item.product_id).update(
+                reserved_pieces=Greatest(F('reserved_pieces') + delta, 0)
+            )
+
+        if reservation is None:
+            return StockReservation.objects.create(
+                product_id=cart_item.product_id,
+                cart_item=cart_item,
+                quantity_pieces=cart_item.quantity,
+                expires_at=expires_at
+            )
+        reservation.quantity_pieces = cart_item.quantity
+        reservation.expires_at = expires_at
+        reservation.save(update_fields=['quantity_pieces', 'expires_at', 'updated_at'])
+        return reservation
+
+    @staticmethod
+    def renew_cart_items(cart_item_ids, ttl=None):
+        """
+        Push out the expiry of existing holds, e.g. whenever the cart is viewed
+
+        Args:
+            cart_item_ids: IDs of the cart items
+            ttl: Hold duration (default HOLD_TTL)
+
+        Returns:
+            int: Number of holds renewed
+        """
+        if not cart_item_ids:
+            return 0
+        return StockReservation.objects.filter(cart_item_id__in=cart_item_ids).update(
+            expires_at=timezone.now() + (ttl or StockReservationService.HOLD_TTL),
+            updated_at=timezone.now()
+        )
+
+    @staticmethod
+    @transaction.atomic
+    def release_cart_items(cart_item_ids):
+        """
+        Release the holds of cart items being removed or checked out
+
+        Args:
+            cart_item_ids: IDs of the cart items
+
+        Returns:
+            int: Pieces released
+        """
+        if not cart_item_ids:
+            return 0
+        reservations = StockReservation.objects.select_for_update().filter(cart_item_id__in=cart_item_ids)
+        return StockReservationService._release(reservations)
+
+    @staticmethod
+    def expire_holds(now=None, batch_size=1000):
+        """
+        Release every hold past its expiry, in batches
+
+        Each batch is one SELECT, one UPDATE of the affected inventory rows
+        and one DELETE, in its own transaction.
+
+        Args:
+            now: Cut-off time (default: now)
+            batch_size: Holds released per transaction
+
+        Returns:
+            Dict: expired holds and released pieces
+        """
+        now = now or timezone.now()
+        result = {'expired': 0, 'pieces': 0}
+        while True:
+            with transaction.atomic():
+                ids = list(
+                    StockReservation.objects.filter(expires_at__lte=now)
+                    .order_by('expires_at').values_list('id', flat=True)[:batch_size]
+                )
+                if not ids:
+                    break
+                reservations = StockReservation.objects.select_for_update().filter(id__in=ids, expires_at__lte=now)
+                pieces = StockReservationService._release(reservations)
+            result['expired'] += len(ids)
+            result['pieces'] += pieces
+            if len(ids) < batch_size:
+                break
+        return result
+
+    @staticmethod
+    def resync_reserved_pieces():
+        """
+        Recompute Inventory.reserved_pieces from the reservation table
+
+        A repair tool only: cascading deletes release their holds through
+        the post_delete receiver, so counters drift only after raw SQL or
+        restored backups. Run it from maintenance, not alongside live traffic.
+
+        Returns:
+            int: Inventory rows corrected
+        """
+        held = Coalesce(Subquery(
+            StockReservation.objects.filter(product_id=OuterRef('product_id')).order_by()
+            .values('product_id').annotate(total=Sum('quantity_pieces')).values('total')
+        ), 0)
+        return Inventory.objects.annotate(held=held).exclude(reserved_pieces=F('held')).update(reserved_pieces=held)
+
+    @staticmethod
+    def _release(reservations):
+        """Take locked holds off the inventory counters and delete them"""
+        rows = list(reservations.values_list('id', 'product_id', 'quantity_pieces'))
+        if not rows:
+            return 0
+
+        totals = defaultdict(int)
+        for _, product_id, quantity in rows:
+            totals[product_id] += quantity
+
+        StockReservationService._decrement(totals)
+        ids = [row[0] for row in rows]
+        _releasing.ids = set(ids)
+        try:
+            StockReservation.objects.filter(id__in=ids).delete()
+        finally:
+            _releasing.ids = set()
+        return sum(totals.values())
+
+    @staticmethod
+    def release_deleted(reservation):
+        """
+        Take a hold deleted outside this service (e.g. by a cascade from
+        its cart, user or product) off the inventory counter
+
+        Args:
+            reservation: The deleted StockReservation
+        """
+        if reservation.id in getattr(_releasing, 'ids', ()):
+            return
+        StockReservationService._decrement({reservation.product_id: reservation.quantity_pieces})
+
+    @staticmethod
+    def _decrement(totals):
+        """Subtract {product_id: pieces} from the reserved counters, never below zero"""
+        Inventory.objects.filter(product_id__in=totals).update(
+            reserved_pieces=Greatest(
+                F('reserved_pieces') - Case(
+                    *[When(product_id=product_id, then=Value(total)) for product_id, total in totals.items()],
+                    default=Value(0),
+                    output_field=IntegerField()
+                ),
+                0
+            )
+        )
@@ -0,0 +1,172 @@
+"""
+Incremental maintenance of the StockMovementDaily ledger rollup
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.db.models import F, Value, Case, When, Sum, Count, Min, Max, IntegerField, DecimalField
+from django.db.models.functions import Coalesce, Least, Greatest, TruncDate
+from django.utils import timezone
+from app_inventory.models import StockTransaction, StockMovementDaily
+
+
+class StockMovementRollupService:
+    """Keep StockMovementDaily in step with the StockTransaction ledger"""
+    
+    @staticmethod
+    def record(transactions, sign=1):
+        """
+        Add (or with sign=-1, remove) ledger rows to the daily rollup
+        
+        Rows are grouped in memory into (product, day, type, reason) buckets,
+        so a batch of any size costs one INSERT for missing buckets, one SELECT
+        and one UPDATE.
+        
+        Args:
+            transactions: Iterable of saved StockTransaction instances
+            sign: 1 when rows were inserted, -1 when they were deleted
+        """
+        buckets = {}
+        for tx in transactions:
+            key = (tx.product_id, timezone.localdate(tx.created_at), tx.transaction_type, tx.reason or '')
+            bucket = buckets.setdefault(key, {
+                'transaction_count': 0,
+                'quantity_pieces': 0,
+                'board_feet': Decimal('0'),
+                'total_cost': Decimal('0'),
+                'unit_cost_total': Decimal('0'),
+                'costed_count': 0,
+                'min_unit_cost': None,
+                'max_unit_cost': None,
+            })
+            bucket['transaction_count'] += 1
+            bucket['quantity_pieces'] += tx.quantity_pieces
+            # Match the 2-decimal value the ledger column actually stores
+            bucket['board_feet'] += Decimal(str(tx.board_feet)).quantize(Decimal('0.01'))
+            if tx.cost_per_unit is not None:
+                cost = Decimal(str(tx.cost_per_unit))
+                bucket['total_cost'] += cost * tx.quantity_pieces
+                bucket['unit_cost_total'] += cost
+                bucket['costed_count'] += 1
+                bucket['min_unit_cost'] = cost if bucket['min_unit_cost'] is None else min(bucket['min_unit_cost'], cost)
+                bucket['max_unit_cost'] = cost if bucket['max_unit_cost'] is None else max(bucket['max_unit_cost'], cost)
+        
+        if not buckets:
+            return
+        
+        if sign > 0:
+            # Make sure every bucket exists; concurrent writers may race here,
+            # conflicts are ignored and the increments below apply to both
+            StockMovementDaily.objects.bulk_create(
+                [
+                    StockMovementDaily(
+                        product_id=product_id, day=day, transaction_type=transaction_type, reason=reason
+                    )
+                    for product_id, day, transaction_type, reason in buckets
+                ],
+                ignore_conflicts=True
+            )
+        
+        rows = StockMovementDaily.objects.filter(
+            product_id__in={key[0] for key in buckets},
+            day__in={key[1] for key in buckets}
+        ).values_list('id', 'product_id', 'day', 'transaction_type', 'reason')
+        ids = {(product_id, day, transaction_type, reason): row_id
+               for row_id, product_id, day, transaction_type, reason in rows}
+        targets = [(ids[key], bucket) for key, bucket in buckets.items() if key in ids]
+        if not targets:
+            # Removals never create buckets
+            return
+        
+        output_fields = {
+            'transaction_count': IntegerField(),
+            'quantity_pieces': IntegerField(),
+            'costed_count': IntegerField(),
+            'board_feet': DecimalField(max_digits=14, decimal_places=2),
+            'total_cost': DecimalField(max_digits=16, decimal_places=2),
+            'unit_cost_total': DecimalField(max_digits=16, decimal_places=2),
+        }
+        updates = {
+            field: F(field) + Case(
+                *[When(id=row_id, then=Value(sign * bucket[field], output_field=output_field))
+                  for row_id, bucket in targets],
+                default=Value(0, output_field=output_field),
+                output_field=output_field
+            )
+            for field, output_field in output_fields.items()
+        }
+        
+        costed = [(row_id, bucket) for row_id, bucket in targets if bucket['min_unit_cost'] is not None]
+        if sign > 0 and costed:
+            # Removals leave min/max alone; the rebuild command corrects them after deletions
+            cost_field = DecimalField(max_digits=10, decimal_places=2)
+            for field, pick in (('min_unit_cost', Least), ('max_unit_cost', Greatest)):
+                incoming = Case(
+                    *[When(id=row_id, then=Value(bucket[field], output_field=cost_field))
+                      for row_id, bucket in costed],
+                    default=F(field),
+                    output_field=cost_field
+                )
+                updates[field] = pick(Coalesce(F(field), incoming), incoming)
+        
+        StockMovementDaily.objects.filter(id__in=[row_id for row_id, _ in targets]).update(**updates)
+    
+    @staticmethod
+    @transaction.atomic
+    def rebuild(since=None, batch_size=1000):
+        """
+        Rebuild the rollup from the raw ledger
+        
+        Args:
+            since: Only rebuild days on or after this date (default: everything)
+            batch_size: Rows per bulk insert
+            
+        Returns:
+            int: Number of rollup rows written
+        """
+        ledger = StockTransaction.objects.all()
+        existing = StockMovementDaily.objects.all()
+        if since:
+            ledger = ledger.filter(created_at__date__gte=since)
+            existing = existing.filter(day__gte=since)
+        existing.delete()
+        
+        grouped = ledger.annotate(day=TruncDate('created_at')).values(
+            'product_id', 'day', 'transaction_type', 'reason'
+        ).annotate(
+            transaction_count=Count('id'),
+            total_pieces=Sum('quantity_pieces'),
+            total_board_feet=Sum('board_feet'),
+            total_cost=Sum(F('cost_per_unit') * F('quantity_pieces'),
+                           output_field=DecimalField(max_digits=16, decimal_places=2)),
+            unit_cost_total=Sum('cost_per_unit'),
+            costed_count=Count('cost_per_unit'),
+            min_unit_cost=Min('cost_per_unit'),
+            max_unit_cost=Max('cost_per_unit')
+        ).order_by()
+        
+        written = 0
+        batch = []
+        for row in grouped.iterator(chunk_size=batch_size):
+            batch.append(StockMovementDaily(
+                product_id=row['product_id'],
+                day=row['day'],
+                transaction_type=row['transaction_type'],
+                reason=row['reason'] or '',
+                transaction_count=row['transaction_count'],
+                quantity_pieces=row['total_pieces'] or 0,
+                board_feet=row['total_board_feet'] or Decimal('0'),
+                total_cost=row['total_cost'] or Decimal('0'),
+                unit_cost_total=row['unit_cost_total'] or Decimal('0'),
+                costed_count=row['costed_count'],
+                min_unit_cost=row['min_unit_cost'],
+                max_unit_cost=row['max_unit_cost']
+            ))
+            if len(batch) >= batch_size:
+                StockMovementDaily.objects.bulk_create(batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            StockMovementDaily.objects.bulk_create(batch)
+            written += len(batch)
+        
+        return written
@@ -0,0 +1,289 @@
+"""
+Process-local product search index for POS and catalog search
+
+Active products are tokenized once (name, SKU, category and normalized
+dimensions such as "2x4x8") into a sorted token list, so a keystroke is a
+few binary searches instead of an icontains table scan. Queries with too
+few prefix matches fall back to a substring scan of the token list, so
+'hogany' still finds 'Mahogany'.
+
+Edits made in this process update the index incrementally via the
+LumberProduct signals. Other processes notice the bumped
+``product_search_version`` cache key and rebuild on their next search.
+"""
+import heapq
+import re
+import threading
+import time
+from bisect import bisect_left, insort
+from decimal import Decimal
+from django.core.cache import cache
+
+
+SEARCH_VERSION_KEY = 'product_search_version'
+
+# 2x4, 2 x 4 x 8, 2"x4"x8', 1.5*6 ...
+DIMENSION_PATTERN = re.compile(
+    r'(\d+(?:\.\d+)?)\s*(?:"|in)?\s*[x×*]\s*(\d+(?:\.\d+)?)'
+    r'(?:\s*(?:"|in)?\s*[x×*]\s*(\d+(?:\.\d+)?))?\s*(?:\'|ft)?'
+)
+# Words keep inner separators so SKUs like 'lmb-001' stay whole
+WORD_PATTERN = re.compile(r'[a-z0-9]+(?:[.\-_/][a-z0-9]+)*')
+PART_PATTERN = re.compile(r'[a-z0-9]+')
+
+# Rank weights: lower is better
+RANK_SKU_EXACT = 0
+RANK_DIMENSION_EXACT = 1
+RANK_EXACT = 2
+RANK_PREFIX = 3
+RANK_SUBSTRING = 4
+
+
+def _number(value):
+    """Normalize a dimension number: Decimal('2.00') -> '2', '1.50' -> '1.5'"""
+    value = Decimal(str(value)).normalize()
+    text = format(value, 'f')
+    return text.rstrip('0').rstrip('.') if '.' in text else text
+
+
+def dimension_tokens(thickness, width, length=None):
+    """Dimension tokens for a product or a query: '2x4' and '2x4x8'"""
+    tokens = [f"{_number(thickness)}x{_number(width)}"]
+    if length is not None:
+        tokens.append(f"{tokens[0]}x{_number(length)}")
+    return tokens
+
+
+def tokenize_query(query):
+    """
+    Split a search query into tokens
+
+    Dimension expressions collapse into a single normalized token, so
+    '2 x 4 x 8' and '2"x4"x8' both become '2x4x8'.
+    """
+    query = query.lower()
+    tokens = []
+
+    def collect_dimension(match):
+        thickness, width, length = match.groups()
+        tokens.append(dimension_tokens(thickness, width, length)[-1])
+        return ' '
+
+    remainder = DIMENSION_PATTERN.sub(collect_dimension, query)
+    tokens.extend(WORD_PATTERN.findall(remainder))
+    return tokens
+
+
+class ProductSearchIndex:
+    """In-memory prefix index over active products, with a substring fallback"""
+
+    # Safety net for changes that bypass signals (queryset.update)
+    MAX_AGE_SECONDS = 300
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._tokens = []          # sorted (token, product_id)
+        self._by_product = {}      # product_id -> (tokens, sku, name)
+        self._version = None
+        self._built_at = 0
+
+    def search(self, query, limit=10):
+        """
+        Ranked product IDs matching every token of the query
+
+        Each query token matches by prefix; an exact SKU or dimension match
+        ranks first, then exact word matches, then prefix matches. Only when
+        that yields fewer than ``limit`` products are tokens also matched
+        anywhere inside a word; such matches always rank after products
+        matched by prefix alone. Ties are broken by product name.
+
+        Args:
+            query: Free text, e.g. 'mahogany 2x4' or 'LMB-00'
+            limit: Maximum number of IDs to return
+
+        Returns:
+            List[int]: Product IDs, best match first
+        """
+        self._ensure_fresh()
+        query_tokens = tokenize_query(query)
+        if not query_tokens:
+            return []
+
+        with self._lock:
+            scores = self._match(query_tokens, substring=False)
+            if len(scores) < limit:
+                scores = self._match(query_tokens, substring=True)
+            by_product = self._by_product
+            return heapq.nsmallest(
+                limit, scores, key=lambda product_id: (scores[product_id], by_product[product_id][2])
+            )
+
+    def _match(self, query_tokens, substring):
+        """
+        Score every product matching all query tokens
+
+        Scores are (substring matches, summed rank) tuples, so products
+        matched by prefix alone always sort first. Call with the lock held.
+        """
+        tokens = self._tokens
+        by_product = self._by_product
+
+        if substring:
+            # Longest token first: it has the fewest substring matches
+            ordered = sorted(query_tokens, key=len, reverse=True)
+            first = ordered[0]
+            candidates = (entry for entry in tokens if first in entry[0])
+        else:
+            # Narrowest prefix range first; later tokens only re-check its candidates
+            ranges = sorted(
+                (
+                    (bisect_left(tokens, (query_token,)), bisect_left(tokens, (query_token + '\uffff',)), query_token)
+                    for query_token in query_tokens
+                ),
+                key=lambda bounds: bounds[1] - bounds[0]
+            )
+            ordered = [query_token for _, _, query_token in ranges]
+            first = ordered[0]
+            candidates = tokens[ranges[0][0]:ranges[0][1]]
+
+        scores = {}
+        for token, product_id in candidates:
+            score = self._score(token, first, by_product[product_id][1])
+            if product_id not in scores or score < scores[product_id]:
+                scores[product_id] = score
+
+        for query_token in ordered[1:]:
+            if not scores:
+                break
+            narrowed = {}
+            for product_id, score in scores.items():
+                product_tokens, sku, _ = by_product[product_id]
+                best = min(
+                    (self._score(token, query_token, sku) for token in product_tokens
+                     if token.startswith(query_token) or (substring and query_token in token)),
+                    default=None
+                )
+                if best is not None:
+                    narrowed[product_id] = (score[0] + best[0], score[1] + best[1])
+            scores = narrowed
+        return scores
+
+    @staticmethod
+    def _score(token, query_token, sku):
+        """(substring matches, rank) of an index token containing the query token"""
+        if token.startswith(query_token):
+            return 0, ProductSearchIndex._rank(token, query_token, sku)
+        return 1, RANK_SUBSTRING
+
+    @staticmethod
+    def _rank(token, query_token, sku):
+        """Rank of an index token that starts with the query token"""
+        if token != query_token:
+            return RANK_PREFIX
+        if token == sku:
+            return RANK_SKU_EXACT
+        if token[0].isdigit() and 'x' in token:
+            return RANK_DIMENSION_EXACT
+        return RANK_EXACT
+
+    def upsert(self, product):
+        """Add or refresh one product; inactive products are removed"""
+        if not product.is_active:
+            self.remove(product.id)
+            return
+        entry = self._entry(product, product.category.name if product.category_id else '')
+        with self._lock:
+            self._discard(product.id)
+            for token in entry[0]:
+                insort(self._tokens, (token, product.id))
+            self._by_product[product.id] = entry
+
+    def remove(self, product_id):
+        """Drop one product from the index"""
+        with self._lock:
+            self._discard(product_id)
+
+    def rebuild(self):
+        """Reload every active product with one query"""
+        from app_inventory.models import LumberProduct
+
+        version = cache.get(SEARCH_VERSION_KEY)
+        products = LumberProduct.objects.filter(is_active=True).values_list(
+            'id', 'name', 'sku', 'thickness', 'width', 'length', 'category__name'
+        )
+        tokens = []
+        by_product = {}
+        for product_id, name, sku, thickness, width, length, category_name in products:
+            entry = self._tokenize(name, sku, thickness, width, length, category_name)
+            by_product[product_id] = entry
+            tokens.extend((token, product_id) for token in entry[0])
+        tokens.sort()
+
+        with self._lock:
+            self._tokens = tokens
+            self._by_product = by_product
+            self._version = version
+            self._built_at = time.monotonic()
+
+    def mark_changed(self):
+        """
+        Bump the shared version after a local incremental update
+
+        This process is already current, so it adopts the new version;
+        every other process sees a mismatch and rebuilds.
+        """
+        try:
+            version = cache.incr(SEARCH_VERSION_KEY)
+            previous = version - 1
+        except ValueError:
+            version, previous = 1, None
+            cache.set(SEARCH_VERSION_KEY, version, None)
+        with self._lock:
+            # Only adopt it if no other process changed anything in between
+            if self._built_at and self._version == previous:
+                self._version = version
+
+    def invalidate(self):
+        """Force a rebuild on the next search in every process"""
+        with self._lock:
+            self._built_at = 0
+        self.mark_changed()
+
+    def _ensure_fresh(self):
+        stale = (
+            not self._built_at
+            or time.monotonic() - self._built_at > self.MAX_AGE_SECONDS
+            or cache.get(SEARCH_VERSION_KEY) != self._version
+        )
+        if stale:
+            self.rebuild()
+
+    def _discard(self, product_id):
+        entry = self._by_product.pop(product_id, None)
+        if entry is None:
+            return
+        for token in entry[0]:
+            index = bisect_left(self._tokens, (token, product_id))
+            if index < len(self._tokens) and self._tokens[index] == (token, product_id):
+                del self._tokens[index]
+
+    def _entry(self, product, category_name):
+        return self._tokenize(
+            product.name, product.sku, product.thickness, product.width, product.length, category_name
+        )
+
+    @staticmethod
+    def _tokenize(name, sku, thickness, width, length, category_name):
+        sku = sku.lower()
+        tokens = {sku}
+        for text in (name.lower(), category_name.lower(), sku):
+            # Whole words and their parts, so 'lmb-001' also matches '001'
+            tokens.update(WORD_PATTERN.findall(text))
+            tokens.update(PART_PATTERN.findall(text))
+        tokens.update(dimension_tokens(thickness, width, length))
+        # Dimensions written in the name ("2x4x8 Lumber") match too
+        tokens.update(tokenize_query(name))
+        return tokens, sku, name.lower()
+
+
+product_index = ProductSearchIndex()
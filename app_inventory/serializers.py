@@ -12,7 +12,7 @@ class InventoryQuickSerializer(serializers.ModelSerializer):
     """Quick inventory serializer for nested in product"""
     class Meta:
         model = Inventory
-        fields = ['quantity_pieces', 'total_board_feet']
+        fields = ['quantity_pieces', 'total_board_feet', 'reserved_pieces', 'available_pieces']
 
 
 class LumberProductSerializer(serializers.ModelSerializer):
@@ -38,12 +38,16 @@ class LumberProductSerializer(serializers.ModelSerializer):
             inventory = obj.inventory
             return {
                 'quantity_pieces': inventory.quantity_pieces,
-                'total_board_feet': float(inventory.total_board_feet)
+                'total_board_feet': float(inventory.total_board_feet),
+                'reserved_pieces': inventory.reserved_pieces,
+                'available_pieces': inventory.available_pieces
             }
         except Inventory.DoesNotExist:
             return {
                 'quantity_pieces': 0,
-                'total_board_feet': 0.0
+                'total_board_feet': 0.0,
+                'reserved_pieces': 0,
+                'available_pieces': 0
             }
     
     def get_image(self, obj):
@@ -2,10 +2,16 @@
 Inventory management services for Stock In, Stock Out, and Adjustments
 """
 from decimal import Decimal
+from datetime import timedelta
 from django.db import transaction
+from django.db.models import F, Q, Sum, Case, When, Value, IntegerField, DecimalField
+from django.db.models.functions import TruncDate
 from django.utils import timezone
-from app_inventory.models import Inventory, StockTransaction, LumberProduct
-from app_supplier.models import SupplierPriceHistory
+from app_inventory.models import Inventory, StockTransaction, LumberProduct, InventorySnapshot
+from app_inventory.ledger import signed_pieces, signed_board_feet
+from app_inventory.rollups import StockMovementRollupService
+from app_inventory.signals import invalidate_product_cache
+from app_supplier.services import SupplierPriceHistoryService
 
 
 class InventoryService:
@@ -29,12 +35,12 @@ class InventoryService:
             StockTransaction: The created transaction
         """
         product = LumberProduct.objects.get(id=product_id)
-        board_feet = product.calculate_board_feet(quantity_pieces)
+        board_feet = product.board_feet_for(quantity_pieces)
         
         # Update or create inventory
         inventory, created = Inventory.objects.get_or_create(product=product)
         inventory.quantity_pieces += quantity_pieces
-        inventory.total_board_feet += Decimal(str(board_feet))
+        inventory.total_board_feet += board_feet
         inventory.save()
         
         # Create transaction record
@@ -42,26 +48,15 @@ class InventoryService:
             product=product,
             transaction_type='stock_in',
             quantity_pieces=quantity_pieces,
-            board_feet=Decimal(str(board_feet)),
+            board_feet=board_feet,
             cost_per_unit=cost_per_unit,
             reference_id=reference_id,
             created_by=created_by
         )
         
-        # Update supplier price history if provided
+        # Update supplier price history if provided (skipped when unchanged)
         if supplier_id and cost_per_unit:
-            SupplierPriceHistory.objects.filter(
-                supplier_id=supplier_id,
-                product=product,
-                valid_to__isnull=True
-            ).update(valid_to=timezone.now().date())
-            
-            SupplierPriceHistory.objects.create(
-                supplier_id=supplier_id,
-                product=product,
-                price_per_unit=cost_per_unit,
-                valid_from=timezone.now().date()
-            )
+            SupplierPriceHistoryService.record_prices(supplier_id, {product.id: cost_per_unit})
         
         return transaction_obj
     
@@ -82,32 +77,207 @@ class InventoryService:
             StockTransaction or None: The created transaction, or None if insufficient stock
         """
         product = LumberProduct.objects.get(id=product_id)
-        inventory = Inventory.objects.get(product=product)
+        board_feet = product.board_feet_for(quantity_pieces)
         
-        # Check if sufficient stock available
-        if inventory.quantity_pieces < quantity_pieces:
-            raise ValueError(f"Insufficient stock. Available: {inventory.quantity_pieces}, Requested: {quantity_pieces}")
-        
-        board_feet = product.calculate_board_feet(quantity_pieces)
-        
-        # Update inventory
-        inventory.quantity_pieces -= quantity_pieces
-        inventory.total_board_feet -= Decimal(str(board_feet))
-        inventory.save()
+        # Guarded decrement: only succeeds if enough stock is on hand
+        if not InventoryService._apply_stock_delta(product_id, -quantity_pieces, -board_feet):
+            available = Inventory.objects.get(product_id=product_id).quantity_pieces
+            raise ValueError(f"Insufficient stock. Available: {available}, Requested: {quantity_pieces}")
         
         # Create transaction record
         transaction_obj = StockTransaction.objects.create(
             product=product,
             transaction_type='stock_out',
             quantity_pieces=quantity_pieces,
-            board_feet=Decimal(str(board_feet)),
+            board_feet=board_feet,
             reason=reason,
             reference_id=reference_id,
             created_by=created_by
         )
         
         return transaction_obj
-    
+
+    @staticmethod
+    @transaction.atomic
+    def stock_out_many(items, reason='sales', created_by=None, reference_id=None):
+        """
+        Remove stock for several products in one batch
+
+        Locks every affected inventory row with a single SELECT ... FOR UPDATE,
+        applies all deltas with one UPDATE and writes the ledger rows with one
+        bulk insert. Product caches are invalidated once for the whole batch.
+
+        Args:
+            items: List of dicts with 'product_id' and 'quantity_pieces'
+            reason: Reason for stock out (sales, delivery, wastage, etc.)
+            created_by: User performing the action
+            reference_id: SO number, delivery ID, etc.
+
+        Returns:
+            List[StockTransaction]: The created transactions, one per item
+
+        Raises:
+            ValueError: If any product has insufficient stock
+        """
+        if not items:
+            return []
+
+        # Total requested pieces per product (an order may repeat a product)
+        requested = {}
+        for item_data in items:
+            product_id = int(item_data['product_id'])
+            requested[product_id] = requested.get(product_id, 0) + int(item_data['quantity_pieces'])
+
+        inventories = {
+            inventory.product_id: inventory
+            for inventory in Inventory.objects.select_for_update().select_related('product').filter(
+                product_id__in=requested.keys()
+            )
+        }
+
+        # Validate everything before touching any row
+        board_feet_out = {}
+        for product_id, quantity_pieces in requested.items():
+            inventory = inventories.get(product_id)
+            if inventory is None:
+                raise Inventory.DoesNotExist(f"No inventory record for product {product_id}")
+            if inventory.quantity_pieces < quantity_pieces:
+                raise ValueError(
+                    f"Insufficient stock for {inventory.product.name}. "
+                    f"Available: {inventory.quantity_pieces}, Requested: {quantity_pieces}"
+                )
+            board_feet_out[product_id] = Decimal('0')
+
+        # Sum per-line board feet so the counters match the ledger rows exactly
+        for item_data in items:
+            product_id = int(item_data['product_id'])
+            board_feet_out[product_id] += inventories[product_id].product.board_feet_for(
+                int(item_data['quantity_pieces'])
+            )
+
+        # Apply all deltas in a single guarded UPDATE; on backends without
+        # row locks (SQLite) the stock conditions still prevent overselling
+        guard = Q()
+        for pid, qty in requested.items():
+            guard |= Q(product_id=pid, quantity_pieces__gte=qty)
+        updated = Inventory.objects.filter(guard).update(
+            quantity_pieces=F('quantity_pieces') - Case(
+                *[When(product_id=pid, then=Value(qty)) for pid, qty in requested.items()],
+                output_field=IntegerField()
+            ),
+            total_board_feet=F('total_board_feet') - Case(
+                *[When(product_id=pid, then=Value(bf)) for pid, bf in board_feet_out.items()],
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+            last_updated=timezone.now()
+        )
+        if updated != len(requested):
+            raise ValueError("Insufficient stock: inventory changed while the order was being processed")
+
+        # Ledger rows keep one entry per requested line
+        ledger_rows = []
+        for item_data in items:
+            product = inventories[int(item_data['product_id'])].product
+            quantity_pieces = int(item_data['quantity_pieces'])
+            ledger_rows.append(StockTransaction(
+                product=product,
+                transaction_type='stock_out',
+                quantity_pieces=quantity_pieces,
+                board_feet=product.board_feet_for(quantity_pieces),
+                reason=reason,
+                reference_id=reference_id or '',
+                created_by=created_by
+            ))
+        transactions = StockTransaction.objects.bulk_create(ledger_rows)
+        StockMovementRollupService.record(transactions)
+
+        product_ids = list(requested.keys())
+        transaction.on_commit(lambda: invalidate_product_cache(product_ids))
+
+        return transactions
+
+    @staticmethod
+    @transaction.atomic
+    def stock_in_many(items, supplier_id=None, created_by=None, products=None):
+        """
+        Receive stock for several products in one batch
+
+        Missing inventory rows are created up front, all increments are applied
+        with one UPDATE and the ledger rows are written with one bulk insert.
+
+        Args:
+            items: List of dicts with 'product_id', 'quantity_pieces' and
+                optional 'cost_per_unit' and 'reference_id'
+            supplier_id: Supplier ID for price history (optional)
+            created_by: User performing the action
+            products: Preloaded {product_id: LumberProduct} map (optional)
+
+        Returns:
+            List[StockTransaction]: The created transactions, one per item
+        """
+        if not items:
+            return []
+
+        received = {}
+        for item_data in items:
+            product_id = int(item_data['product_id'])
+            received[product_id] = received.get(product_id, 0) + int(item_data['quantity_pieces'])
+
+        if products is None:
+            products = LumberProduct.objects.in_bulk(list(received.keys()))
+        # Sum per-line board feet so the counters match the ledger rows exactly
+        board_feet_in = {}
+        for item_data in items:
+            product_id = int(item_data['product_id'])
+            board_feet_in[product_id] = board_feet_in.get(product_id, Decimal('0')) + products[product_id].board_feet_for(
+                int(item_data['quantity_pieces'])
+            )
+
+        Inventory.objects.bulk_create(
+            [Inventory(product_id=product_id) for product_id in received],
+            ignore_conflicts=True
+        )
+        Inventory.objects.filter(product_id__in=received.keys()).update(
+            quantity_pieces=F('quantity_pieces') + Case(
+                *[When(product_id=pid, then=Value(qty)) for pid, qty in received.items()],
+                output_field=IntegerField()
+            ),
+            total_board_feet=F('total_board_feet') + Case(
+                *[When(product_id=pid, then=Value(bf)) for pid, bf in board_feet_in.items()],
+                output_field=DecimalField(max_digits=12, decimal_places=2)
+            ),
+            last_updated=timezone.now()
+        )
+
+        ledger_rows = []
+        latest_cost = {}
+        for item_data in items:
+            product = products[int(item_data['product_id'])]
+            quantity_pieces = int(item_data['quantity_pieces'])
+            cost_per_unit = item_data.get('cost_per_unit')
+            ledger_rows.append(StockTransaction(
+                product=product,
+                transaction_type='stock_in',
+                quantity_pieces=quantity_pieces,
+                board_feet=product.board_feet_for(quantity_pieces),
+                cost_per_unit=cost_per_unit,
+                reference_id=item_data.get('reference_id') or '',
+                created_by=created_by
+            ))
+            if cost_per_unit:
+                latest_cost[product.id] = cost_per_unit
+        transactions = StockTransaction.objects.bulk_create(ledger_rows)
+        StockMovementRollupService.record(transactions)
+
+        # Price history is versioned once per product, at the last cost in the batch
+        if supplier_id and latest_cost:
+            SupplierPriceHistoryService.record_prices(supplier_id, latest_cost)
+
+        product_ids = list(received.keys())
+        transaction.on_commit(lambda: invalidate_product_cache(product_ids))
+
+        return transactions
+
     @staticmethod
     @transaction.atomic
     def adjust_stock(product_id, quantity_change, reason, created_by=None):
@@ -124,34 +294,65 @@ class InventoryService:
             StockTransaction: The created transaction
         """
         product = LumberProduct.objects.get(id=product_id)
-        inventory = Inventory.objects.get(product=product)
-        
-        # Check if adjustment would result in negative inventory
-        new_quantity = inventory.quantity_pieces + quantity_change
-        if new_quantity < 0:
-            raise ValueError(f"Adjustment would result in negative inventory: {new_quantity}")
         
-        board_feet_change = product.calculate_board_feet(abs(quantity_change))
+        board_feet_change = product.board_feet_for(abs(quantity_change))
         if quantity_change < 0:
             board_feet_change = -board_feet_change
         
-        # Update inventory
-        inventory.quantity_pieces = new_quantity
-        inventory.total_board_feet += Decimal(str(board_feet_change))
-        inventory.save()
+        # Guarded update: a decrease only succeeds if it keeps inventory non-negative
+        if not InventoryService._apply_stock_delta(product_id, quantity_change, board_feet_change):
+            new_quantity = Inventory.objects.get(product_id=product_id).quantity_pieces + quantity_change
+            raise ValueError(f"Adjustment would result in negative inventory: {new_quantity}")
         
         # Create transaction record (use positive number and track direction in reason)
         transaction_obj = StockTransaction.objects.create(
             product=product,
             transaction_type='adjustment',
             quantity_pieces=abs(quantity_change),
-            board_feet=Decimal(str(abs(board_feet_change))),
+            board_feet=abs(board_feet_change),
             reason=f"{reason} ({'+' if quantity_change > 0 else '-'})",
             created_by=created_by
         )
         
         return transaction_obj
     
+    @staticmethod
+    def _apply_stock_delta(product_id, quantity_change, board_feet_change):
+        """
+        Atomically apply a stock delta with a conditional UPDATE
+        
+        Runs UPDATE ... SET quantity_pieces = quantity_pieces + n
+        WHERE quantity_pieces >= -n, so concurrent sales can neither oversell
+        nor lose an update, and no prior SELECT of the row is needed.
+        
+        Args:
+            product_id: LumberProduct ID
+            quantity_change: Signed change in pieces
+            board_feet_change: Signed change in board feet (Decimal)
+            
+        Returns:
+            bool: True if the row was updated, False if stock was insufficient
+            
+        Raises:
+            Inventory.DoesNotExist: If the product has no inventory record
+        """
+        rows = Inventory.objects.filter(product_id=product_id)
+        if quantity_change < 0:
+            rows = rows.filter(quantity_pieces__gte=-quantity_change)
+        
+        updated = rows.update(
+            quantity_pieces=F('quantity_pieces') + quantity_change,
+            total_board_feet=F('total_board_feet') + board_feet_change,
+            last_updated=timezone.now()
+        )
+        if updated:
+            return True
+        
+        # Failure path only: tell a missing row apart from insufficient stock
+        if not Inventory.objects.filter(product_id=product_id).exists():
+            raise Inventory.DoesNotExist(f"No inventory record for product {product_id}")
+        return False
+    
     @staticmethod
     def get_low_stock_products(threshold_bf=100):
         """
@@ -177,16 +378,14 @@ class InventoryService:
         Returns:
             Dict: Product info and transaction count
         """
-        from django.db.models import Count, Q
-        from datetime import timedelta
-        
-        cutoff_date = timezone.now() - timedelta(days=days)
+        cutoff_date = timezone.localdate() - timedelta(days=days)
         
+        # Read from the daily rollup instead of re-aggregating the raw ledger
         products = LumberProduct.objects.filter(
-            stock_transactions__transaction_type='stock_out',
-            stock_transactions__created_at__gte=cutoff_date
+            movement_rollups__transaction_type='stock_out',
+            movement_rollups__day__gte=cutoff_date
         ).annotate(
-            transaction_count=Count('stock_transactions', filter=Q(stock_transactions__transaction_type='stock_out'))
+            transaction_count=Sum('movement_rollups__transaction_count')
         ).filter(
             transaction_count__gte=min_transactions
         ).order_by('-transaction_count').values('id', 'name', 'transaction_count')
@@ -205,3 +404,81 @@ class InventoryService:
             QuerySet: Inventory records above threshold
         """
         return Inventory.objects.filter(total_board_feet__gt=max_bf).select_related('product')
+
+
+class InventorySnapshotService:
+    """Build daily inventory snapshots from current stock and the ledger"""
+    
+    @staticmethod
+    @transaction.atomic
+    def build_snapshots(backfill_days=30):
+        """
+        Write today's snapshot for every product and rebuild missing past days
+        
+        Past stock levels are reconstructed by replaying StockTransaction
+        deltas backwards from current stock, so missed cron runs can be
+        filled in. All rows are written with one bulk upsert.
+        
+        Args:
+            backfill_days: How many days back to look for missing snapshots
+            
+        Returns:
+            Dict: snapshot date, rows written and how many were backfilled
+        """
+        today = timezone.localdate()
+        start_date = today - timedelta(days=backfill_days)
+        
+        inventories = Inventory.objects.values_list(
+            'product_id', 'quantity_pieces', 'total_board_feet', 'product__created_at'
+        )
+        
+        existing = set(InventorySnapshot.objects.filter(
+            snapshot_date__gte=start_date,
+            snapshot_date__lt=today
+        ).values_list('product_id', 'snapshot_date'))
+        
+        # Net movement per product per day since the start of the window
+        deltas = {}
+        daily_movements = StockTransaction.objects.filter(
+            created_at__date__gt=start_date
+        ).annotate(day=TruncDate('created_at')).values('product_id', 'day').annotate(
+            pieces=Sum(signed_pieces()),
+            board_feet=Sum(signed_board_feet())
+        )
+        for row in daily_movements:
+            deltas[(row['product_id'], row['day'])] = (row['pieces'] or 0, row['board_feet'] or Decimal('0'))
+        
+        snapshots = []
+        backfilled = 0
+        for product_id, pieces, board_feet, created_at in inventories:
+            first_day = timezone.localtime(created_at).date() if created_at else start_date
+            day = today
+            while day >= start_date and day >= first_day:
+                if day == today or (product_id, day) not in existing:
+                    snapshots.append(InventorySnapshot(
+                        product_id=product_id,
+                        quantity_pieces=pieces,
+                        total_board_feet=board_feet,
+                        snapshot_date=day
+                    ))
+                    if day != today:
+                        backfilled += 1
+                # Undo this day's movements to get the previous day's closing stock
+                day_pieces, day_board_feet = deltas.get((product_id, day), (0, Decimal('0')))
+                pieces -= day_pieces
+                board_feet -= day_board_feet
+                day -= timedelta(days=1)
+        
+        InventorySnapshot.objects.bulk_create(
+            snapshots,
+            batch_size=1000,
+            update_conflicts=True,
+            unique_fields=['product', 'snapshot_date'],
+            update_fields=['quantity_pieces', 'total_board_feet']
+        )
+        
+        return {
+            'snapshot_date': today,
+            'written': len(snapshots),
+            'backfilled': backfilled
+        }
@@ -1,33 +1,30 @@
 from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.core.cache import cache
-from app_inventory.models import Inventory, StockTransaction, LumberProduct
+from django.db import transaction
+from app_inventory.models import Inventory, StockTransaction, LumberProduct, LumberCategory, StockReservation
+from app_inventory.reservations import StockReservationService
+from app_inventory.rollups import StockMovementRollupService
+from app_inventory.search import product_index
 
-@receiver([post_save, post_delete], sender=Inventory)
-@receiver([post_save, post_delete], sender=StockTransaction)
-@receiver([post_save, post_delete], sender=LumberProduct)
-def invalid_product_cache(sender, instance, **kwargs):
+
+def invalidate_product_cache(product_ids=()):
     """
-    Invalidate product cache when inventory changes.
-    This ensures that the product list reflects the latest stock levels immediately.
+    Invalidate product detail caches and bump the product list cache version.
+
+    Bulk operations (bulk_create, queryset.update) do not fire model signals,
+    so batch services call this once per batch instead.
     """
-    # 1. Clear specific product cache if possible
-    product_id = None
-    if isinstance(instance, LumberProduct):
-        product_id = instance.id
-    elif isinstance(instance, Inventory):
-        product_id = instance.product_id
-    elif isinstance(instance, StockTransaction):
-        product_id = instance.product_id
-        
-    if product_id:
-        # Clear individual product detail cache
-        cache.delete(f"product_{product_id}")
-    
+    # 1. Clear specific product caches
+    for product_id in product_ids:
+        if product_id:
+            # Clear individual product detail cache
+            cache.delete(f"product_{product_id}")
+
     # 2. Clear product list caches
     # Since we can't accept wildcard deletions on all cache backends reliably,
     # we use the versioning strategy pattern from the ViewSet.
-    
+
     # Increment the version to invalidate all list caches
     try:
         if hasattr(cache, 'incr'):
@@ -40,7 +37,7 @@ def invalid_product_cache(sender, instance, **kwargs):
             # Fallback for backends without atomic incr
             v = cache.get('products_list_version', 1)
             cache.set('products_list_version', int(v) + 1)
-            
+
     except Exception as e:
         print(f"Error invalidating product cache: {e}")
         # Last resort: try to delete pattern if supported (Redis)
@@ -49,3 +46,66 @@ def invalid_product_cache(sender, instance, **kwargs):
                 cache.delete_pattern("products_list_*")
             except Exception:
                 pass
+
+
+@receiver([post_save, post_delete], sender=Inventory)
+@receiver([post_save, post_delete], sender=StockTransaction)
+@receiver([post_save, post_delete], sender=LumberProduct)
+def invalid_product_cache(sender, instance, **kwargs):
+    """
+    Invalidate product cache when inventory changes.
+    This ensures that the product list reflects the latest stock levels immediately.
+    """
+    product_id = None
+    if isinstance(instance, LumberProduct):
+        product_id = instance.id
+    elif isinstance(instance, Inventory):
+        product_id = instance.product_id
+    elif isinstance(instance, StockTransaction):
+        product_id = instance.product_id
+
+    invalidate_product_cache([product_id])
+
+
+@receiver(post_save, sender=StockTransaction)
+def add_to_movement_rollup(sender, instance, created, **kwargs):
+    """Fold newly inserted ledger rows into the daily movement rollup"""
+    if created:
+        StockMovementRollupService.record([instance])
+
+
+@receiver(post_delete, sender=StockTransaction)
+def remove_from_movement_rollup(sender, instance, **kwargs):
+    """Take deleted ledger rows back out of the daily movement rollup"""
+    StockMovementRollupService.record([instance], sign=-1)
+
+
+@receiver(post_save, sender=LumberProduct)
+def index_product(sender, instance, **kwargs):
+    """Refresh the product in the search index once the save is committed"""
+    def update_index():
+        product_index.upsert(instance)
+        product_index.mark_changed()
+    transaction.on_commit(update_index)
+
+
+@receiver(post_delete, sender=LumberProduct)
+def unindex_product(sender, instance, **kwargs):
+    """Drop a deleted product from the search index"""
+    product_id = instance.id
+    def update_index():
+        product_index.remove(product_id)
+        product_index.mark_changed()
+    transaction.on_commit(update_index)
+
+
+@receiver([post_save, post_delete], sender=LumberCategory)
+def reindex_category(sender, instance, **kwargs):
+    """Category names are indexed on every product, so rebuild lazily"""
+    transaction.on_commit(product_index.invalidate)
+
+
+@receiver(post_delete, sender=StockReservation)
+def release_deleted_reservation(sender, instance, **kwargs):
+    """Keep reserved_pieces in step when a cart, user or product delete cascades to a hold"""
+    StockReservationService.release_deleted(instance)
@@ -1,3 +1,522 @@
-from django.test import TestCase
+import io
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from unittest import mock
+from django.db import DatabaseError, connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+from django.utils import timezone
+from app_inventory.models import (
+    LumberCategory, LumberProduct, Inventory, StockTransaction, InventorySnapshot, StockMovementDaily
+)
+from app_inventory.receiving import BulkReceivingService
+from app_inventory.reconciliation import InventoryReconciliationService
+from app_inventory.reporting import InventoryReports
+from app_inventory.search import ProductSearchIndex, product_index
+from app_inventory.rollups import StockMovementRollupService
+from app_inventory.services import InventoryService, InventorySnapshotService
+from app_supplier.models import Supplier, SupplierPriceHistory
+from core.models import CustomUser
 
-# Create your tests here.
+
+def make_product(sku='LMB-001', pieces=100, thickness='2', width='4', length='8', **kwargs):
+    """Active product with an inventory row holding the given pieces"""
+    category, _ = LumberCategory.objects.get_or_create(name=kwargs.pop('category_name', 'Softwood'))
+    product = LumberProduct.objects.create(
+        name=kwargs.pop('name', f'Lumber {sku}'),
+        category=category,
+        sku=sku,
+        thickness=Decimal(thickness),
+        width=Decimal(width),
+        length=Decimal(length),
+        price_per_board_foot=kwargs.pop('price_per_board_foot', Decimal('10.00')),
+        **kwargs
+    )
+    if pieces is not None:
+        Inventory.objects.create(
+            product=product,
+            quantity_pieces=pieces,
+            total_board_feet=product.board_feet_for(pieces)
+        )
+    return product
+
+
+class StockOutManyTests(TestCase):
+    """InventoryService.stock_out_many"""
+
+    def setUp(self):
+        self.first = make_product('LMB-001', pieces=50)
+        self.second = make_product('LMB-002', pieces=20)
+
+    def test_decrements_every_product_and_writes_one_ledger_row_per_line(self):
+        transactions = InventoryService.stock_out_many([
+            {'product_id': self.first.id, 'quantity_pieces': 5},
+            {'product_id': self.second.id, 'quantity_pieces': 3},
+            {'product_id': self.first.id, 'quantity_pieces': 2},
+        ], reference_id='SO-1')
+
+        self.assertEqual(len(transactions), 3)
+        first = Inventory.objects.get(product=self.first)
+        self.assertEqual(first.quantity_pieces, 43)
+        self.assertEqual(first.total_board_feet, self.first.board_feet_for(43))
+        self.assertEqual(Inventory.objects.get(product=self.second).quantity_pieces, 17)
+        self.assertEqual(
+            StockTransaction.objects.filter(transaction_type='stock_out', reference_id='SO-1').count(), 3
+        )
+
+    def test_oversell_is_rejected_without_touching_any_row(self):
+        with self.assertRaises(ValueError):
+            InventoryService.stock_out_many([
+                {'product_id': self.first.id, 'quantity_pieces': 5},
+                {'product_id': self.second.id, 'quantity_pieces': 21},
+            ])
+
+        self.assertEqual(Inventory.objects.get(product=self.first).quantity_pieces, 50)
+        self.assertEqual(Inventory.objects.get(product=self.second).quantity_pieces, 20)
+        self.assertFalse(StockTransaction.objects.exists())
+
+    def test_repeated_product_is_checked_against_its_total(self):
+        with self.assertRaises(ValueError):
+            InventoryService.stock_out_many([
+                {'product_id': self.second.id, 'quantity_pieces': 15},
+                {'product_id': self.second.id, 'quantity_pieces': 10},
+            ])
+        self.assertEqual(Inventory.objects.get(product=self.second).quantity_pieces, 20)
+
+    def test_product_without_inventory_row_is_rejected(self):
+        bare = make_product('LMB-003', pieces=None)
+        with self.assertRaises(Inventory.DoesNotExist):
+            InventoryService.stock_out_many([{'product_id': bare.id, 'quantity_pieces': 1}])
+
+    def test_query_count_does_not_grow_with_lines(self):
+        products = [make_product(f'LMB-1{i:02d}', pieces=100) for i in range(10)]
+
+        with CaptureQueriesContext(connection) as one_line:
+            InventoryService.stock_out_many([{'product_id': products[0].id, 'quantity_pieces': 1}])
+        with CaptureQueriesContext(connection) as ten_lines:
+            InventoryService.stock_out_many([{'product_id': p.id, 'quantity_pieces': 1} for p in products])
+
+        self.assertEqual(len(one_line), len(ten_lines))
+
+
+class GuardedStockDeltaTests(TestCase):
+    """Conditional-UPDATE paths in stock_out and adjust_stock"""
+
+    def setUp(self):
+        self.product = make_product(pieces=10)
+
+    def test_stock_out_can_take_the_last_piece(self):
+        InventoryService.stock_out(self.product.id, 10, reference_id='SO-1')
+        inventory = Inventory.objects.get(product=self.product)
+        self.assertEqual(inventory.quantity_pieces, 0)
+        self.assertEqual(inventory.total_board_feet, Decimal('0'))
+
+    def test_stock_out_oversell_raises_and_keeps_stock(self):
+        with self.assertRaisesMessage(ValueError, 'Available: 10, Requested: 11'):
+            InventoryService.stock_out(self.product.id, 11)
+        self.assertEqual(Inventory.objects.get(product=self.product).quantity_pieces, 10)
+        self.assertFalse(StockTransaction.objects.exists())
+
+    def test_stock_out_without_inventory_row_raises_does_not_exist(self):
+        bare = make_product('LMB-002', pieces=None)
+        with self.assertRaises(Inventory.DoesNotExist):
+            InventoryService.stock_out(bare.id, 1)
+
+    def test_adjust_stock_applies_signed_changes(self):
+        InventoryService.adjust_stock(self.product.id, 5, 'recount')
+        InventoryService.adjust_stock(self.product.id, -3, 'damaged')
+
+        self.assertEqual(Inventory.objects.get(product=self.product).quantity_pieces, 12)
+        reasons = set(StockTransaction.objects.values_list('reason', flat=True))
+        self.assertEqual(reasons, {'recount (+)', 'damaged (-)'})
+
+    def test_adjust_stock_below_zero_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'negative inventory: -1'):
+            InventoryService.adjust_stock(self.product.id, -11, 'lost')
+        self.assertEqual(Inventory.objects.get(product=self.product).quantity_pieces, 10)
+
+    def test_apply_stock_delta_reports_insufficient_stock(self):
+        self.assertFalse(InventoryService._apply_stock_delta(self.product.id, -11, Decimal('-1')))
+        self.assertTrue(InventoryService._apply_stock_delta(self.product.id, -10, -self.product.board_feet_for(10)))
+
+
+def days_ago(days):
+    """Aware datetime at noon, the given number of local days back"""
+    day = timezone.localdate() - timedelta(days=days)
+    return timezone.make_aware(datetime.combine(day, time(12)))
+
+
+class InventorySnapshotTests(TestCase):
+    """InventorySnapshotService.build_snapshots and the turnover report"""
+
+    def setUp(self):
+        self.product = make_product(pieces=100)
+        LumberProduct.objects.filter(pk=self.product.pk).update(created_at=days_ago(3))
+        # 40 received yesterday, 10 sold today; 100 on hand now
+        received = StockTransaction.objects.create(
+            product=self.product, transaction_type='stock_in', quantity_pieces=40,
+            board_feet=self.product.board_feet_for(40)
+        )
+        StockTransaction.objects.filter(pk=received.pk).update(created_at=days_ago(1))
+        StockTransaction.objects.create(
+            product=self.product, transaction_type='stock_out', quantity_pieces=10,
+            board_feet=self.product.board_feet_for(10), reason='sales'
+        )
+
+    def snapshot_pieces(self):
+        today = timezone.localdate()
+        return {
+            (today - snapshot.snapshot_date).days: snapshot.quantity_pieces
+            for snapshot in InventorySnapshot.objects.filter(product=self.product)
+        }
+
+    def test_backfill_replays_the_ledger_backwards(self):
+        result = InventorySnapshotService.build_snapshots(backfill_days=7)
+
+        self.assertEqual(result['backfilled'], 3)
+        self.assertEqual(self.snapshot_pieces(), {0: 100, 1: 110, 2: 70, 3: 70})
+
+    def test_rerun_updates_today_without_duplicating_past_days(self):
+        InventorySnapshotService.build_snapshots(backfill_days=7)
+        Inventory.objects.filter(product=self.product).update(quantity_pieces=95)
+
+        result = InventorySnapshotService.build_snapshots(backfill_days=7)
+
+        self.assertEqual(result['backfilled'], 0)
+        self.assertEqual(self.snapshot_pieces(), {0: 95, 1: 110, 2: 70, 3: 70})
+
+    def test_turnover_report_only_reads_snapshots(self):
+        report = InventoryReports.inventory_turnover(days=30)
+        self.assertFalse(InventorySnapshot.objects.exists())
+        self.assertIsNone(report['data'][0]['avg_inventory'])
+
+        InventorySnapshotService.build_snapshots(backfill_days=30)
+        report = InventoryReports.inventory_turnover(days=30)
+        self.assertEqual(report['data'][0]['stock_outs'], 1)
+        self.assertIsNotNone(report['data'][0]['avg_inventory'])
+
+
+class StockMovementRollupTests(TestCase):
+    """StockMovementDaily kept incrementally vs rebuilt from the ledger"""
+
+    FIELDS = ('product_id', 'day', 'transaction_type', 'reason', 'transaction_count', 'quantity_pieces', 'board_feet')
+
+    def setUp(self):
+        self.product = make_product(pieces=100)
+
+    def rollup(self):
+        return sorted(StockMovementDaily.objects.filter(transaction_count__gt=0).values_list(*self.FIELDS))
+
+    def test_incremental_rollup_matches_rebuild(self):
+        InventoryService.stock_in(self.product.id, 20, cost_per_unit=Decimal('55.00'), reference_id='PO-1')
+        InventoryService.stock_out(self.product.id, 7, reference_id='SO-1')
+        InventoryService.stock_out(self.product.id, 3, reference_id='SO-2')
+        InventoryService.adjust_stock(self.product.id, -2, 'damaged')
+        StockTransaction.objects.filter(reference_id='SO-2').delete()
+        incremental = self.rollup()
+
+        StockMovementRollupService.rebuild()
+
+        self.assertEqual(incremental, self.rollup())
+        sold = StockMovementDaily.objects.get(transaction_type='stock_out')
+        self.assertEqual((sold.transaction_count, sold.quantity_pieces), (1, 7))
+
+    @override_settings(TIME_ZONE='Asia/Manila')
+    def test_wastage_window_uses_local_days(self):
+        adjustment = InventoryService.adjust_stock(self.product.id, -4, 'damaged')
+        # 00:30 on Jan 11 in Manila is still Jan 10 in UTC
+        local = timezone.get_current_timezone()
+        StockTransaction.objects.filter(pk=adjustment.pk).update(
+            created_at=timezone.make_aware(datetime(2026, 1, 11, 0, 30), local)
+        )
+        StockMovementRollupService.rebuild()
+
+        jan_11 = InventoryReports.wastage_report(
+            start_date=timezone.make_aware(datetime(2026, 1, 11, 8), local),
+            end_date=timezone.make_aware(datetime(2026, 1, 11, 23), local)
+        )
+        jan_10 = InventoryReports.wastage_report(
+            start_date=datetime(2026, 1, 10).date(),
+            end_date=datetime(2026, 1, 10).date()
+        )
+
+        self.assertEqual(jan_11['total_pieces_wasted'], 4)
+        self.assertEqual(jan_11['period'], '2026-01-11 to 2026-01-11')
+        self.assertEqual(jan_10['total_pieces_wasted'], 0)
+
+    def test_wastage_defaults_cover_today(self):
+        InventoryService.adjust_stock(self.product.id, -4, 'damaged')
+        InventoryService.adjust_stock(self.product.id, -1, 'recount')
+
+        report = InventoryReports.wastage_report()
+
+        self.assertEqual(report['total_pieces_wasted'], 4)
+
+
+class InventoryReconciliationTests(TestCase):
+    """InventoryReconciliationService drift detection and repair"""
+
+    def setUp(self):
+        self.product = make_product(pieces=None)
+        InventoryService.stock_in(self.product.id, 30, reference_id='PO-1')
+        InventoryService.stock_out(self.product.id, 5, reference_id='SO-1')
+
+    def drift(self):
+        return list(InventoryReconciliationService.iter_drift())
+
+    def test_counters_matching_the_ledger_report_no_drift(self):
+        self.assertEqual(self.drift(), [])
+
+    def test_counter_drift_is_reported_and_repaired(self):
+        Inventory.objects.filter(product=self.product).update(quantity_pieces=28)
+        drifts = self.drift()
+
+        self.assertEqual(len(drifts), 1)
+        self.assertEqual((drifts[0]['counter_pieces'], drifts[0]['ledger_pieces'], drifts[0]['pieces_drift']), (28, 25, 3))
+
+        self.assertEqual(InventoryReconciliationService.repair_counters(drifts), 1)
+        self.assertEqual(Inventory.objects.get(product=self.product).quantity_pieces, 25)
+        self.assertEqual(self.drift(), [])
+
+    def test_ledger_without_inventory_row_gets_one_created(self):
+        Inventory.objects.filter(product=self.product).delete()
+        drifts = self.drift()
+        self.assertIsNone(drifts[0]['inventory_id'])
+
+        InventoryReconciliationService.repair_counters(drifts)
+
+        inventory = Inventory.objects.get(product=self.product)
+        self.assertEqual(inventory.quantity_pieces, 25)
+        self.assertEqual(inventory.total_board_feet, self.product.board_feet_for(25))
+
+    def test_repair_ledger_posts_adjustments_to_match_counters(self):
+        # Opening stock counted in without ledger rows
+        other = make_product('LMB-002', pieces=12)
+        Inventory.objects.filter(product=self.product).update(quantity_pieces=20)
+
+        written = InventoryReconciliationService.repair_ledger(self.drift())
+
+        self.assertEqual(written, 2)
+        self.assertEqual(self.drift(), [])
+        reasons = StockTransaction.objects.filter(reference_id='RECONCILE', product=other).values_list('reason', flat=True)
+        self.assertEqual(list(reasons), ['reconciliation (+)'])
+        self.assertEqual(
+            StockMovementDaily.objects.get(product=other, transaction_type='adjustment').quantity_pieces, 12
+        )
+
+
+class BoardFeetPerPieceTests(TestCase):
+    """Stored LumberProduct.board_feet_per_piece"""
+
+    def test_computed_exactly_on_save(self):
+        product = make_product(thickness='2', width='4', length='8')
+        self.assertEqual(
+            LumberProduct.objects.values_list('board_feet_per_piece', flat=True).get(pk=product.pk),
+            Decimal('5.333333')
+        )
+        # 3 x 5.333333 would drift; the ledger amount is rounded once
+        self.assertEqual(product.board_feet_for(3), Decimal('16.00'))
+        self.assertEqual(product.board_feet_for(0), Decimal('0.00'))
+
+    def test_dimension_change_with_update_fields_recomputes(self):
+        product = make_product(thickness='2', width='4', length='8')
+        product.length = Decimal('12')
+        product.save(update_fields=['length'])
+
+        product.refresh_from_db()
+        self.assertEqual(product.board_feet_per_piece, Decimal('8.000000'))
+
+    def test_unsaved_product_falls_back_to_dimensions(self):
+        product = LumberProduct(thickness=Decimal('1'), width=Decimal('6'), length=Decimal('10'))
+        self.assertEqual(product.board_feet_for(2), Decimal('10.00'))
+        self.assertEqual(product.calculate_board_feet(2), 10.0)
+
+    def test_stock_movements_use_the_stored_value(self):
+        product = make_product(pieces=None, thickness='2', width='4', length='8')
+        InventoryService.stock_in(product.id, 7, reference_id='PO-1')
+        InventoryService.stock_out(product.id, 4, reference_id='SO-1')
+
+        inventory = Inventory.objects.get(product=product)
+        self.assertEqual(inventory.total_board_feet, Decimal('37.33') - Decimal('21.33'))
+        self.assertEqual(
+            sorted(StockTransaction.objects.values_list('board_feet', flat=True)),
+            [Decimal('21.33'), Decimal('37.33')]
+        )
+
+
+def receiving_sheet(*rows):
+    """CSV receiving sheet with the standard header"""
+    lines = ['sku,pieces,cost,reference'] + [','.join(row) for row in rows]
+    return io.BytesIO('\n'.join(lines).encode())
+
+
+class BulkReceivingTests(TestCase):
+    """BulkReceivingService.import_file and the import view"""
+
+    def setUp(self):
+        self.first = make_product('LMB-001', pieces=10)
+        self.second = make_product('LMB-002', pieces=None)
+        self.supplier = Supplier.objects.create(company_name='Sierra Lumber', contact_person='Ana', phone_number='0917')
+
+    def test_valid_rows_are_received_and_bad_rows_reported(self):
+        sheet = receiving_sheet(
+            ('LMB-001', '5', '50.00', 'PO-1'),
+            ('LMB-002', '3', '', 'PO-1'),
+            ('LMB-001', 'Infinity', '', ''),
+            ('LMB-001', 'sNaN', '', ''),
+            ('LMB-001', '1.5', '', ''),
+            ('LMB-001', '0', '', ''),
+            ('LMB-001', '2', 'NaN', ''),
+            ('LMB-999', '2', '', ''),
+        )
+
+        result = BulkReceivingService.import_file(sheet, 'truck.csv', supplier_id=str(self.supplier.id))
+
+        self.assertEqual((result['rows'], result['received'], result['pieces']), (8, 2, 8))
+        self.assertEqual([error['line'] for error in result['errors']], [4, 5, 6, 7, 8, 9])
+        self.assertEqual(Inventory.objects.get(product=self.first).quantity_pieces, 15)
+        self.assertEqual(Inventory.objects.get(product=self.second).quantity_pieces, 3)
+        self.assertEqual(SupplierPriceHistory.objects.get(supplier=self.supplier).product, self.first)
+
+    def test_dry_run_does_not_touch_inventory(self):
+        result = BulkReceivingService.import_file(receiving_sheet(('LMB-001', '5', '', '')), 'truck.csv', dry_run=True)
+
+        self.assertEqual(result['received'], 1)
+        self.assertEqual(Inventory.objects.get(product=self.first).quantity_pieces, 10)
+        self.assertFalse(StockTransaction.objects.exists())
+
+    def test_unknown_or_malformed_supplier_is_rejected(self):
+        for supplier_id in (self.supplier.id + 100, 'abc'):
+            with self.assertRaises(ValueError):
+                BulkReceivingService.import_file(receiving_sheet(('LMB-001', '5', '', '')), 'truck.csv',
+                                                 supplier_id=supplier_id)
+        self.assertFalse(StockTransaction.objects.exists())
+
+    def test_database_error_rolls_back_earlier_chunks(self):
+        stock_in_many = InventoryService.stock_in_many
+        calls = []
+
+        def fail_second_chunk(*args, **kwargs):
+            calls.append(1)
+            if len(calls) == 2:
+                raise DatabaseError('disk full')
+            return stock_in_many(*args, **kwargs)
+
+        sheet = receiving_sheet(('LMB-001', '5', '', ''), ('LMB-002', '3', '', ''))
+        with mock.patch.object(InventoryService, 'stock_in_many', side_effect=fail_second_chunk):
+            with self.assertRaisesMessage(ValueError, 'rolled back'):
+                BulkReceivingService.import_file(sheet, 'truck.csv', chunk_size=1)
+
+        self.assertEqual(Inventory.objects.get(product=self.first).quantity_pieces, 10)
+        self.assertFalse(StockTransaction.objects.exists())
+
+    def test_unsupported_file_type_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'Unsupported file type'):
+            BulkReceivingService.import_file(io.BytesIO(b''), 'truck.pdf')
+
+    def test_corrupt_xlsx_is_rejected(self):
+        with self.assertRaisesMessage(ValueError, 'Not a valid .xlsx file'):
+            BulkReceivingService.import_file(io.BytesIO(b'garbage'), 'truck.xlsx')
+
+        user = CustomUser.objects.create_user('yard', password='pass', role='inventory_manager')
+        self.client.force_login(user)
+        upload = io.BytesIO(b'garbage')
+        upload.name = 'truck.xlsx'
+        response = self.client.post(reverse('inventory_management:stock_in_import'), {'file': upload})
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(StockTransaction.objects.exists())
+
+    def test_import_view_reports_dry_run_as_validation(self):
+        user = CustomUser.objects.create_user('yard', password='pass', role='inventory_manager')
+        self.client.force_login(user)
+        upload = receiving_sheet(('LMB-001', '5', '', ''))
+        upload.name = 'truck.csv'
+
+        page = self.client.get(reverse('inventory_management:stock_in'))
+        self.assertContains(page, 'name="supplier_id"')
+        self.assertContains(page, 'Sierra Lumber')
+
+        response = self.client.post(reverse('inventory_management:stock_in_import'), {'file': upload, 'dry_run': '1'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('Nothing was received', response.json()['message'])
+        self.assertNotIn('Received', response.json()['message'])
+
+        upload.seek(0)
+        response = self.client.post(reverse('inventory_management:stock_in_import'),
+                                    {'file': upload, 'supplier_id': 'abc'})
+        self.assertEqual(response.status_code, 400)
+
+
+class StockSeriesApiTests(TestCase):
+    """GET /api/stock-transactions/stock_series/"""
+
+    URL = '/api/stock-transactions/stock_series/'
+
+    def setUp(self):
+        self.product = make_product(pieces=None)
+        self.client = APIClient()
+        self.client.force_authenticate(CustomUser.objects.create_user('clerk', password='pass'))
+
+    def test_series_ends_at_the_current_balance(self):
+        InventoryService.stock_in(self.product.id, 30, reference_id='PO-1')
+        InventoryService.stock_out(self.product.id, 4, reference_id='SO-1')
+
+        response = self.client.get(self.URL, {'product_id': self.product.id, 'granularity': 'week'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['points'][-1]['quantity_pieces'], 26)
+
+    def test_unknown_or_inactive_product_is_not_found(self):
+        inactive = make_product('LMB-002', is_active=False)
+        for product_id in (self.product.id + 100, inactive.id):
+            response = self.client.get(self.URL, {'product_id': product_id})
+            self.assertEqual(response.status_code, 404)
+
+    def test_bad_parameters_are_rejected(self):
+        for params in ({}, {'product_id': 'abc'}, {'product_id': self.product.id, 'granularity': 'hour'},
+                       {'product_id': self.product.id, 'start': '2026-02-01', 'end': '2026-01-01'}):
+            self.assertEqual(self.client.get(self.URL, params).status_code, 400)
+
+
+class ProductSearchTests(TestCase):
+    """ProductSearchIndex ranking and the product search endpoint"""
+
+    def setUp(self):
+        self.mahogany = make_product('LMB-101', name='Mahogany Plank', category_name='Hardwood')
+        self.oak = make_product('LMB-102', name='Oak Board', category_name='Hardwood')
+        self.cloak = make_product('LMB-103', name='Cloak Rail', thickness='1', width='6', length='10')
+        self.index = ProductSearchIndex()
+
+    def test_prefix_dimension_and_sku_matches(self):
+        self.assertEqual(self.index.search('maho'), [self.mahogany.id])
+        self.assertEqual(self.index.search('lmb-102'), [self.oak.id])
+        self.assertEqual(self.index.search('1x6x10'), [self.cloak.id])
+        self.assertEqual(self.index.search('hardwood oak'), [self.oak.id])
+
+    def test_substring_matches_still_find_products(self):
+        self.assertEqual(self.index.search('hogany'), [self.mahogany.id])
+        self.assertEqual(self.index.search('hogany plank'), [self.mahogany.id])
+        self.assertEqual(self.index.search('zzz'), [])
+
+    def test_prefix_matches_rank_before_substring_matches(self):
+        self.assertEqual(self.index.search('oak'), [self.oak.id, self.cloak.id])
+        # A full page of prefix matches skips the substring scan
+        self.assertEqual(self.index.search('oak', limit=1), [self.oak.id])
+
+    def test_inactive_products_are_not_indexed(self):
+        make_product('LMB-104', name='Mahogany Offcut', is_active=False)
+        self.assertEqual(self.index.search('mahogany'), [self.mahogany.id])
+
+    def test_endpoint_takes_a_limit(self):
+        product_index.invalidate()
+        url = '/api/products/search/'
+
+        self.assertEqual([p['id'] for p in self.client.get(url, {'q': 'hardwood'}).json()],
+                         [self.mahogany.id, self.oak.id])
+        self.assertEqual(len(self.client.get(url, {'q': 'hardwood', 'limit': 1}).json()), 1)
+        self.assertEqual(self.client.get(url, {'q': 'hogany'}).json()[0]['id'], self.mahogany.id)
+        for params in ({'q': 'o'}, {'q': 'oak', 'limit': 'x'}, {'q': 'oak', 'limit': 0}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
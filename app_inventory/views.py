@@ -10,7 +10,7 @@ from django.shortcuts import render
 from django.views.decorators.cache import cache_page
 from django.utils.decorators import method_decorator
 from django.core.cache import cache
-from datetime import timedelta
+from datetime import datetime, timedelta
 from django.db import transaction as db_transaction
 from app_inventory.models import LumberCategory, LumberProduct, Inventory, StockTransaction
 from app_inventory.serializers import (
@@ -19,6 +19,7 @@ from app_inventory.serializers import (
 )
 from app_inventory.services import InventoryService
 from app_inventory.reporting import InventoryReports
+from app_inventory.search import product_index
 
 
 class ProductPagination(PageNumberPagination):
@@ -43,6 +44,9 @@ class LumberProductViewSet(viewsets.ModelViewSet):
     pagination_class = ProductPagination
     parser_classes = [MultiPartParser, FormParser, JSONParser]
     
+    SEARCH_DEFAULT_LIMIT = 50
+    SEARCH_MAX_LIMIT = 500
+    
     def get_queryset(self):
         """Cache the queryset for better performance"""
         return super().get_queryset()
@@ -196,15 +200,25 @@ class LumberProductViewSet(viewsets.ModelViewSet):
     
     @action(detail=False, methods=['get'])
     def search(self, request):
-        """Search products by name or SKU"""
+        """
+        Search products by name, SKU, category or dimensions (e.g. 2x4x8)
+        
+        Query params: q (at least 2 characters), limit (default 50, max 500)
+        """
         query = request.query_params.get('q', '')
         if len(query) < 2:
             return Response({'error': 'Query must be at least 2 characters'}, status=status.HTTP_400_BAD_REQUEST)
-        
-        products = LumberProduct.objects.filter(
-            Q(name__icontains=query) | Q(sku__icontains=query),
-            is_active=True
-        )
+        try:
+            limit = int(request.query_params.get('limit', self.SEARCH_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({'error': 'limit must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if limit < 1:
+            return Response({'error': 'limit must be at least 1'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        # Ranked IDs from the in-memory index, then one primary-key lookup
+        product_ids = product_index.search(query, limit=min(limit, self.SEARCH_MAX_LIMIT))
+        found = self.get_queryset().in_bulk(product_ids)
+        products = [found[product_id] for product_id in product_ids if product_id in found]
         serializer = self.get_serializer(products, many=True)
         return Response(serializer.data)
     
@@ -505,6 +519,44 @@ class StockTransactionViewSet(viewsets.ModelViewSet):
         transactions = StockTransaction.objects.filter(transaction_type=tx_type)
         serializer = self.get_serializer(transactions, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def stock_series(self, request):
+        """
+        Stock level of a product over time
+        
+        Query params: product_id (required), start and end (YYYY-MM-DD,
+        default: last 90 days), granularity (day, week or month)
+        """
+        product_id = request.query_params.get('product_id')
+        if not product_id:
+            return Response({'error': 'product_id parameter required'}, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            product_id = int(product_id)
+        except ValueError:
+            return Response({'error': 'product_id must be an integer'}, status=status.HTTP_400_BAD_REQUEST)
+        if not LumberProduct.objects.filter(id=product_id, is_active=True).exists():
+            return Response({'error': 'Product not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        try:
+            end_date = (
+                datetime.strptime(request.query_params['end'], '%Y-%m-%d').date()
+                if request.query_params.get('end') else timezone.localdate()
+            )
+            start_date = (
+                datetime.strptime(request.query_params['start'], '%Y-%m-%d').date()
+                if request.query_params.get('start') else end_date - timedelta(days=89)
+            )
+            report = InventoryReports.stock_level_series(
+                product_id,
+                start_date,
+                end_date,
+                granularity=request.query_params.get('granularity', 'day')
+            )
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        return Response(report)
 
 
 class AdjustmentViewSet(viewsets.ViewSet):
@@ -591,7 +643,7 @@ class InventoryReportViewSet(viewsets.ViewSet):
     def wastage(self, request):
         """Get wastage report"""
         days = int(request.query_params.get('days', 30))
-        start_date = timezone.now() - timedelta(days=days)
+        start_date = timezone.localdate() - timedelta(days=days)
         
         report = InventoryReports.wastage_report(start_date=start_date)
         return Response(report)
@@ -1,4 +1,4 @@
-from django.db import models
+from django.db import models, transaction
 from django.core.validators import MinValueValidator
 from django.utils import timezone
 from decimal import Decimal
@@ -139,15 +139,17 @@ class RoundWoodPurchaseOrder(models.Model):
     
     def save(self, *args, **kwargs):
         """Auto-generate PO number if not provided"""
-        if not self.po_number:
-            from datetime import datetime
-            year = datetime.now().year
-            count = RoundWoodPurchaseOrder.objects.filter(
-                created_at__year=year
-            ).count()
-            self.po_number = f"RWPO-{year}-{count + 1:04d}"
-        
-        super().save(*args, **kwargs)
+        # One transaction, so a failed insert releases the allocated number
+        with transaction.atomic():
+            if not self.po_number:
+                from datetime import datetime
+                from core.services import DocumentSequenceService
+                year = datetime.now().year
+                self.po_number = DocumentSequenceService.next_number(
+                    f"RWPO-{year}-", model=RoundWoodPurchaseOrder, field='po_number'
+                )
+            
+            super().save(*args, **kwargs)
     
     class Meta:
         ordering = ['-created_at']
@@ -7,6 +7,7 @@ from app_sales.notification_models import OrderNotification, OrderConfirmation
 class CustomerAdmin(admin.ModelAdmin):
     list_display = ('name', 'phone_number', 'email', 'created_at')
     search_fields = ('name', 'phone_number', 'email')
+    raw_id_fields = ('user',)
 
 
 @admin.register(SalesOrder)
@@ -34,6 +35,9 @@ class ShoppingCartAdmin(admin.ModelAdmin):
     search_fields = ('user__username', 'user__email')
     readonly_fields = ('created_at', 'updated_at')
     
+    def get_queryset(self, request):
+        return super().get_queryset(request).prefetch_related('items')
+    
     def get_item_count(self, obj):
         return obj.get_item_count()
     get_item_count.short_description = 'Items'
@@ -4,3 +4,8 @@ from django.apps import AppConfig
 class AppSalesConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "app_sales"
+
+    def ready(self):
+        import app_sales.signals
+        # Builds receipt styles and printer templates once per process
+        import app_sales.receipts
@@ -9,6 +9,7 @@ from decimal import Decimal
 from app_sales.models import ShoppingCart, CartItem
 from app_sales.serializers import ShoppingCartSerializer, CartItemSerializer
 from app_inventory.models import LumberProduct
+from app_inventory.reservations import StockReservationService
 
 
 class ShoppingCartViewSet(viewsets.ViewSet):
@@ -18,7 +19,9 @@ class ShoppingCartViewSet(viewsets.ViewSet):
     @action(detail=False, methods=['get'])
     def my_cart(self, request):
         """Get current user's shopping cart"""
-        cart, created = ShoppingCart.objects.get_or_create(user=request.user)
+        cart, created = ShoppingCart.with_items().get_or_create(user=request.user)
+        # Viewing the cart keeps its stock holds alive
+        StockReservationService.renew_cart_items([item.id for item in cart.items.all()])
         serializer = ShoppingCartSerializer(cart)
         return Response(serializer.data)
     
@@ -48,45 +51,49 @@ class ShoppingCartViewSet(viewsets.ViewSet):
             )
         
         try:
-            product = LumberProduct.objects.get(id=product_id, is_active=True)
+            product = LumberProduct.objects.select_related('inventory').get(id=product_id, is_active=True)
         except LumberProduct.DoesNotExist:
             return Response(
                 {'error': 'Product not found'},
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        # Check inventory
+        # Check available (unreserved) inventory
         inventory = getattr(product, 'inventory', None)
-        if not inventory or inventory.quantity_pieces < quantity:
-            available = inventory.quantity_pieces if inventory else 0
+        if not inventory or inventory.available_pieces < quantity:
+            available = inventory.available_pieces if inventory else 0
             return Response(
                 {'error': f'Insufficient stock. Available: {available}'},
                 status=status.HTTP_400_BAD_REQUEST
             )
         
-        with transaction.atomic():
-            cart, created = ShoppingCart.objects.get_or_create(user=request.user)
-            
-            # Add or update cart item
-            cart_item, created = CartItem.objects.get_or_create(
-                cart=cart,
-                product=product,
-                defaults={'quantity': quantity}
-            )
-            
-            if not created:
-                # If item already exists, add to quantity
-                cart_item.quantity += quantity
+        try:
+            with transaction.atomic():
+                cart, created = ShoppingCart.objects.get_or_create(user=request.user)
+                
+                # Add or update cart item
+                cart_item, created = CartItem.objects.get_or_create(
+                    cart=cart,
+                    product=product,
+                    defaults={'quantity': quantity}
+                )
                 
-                # Check if total quantity exceeds stock
-                if inventory.quantity_pieces < cart_item.quantity:
-                    return Response(
-                        {'error': f'Cannot add {quantity} more. Only {inventory.quantity_pieces - (cart_item.quantity - quantity)} available'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-                cart_item.save()
+                if not created:
+                    # If item already exists, add to quantity
+                    cart_item.quantity += quantity
+                    cart_item.save()
+                
+                # Hold the stock; rolls the item back if it was taken meanwhile
+                StockReservationService.hold_cart_item(cart_item)
+        except ValidationError as e:
+            if created:
+                return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
+            return Response(
+                {'error': f'Cannot add {quantity} more. {e.messages[0]}'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
         
-        cart.refresh_from_db()
+        cart = ShoppingCart.with_items().get(id=cart.id)
         serializer = ShoppingCartSerializer(cart)
         return Response(serializer.data, status=status.HTTP_201_CREATED)
     
@@ -117,7 +124,7 @@ class ShoppingCartViewSet(viewsets.ViewSet):
         
         try:
             cart = ShoppingCart.objects.get(user=request.user)
-            item = CartItem.objects.get(id=item_id, cart=cart)
+            item = CartItem.objects.select_related('product__inventory').get(id=item_id, cart=cart)
         except (ShoppingCart.DoesNotExist, CartItem.DoesNotExist):
             return Response(
                 {'error': 'Cart item not found'},
@@ -126,21 +133,19 @@ class ShoppingCartViewSet(viewsets.ViewSet):
         
         # If quantity is 0, delete the item
         if quantity == 0:
+            StockReservationService.release_cart_items([item.id])
             item.delete()
         else:
-            # Check inventory
-            inventory = getattr(item.product, 'inventory', None)
-            if not inventory or inventory.quantity_pieces < quantity:
-                available = inventory.quantity_pieces if inventory else 0
-                return Response(
-                    {'error': f'Insufficient stock. Available: {available}'},
-                    status=status.HTTP_400_BAD_REQUEST
-                )
-            
-            item.quantity = quantity
-            item.save()
+            # Resize the stock hold; only the extra pieces need to be free
+            try:
+                with transaction.atomic():
+                    item.quantity = quantity
+                    item.save()
+                    StockReservationService.hold_cart_item(item)
+            except ValidationError as e:
+                return Response({'error': e.messages[0]}, status=status.HTTP_400_BAD_REQUEST)
         
-        cart.refresh_from_db()
+        cart = ShoppingCart.with_items().get(id=cart.id)
         serializer = ShoppingCartSerializer(cart)
         return Response(serializer.data)
     
@@ -158,6 +163,7 @@ class ShoppingCartViewSet(viewsets.ViewSet):
         try:
             cart = ShoppingCart.objects.get(user=request.user)
             item = CartItem.objects.get(id=item_id, cart=cart)
+            StockReservationService.release_cart_items([item.id])
             item.delete()
         except (ShoppingCart.DoesNotExist, CartItem.DoesNotExist):
             return Response(
@@ -165,7 +171,7 @@ class ShoppingCartViewSet(viewsets.ViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
         
-        cart.refresh_from_db()
+        cart = ShoppingCart.with_items().get(id=cart.id)
         serializer = ShoppingCartSerializer(cart)
         return Response(serializer.data)
     
@@ -178,7 +184,7 @@ class ShoppingCartViewSet(viewsets.ViewSet):
         except ShoppingCart.DoesNotExist:
             pass
         
-        cart, created = ShoppingCart.objects.get_or_create(user=request.user)
+        cart, created = ShoppingCart.with_items().get_or_create(user=request.user)
         serializer = ShoppingCartSerializer(cart)
         return Response(serializer.data)
     
@@ -186,10 +192,10 @@ class ShoppingCartViewSet(viewsets.ViewSet):
     def checkout(self, request):
         """Create a sales order from cart or update existing order if editing"""
         from app_sales.models import Customer, SalesOrder, SalesOrderItem
-        from app_sales.services import SalesService
+        from app_sales.services import SalesService, CustomerService
         
         try:
-            cart = ShoppingCart.objects.get(user=request.user)
+            cart = ShoppingCart.with_items().get(user=request.user)
         except ShoppingCart.DoesNotExist:
             return Response(
                 {'error': 'Cart not found'},
@@ -236,7 +242,7 @@ class ShoppingCartViewSet(viewsets.ViewSet):
                         quantity_pieces = cart_item.quantity
                         
                         # Calculate using product's method (same as create_sales_order)
-                        board_feet = Decimal(str(product.calculate_board_feet(quantity_pieces)))
+                        board_feet = product.board_feet_for(quantity_pieces)
                         unit_price = product.price_per_board_foot
                         subtotal = board_feet * unit_price
                         
@@ -277,26 +283,33 @@ class ShoppingCartViewSet(viewsets.ViewSet):
                 )
         
         # CREATE new order (original logic)
-        # Get or create customer from user email
+        # Use the customer linked to this account, creating one on first checkout
+        customer = CustomerService.get_for_request(request)
         customer_email = request.user.email if request.user.email else None
         
-        if customer_email:
+        if customer is None and customer_email:
             customer, created = Customer.objects.get_or_create(
                 email=customer_email,
                 defaults={
                     'name': request.user.get_full_name() or request.user.username,
                     'phone_number': getattr(request.user, 'phone_number', ''),
+                    'user': request.user,
                 }
             )
-        else:
+        elif customer is None:
             # If no email, create without using email as lookup
             customer, created = Customer.objects.get_or_create(
                 name=request.user.get_full_name() or request.user.username,
                 defaults={
                     'email': '',
                     'phone_number': getattr(request.user, 'phone_number', ''),
+                    'user': request.user,
                 }
             )
+        if customer.user_id is None:
+            CustomerService.link_user(customer, request.user)
+        if customer.user_id == request.user.pk:
+            CustomerService.remember(request, customer)
         
         # Prepare items for sales order
         items = []
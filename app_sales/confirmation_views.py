@@ -8,8 +8,8 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.core.exceptions import ValidationError
 from app_sales.notification_models import OrderNotification, OrderConfirmation
-from app_sales.models import SalesOrder, Customer
-from app_sales.services import OrderConfirmationService
+from app_sales.models import SalesOrder
+from app_sales.services import OrderConfirmationService, CustomerService
 from django.shortcuts import get_object_or_404
 
 
@@ -118,13 +118,37 @@ class OrderConfirmationViewSet(viewsets.ModelViewSet):
         except Exception as e:
             return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
     
+    @action(detail=False, methods=['get'])
+    def validate_stock(self, request):
+        """
+        Validate stock for every order in the confirmation queue
+        
+        Query params:
+        - status: Comma-separated confirmation statuses (default: created)
+        - ids: Comma-separated confirmation IDs (optional)
+        """
+        statuses = [value for value in request.query_params.get('status', 'created').split(',') if value]
+        ids = request.query_params.get('ids')
+        try:
+            confirmation_ids = [int(value) for value in ids.split(',') if value] if ids else None
+        except ValueError:
+            return Response({'error': 'ids must be comma-separated integers'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        orders = OrderConfirmationService.validate_queue_stock(
+            statuses=statuses,
+            confirmation_ids=confirmation_ids
+        )
+        return Response({
+            'orders': orders,
+            'count': len(orders),
+            'all_valid': all(order['all_valid'] for order in orders)
+        })
+    
     @action(detail=False, methods=['get'])
     def pending_pickups(self, request):
         """Get all pending pickups for authenticated customer"""
         try:
-            customer = Customer.objects.filter(
-                email=request.user.email
-            ).first()
+            customer = CustomerService.get_for_request(request)
             
             if not customer:
                 return Response({
@@ -167,9 +191,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def my_notifications(self, request):
         """Get notifications for authenticated customer"""
         try:
-            customer = Customer.objects.filter(
-                email=request.user.email
-            ).first()
+            customer = CustomerService.get_for_request(request)
             
             if not customer:
                 return Response({
@@ -229,9 +251,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def mark_all_as_read(self, request):
         """Mark all notifications as read for customer"""
         try:
-            customer = Customer.objects.filter(
-                email=request.user.email
-            ).first()
+            customer = CustomerService.get_for_request(request)
             
             if not customer:
                 return Response({
@@ -258,9 +278,7 @@ class NotificationViewSet(viewsets.ModelViewSet):
     def unread_count(self, request):
         """Get count of unread notifications for customer"""
         try:
-            customer = Customer.objects.filter(
-                email=request.user.email
-            ).first()
+            customer = CustomerService.get_for_request(request)
             
             if not customer:
                 return Response({'unread_count': 0})
@@ -3,111 +3,98 @@ Context processor for order notifications.
 Adds pending notifications and order confirmations to all templates.
 """
 
-from app_sales.notification_models import OrderNotification, OrderConfirmation
-from app_sales.models import Customer as SalesCustomer
-from django.db.models import Q
 from django.utils import timezone
+from django.utils.functional import SimpleLazyObject, cached_property
+from app_sales.notification_models import OrderNotification, OrderConfirmation, NOTIFICATION_ALERT_TYPES
+from app_sales.services import CustomerService, OrderConfirmationService
 
 
-def order_notifications(request):
+class OrderNotificationContext:
     """
-    Add order notifications to template context.
-    Only processes authenticated users who are customers.
-    
-    Available in templates as:
-    - notifications: Unread notifications with details
-    - notification_count: Count of unread notifications
-    - pending_orders: Orders ready for pickup
-    - pending_orders_count: Count of orders ready for pickup
-    - ready_pickups: Orders ready for pickup with payment status
-    - ready_pickups_count: Count of orders ready for pickup
-    - payment_pending_orders: Orders with payment pending
-    - payment_pending_count: Count of orders with payment pending
-    - has_ready_pickup_notifications: Boolean if customer has orders ready
+    Notification data for one request, computed on first use
+
+    Counts come from OrderConfirmationService's cached summary; the
+    notification and order lists are only queried when a template renders
+    them.
     """
-    context = {
-        'notifications': [],
-        'notification_count': 0,
-        'notification_alerts': {
-            'ready_for_pickup': 0,
-            'payment_completed': 0,
-            'payment_pending': 0,
-            'order_confirmed': 0,
-        },
-        'pending_orders': [],
-        'pending_orders_count': 0,
-        'ready_pickups': [],
-        'ready_pickups_count': 0,
-        'payment_pending_orders': [],
-        'payment_pending_count': 0,
-        'has_ready_pickup_notifications': False,
-        'has_payment_notifications': False,
-    }
-    
-    # Only process authenticated users
-    if not request.user.is_authenticated:
-        return context
 
-    # Admin/Staff Notifications
-    if request.user.is_staff or getattr(request.user, 'role', '') in ['admin', 'sales_staff', 'inventory_manager']:
+    def __init__(self, request):
+        self.request = request
+
+    @cached_property
+    def customer_id(self):
+        user = self.request.user
+        if not user.is_authenticated:
+            return None
+        return CustomerService.get_customer_id(self.request)
+
+    @cached_property
+    def counts(self):
+        if not self.customer_id:
+            return None
+        return OrderConfirmationService.get_notification_counts(self.customer_id)
+
+    def count(self, name):
+        return self.counts[name] if self.counts else 0
+
+    @cached_property
+    def is_staff(self):
+        user = self.request.user
+        return user.is_authenticated and (
+            user.is_staff or getattr(user, 'role', '') in ['admin', 'sales_staff', 'inventory_manager']
+        )
+
+    @cached_property
+    def admin_incoming_count(self):
+        if not self.is_staff:
+            return 0
         try:
-            # Count incoming orders (OrderConfirmation with status='created')
-            incoming_count = OrderConfirmation.objects.filter(status='created').count()
-            context['admin_incoming_count'] = incoming_count
+            return OrderConfirmationService.get_incoming_count()
         except Exception:
-            pass
-    
-    # Customer Notifications logic
-    try:
-        sales_customer = SalesCustomer.objects.filter(
-            email=request.user.email
-        ).first()
-        
-        if not sales_customer:
-            return context
-        
-        # Get unread notifications for customer
+            return 0
+
+    @cached_property
+    def notification_alerts(self):
+        return {notification_type: self.count(notification_type) for notification_type in NOTIFICATION_ALERT_TYPES}
+
+    @cached_property
+    def notifications(self):
+        if not self.count('notification_count'):
+            return []
         notifications = OrderNotification.objects.filter(
-            customer=sales_customer,
+            customer_id=self.customer_id,
             is_read=False
         ).select_related('sales_order').order_by('-created_at')
-        
-        # Build notification list with details
-        notification_list = []
-        for notif in notifications[:20]:  # Limit to 20 most recent
-            notification_list.append({
-                'id': notif.id,
-                'type': notif.notification_type,
-                'title': notif.title,
-                'message': notif.message,
-                'order_number': notif.sales_order.so_number if notif.sales_order else None,
-                'created_at': notif.created_at,
-                'is_read': notif.is_read,
-            })
-            # Count by type
-            if notif.notification_type in context['notification_alerts']:
-                context['notification_alerts'][notif.notification_type] += 1
-        
-        context['notifications'] = notification_list
-        context['notification_count'] = notifications.count()
-        
-        # Get orders ready for pickup
-        ready_orders = OrderConfirmation.objects.filter(
-            customer=sales_customer,
+
+        return [{
+            'id': notif.id,
+            'type': notif.notification_type,
+            'title': notif.title,
+            'message': notif.message,
+            'order_number': notif.sales_order.so_number if notif.sales_order else None,
+            'created_at': notif.created_at,
+            'is_read': notif.is_read,
+        } for notif in notifications[:20]]  # Limit to 20 most recent
+
+    @cached_property
+    def pending_orders(self):
+        """Orders ready for pickup"""
+        if not self.count('ready_pickups_count'):
+            return OrderConfirmation.objects.none()
+        return OrderConfirmation.objects.filter(
+            customer_id=self.customer_id,
             status='ready_for_pickup'
         ).select_related('sales_order').order_by('-ready_at')
-        
-        context['pending_orders'] = ready_orders
-        context['pending_orders_count'] = ready_orders.count()
-        context['has_ready_pickup_notifications'] = ready_orders.exists()
-        
-        # Get detailed ready pickups with payment info
+
+    @cached_property
+    def ready_pickups(self):
+        """Detailed ready pickups with payment info"""
         ready_pickups = []
-        for confirmation in ready_orders[:5]:  # Limit to 5
+        for confirmation in self.pending_orders[:5]:  # Limit to 5
             so = confirmation.sales_order
             days_ready = (timezone.now() - confirmation.ready_at).days if confirmation.ready_at else 0
-            
-            pickup_data = {
+
+            ready_pickups.append({
                 'id': confirmation.id,
                 'order_number': so.so_number,
                 'total_amount': float(so.total_amount),
@@ -120,37 +107,72 @@ def order_notifications(request):
                 'days_ready': days_ready,
                 'confirmation': confirmation,
                 'payment_status': 'PAID' if confirmation.is_payment_complete else f'DUE: ₱{so.balance:.2f}',
-            }
-            ready_pickups.append(pickup_data)
-        
-        context['ready_pickups'] = ready_pickups
-        context['ready_pickups_count'] = len(ready_pickups)
-        
-        # Get orders with payment pending
+            })
+        return ready_pickups
+
+    @cached_property
+    def payment_pending_orders(self):
+        """Orders with payment pending"""
+        if not self.count('payment_pending_count'):
+            return []
         payment_pending = OrderConfirmation.objects.filter(
-            customer=sales_customer,
+            customer_id=self.customer_id,
             status__in=['confirmed', 'ready_for_pickup'],
             is_payment_complete=False
         ).select_related('sales_order').order_by('-created_at')
-        
-        payment_pending_list = []
-        for confirmation in payment_pending[:5]:  # Limit to 5
-            so = confirmation.sales_order
-            payment_pending_list.append({
-                'id': confirmation.id,
-                'order_number': so.so_number,
-                'total_amount': float(so.total_amount),
-                'balance_due': float(so.balance),
-                'status': confirmation.get_status_display(),
-                'confirmation': confirmation,
-            })
-        
-        context['payment_pending_orders'] = payment_pending_list
-        context['payment_pending_count'] = payment_pending.count()
-        context['has_payment_notifications'] = payment_pending.exists()
-        
-    except Exception as e:
+
+        return [{
+            'id': confirmation.id,
+            'order_number': confirmation.sales_order.so_number,
+            'total_amount': float(confirmation.sales_order.total_amount),
+            'balance_due': float(confirmation.sales_order.balance),
+            'status': confirmation.get_status_display(),
+            'confirmation': confirmation,
+        } for confirmation in payment_pending[:5]]  # Limit to 5
+
+
+def order_notifications(request):
+    """
+    Add order notifications to template context.
+    Only processes authenticated users who are customers.
+
+    Every value is lazy: nothing is queried unless the template uses it,
+    and the counts are served from cache.
+
+    Available in templates as:
+    - notifications: Unread notifications with details
+    - notification_count: Count of unread notifications
+    - pending_orders: Orders ready for pickup
+    - pending_orders_count: Count of orders ready for pickup
+    - ready_pickups: Orders ready for pickup with payment status
+    - ready_pickups_count: Count of orders ready for pickup
+    - payment_pending_orders: Orders with payment pending
+    - payment_pending_count: Count of orders with payment pending
+    - has_ready_pickup_notifications: Boolean if customer has orders ready
+    - admin_incoming_count: Orders awaiting confirmation (staff only)
+    """
+    data = OrderNotificationContext(request)
+
+    def safe(compute, default):
         # Silently fail - don't break template rendering
-        pass
-    
-    return context
+        def evaluate():
+            try:
+                return compute()
+            except Exception:
+                return default
+        return SimpleLazyObject(evaluate)
+
+    return {
+        'notifications': safe(lambda: data.notifications, []),
+        'notification_count': safe(lambda: data.count('notification_count'), 0),
+        'notification_alerts': safe(lambda: data.notification_alerts, dict.fromkeys(NOTIFICATION_ALERT_TYPES, 0)),
+        'pending_orders': safe(lambda: data.pending_orders, []),
+        'pending_orders_count': safe(lambda: data.count('ready_pickups_count'), 0),
+        'ready_pickups': safe(lambda: data.ready_pickups, []),
+        'ready_pickups_count': safe(lambda: min(data.count('ready_pickups_count'), 5), 0),
+        'payment_pending_orders': safe(lambda: data.payment_pending_orders, []),
+        'payment_pending_count': safe(lambda: data.count('payment_pending_count'), 0),
+        'has_ready_pickup_notifications': safe(lambda: data.count('ready_pickups_count') > 0, False),
+        'has_payment_notifications': safe(lambda: data.count('payment_pending_count') > 0, False),
+        'admin_incoming_count': safe(lambda: data.admin_incoming_count, 0),
+    }
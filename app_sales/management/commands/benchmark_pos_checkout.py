@@ -0,0 +1,106 @@
+"""
+Management command to track the query count and latency of POS checkout
+Usage: python manage.py benchmark_pos_checkout [--runs N] [--lines N] [--max-queries N]
+
+Everything runs inside one transaction that is rolled back at the end, so
+the benchmark leaves no orders, stock movements or document numbers behind.
+"""
+import time
+import uuid
+from decimal import Decimal
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+from app_inventory.models import LumberCategory, LumberProduct, Inventory
+from app_sales.models import Customer
+from app_sales.services import SalesService
+
+
+BENCH_SKU_PREFIX = 'BENCH-POS-'
+BENCH_CUSTOMER = 'POS Checkout Benchmark'
+
+
+class Command(BaseCommand):
+    help = 'Compare queries and latency of the legacy POS checkout chain against quick_checkout'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=20, help='Checkouts per pipeline (default: 20)')
+        parser.add_argument('--lines', type=int, default=3, help='Line items per checkout (default: 3)')
+        parser.add_argument(
+            '--max-queries',
+            type=int,
+            help='Fail if quick_checkout needs more queries than this per checkout'
+        )
+
+    def handle(self, *args, **options):
+        runs = options['runs']
+
+        with transaction.atomic():
+            products, customer = self._setup(options['lines'], stock=runs * 4)
+            items = [{'product_id': product.id, 'quantity_pieces': 2} for product in products]
+            results = {
+                'legacy': self._measure(runs, lambda: self._legacy_checkout(customer, items)),
+                'quick_checkout': self._measure(runs, lambda: SalesService.quick_checkout(
+                    customer_id=customer.id, items=items, amount_tendered=Decimal('100000')
+                )),
+            }
+            # Discard the products, orders, ledger rows and consumed SO/RCP numbers
+            transaction.set_rollback(True)
+
+        self.stdout.write(f"{runs} checkouts of {options['lines']} line(s) each")
+        for name, (queries, elapsed) in results.items():
+            self.stdout.write(
+                f"{name:>15}: {queries / runs:6.1f} queries/checkout, {elapsed / runs * 1000:7.2f} ms/checkout"
+            )
+
+        quick_queries = results['quick_checkout'][0] / runs
+        if options['max_queries'] is not None and quick_queries > options['max_queries']:
+            raise CommandError(
+                f"quick_checkout used {quick_queries:.1f} queries per checkout "
+                f"(budget {options['max_queries']})"
+            )
+        self.stdout.write(self.style.SUCCESS('Benchmark complete'))
+
+    def _measure(self, runs, checkout):
+        with CaptureQueriesContext(connection) as captured:
+            started = time.perf_counter()
+            for _ in range(runs):
+                checkout()
+            elapsed = time.perf_counter() - started
+        # Savepoints only exist because of the enclosing benchmark transaction
+        queries = [query for query in captured if 'SAVEPOINT' not in query['sql'].upper()]
+        return len(queries), elapsed
+
+    def _legacy_checkout(self, customer, items):
+        """The step-by-step chain quick_checkout replaces"""
+        so = SalesService.create_sales_order(customer_id=customer.id, items=items)
+        order_total = (so.total_amount - so.discount_amount).quantize(Decimal('0.01'))
+        so, receipt = SalesService.process_payment(sales_order_id=so.id, amount_paid=order_total)
+        confirmation = so.confirmation
+        confirmation.mark_payment_complete()
+        confirmation.mark_ready_for_pickup()
+        confirmation.mark_picked_up()
+
+    def _setup(self, lines, stock):
+        category, _ = LumberCategory.objects.get_or_create(name='Benchmark')
+        run_id = uuid.uuid4().hex[:8]
+        products = []
+        for index in range(lines):
+            product = LumberProduct.objects.create(
+                name=f'POS Benchmark 2x{index + 2}x8',
+                category=category,
+                thickness=Decimal('2'),
+                width=Decimal(index + 2),
+                length=Decimal('8'),
+                price_per_board_foot=Decimal('45.00'),
+                sku=f'{BENCH_SKU_PREFIX}{run_id}-{index + 1}',
+                is_active=False
+            )
+            Inventory.objects.create(
+                product=product,
+                quantity_pieces=stock,
+                total_board_feet=product.board_feet_for(stock)
+            )
+            products.append(product)
+        customer = Customer.objects.create(name=BENCH_CUSTOMER, phone_number='0000000000')
+        return products, customer
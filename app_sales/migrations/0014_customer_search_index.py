@@ -0,0 +1,81 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:27
+
+import re
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+# Frozen copies of app_sales.models.normalize_phone / name_tokens, so later
+# changes to the live helpers cannot change what this migration writes
+def normalize_phone(phone):
+    digits = re.sub(r'\D', '', phone or '')
+    if digits.startswith('63') and len(digits) == 12:
+        digits = '0' + digits[2:]
+    elif digits.startswith('9') and len(digits) == 10:
+        digits = '0' + digits
+    return digits
+
+
+def name_tokens(name):
+    return {token[:50] for token in re.findall(r'\w+', (name or '').lower())}
+
+
+def backfill_customer_index(apps, schema_editor):
+    """Normalize phones, build name tokens and link portal users by email"""
+    Customer = apps.get_model('app_sales', 'Customer')
+    CustomerSearchToken = apps.get_model('app_sales', 'CustomerSearchToken')
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+
+    users_by_email = {}
+    for user_id, email in User.objects.exclude(email='').order_by('id').values_list('id', 'email'):
+        users_by_email.setdefault(email.lower(), user_id)
+
+    customers = list(Customer.objects.all())
+    tokens = []
+    for customer in customers:
+        customer.phone_normalized = normalize_phone(customer.phone_number)
+        if customer.email:
+            # Pop so each account links to one customer only
+            customer.user_id = users_by_email.pop(customer.email.lower(), None)
+        tokens.extend(
+            CustomerSearchToken(customer_id=customer.id, token=token) for token in name_tokens(customer.name)
+        )
+
+    Customer.objects.bulk_update(customers, ['phone_normalized', 'user'], batch_size=500)
+    CustomerSearchToken.objects.bulk_create(tokens, batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_sales', '0013_remove_senior_pwd_discount'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='customer',
+            name='phone_normalized',
+            field=models.CharField(blank=True, db_index=True, editable=False, max_length=20),
+        ),
+        migrations.AddField(
+            model_name='customer',
+            name='user',
+            field=models.OneToOneField(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='sales_customer', to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.CreateModel(
+            name='CustomerSearchToken',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('token', models.CharField(max_length=50)),
+                ('customer', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_tokens', to='app_sales.customer')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['token'], name='app_sales_c_token_285b21_idx')],
+                'unique_together': {('customer', 'token')},
+            },
+        ),
+        migrations.RunPython(backfill_customer_index, migrations.RunPython.noop),
+    ]
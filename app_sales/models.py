@@ -1,7 +1,10 @@
+import re
 from django.db import models
+from django.core.exceptions import ObjectDoesNotExist
 from django.core.validators import MinValueValidator
 from decimal import Decimal
 from app_inventory.models import LumberProduct
+from app_inventory.reservations import StockReservationService
 from django.contrib.auth import get_user_model
 from django.db.models.signals import post_save
 from django.dispatch import receiver
@@ -9,6 +12,26 @@ from django.dispatch import receiver
 User = get_user_model()
 
 
+def normalize_phone(phone):
+    """
+    Reduce a phone number to comparable digits
+    
+    '+63 917 123 4567', '63-917-1234567' and '0917 123 4567' all become
+    '09171234567'.
+    """
+    digits = re.sub(r'\D', '', phone or '')
+    if digits.startswith('63') and len(digits) == 12:
+        digits = '0' + digits[2:]
+    elif digits.startswith('9') and len(digits) == 10:
+        digits = '0' + digits
+    return digits
+
+
+def name_tokens(name):
+    """Lowercase words of a customer name, as stored in CustomerSearchToken"""
+    return {token[:50] for token in re.findall(r'\w+', (name or '').lower())}
+
+
 class Customer(models.Model):
     """Customer information"""
     name = models.CharField(max_length=200)
@@ -16,6 +39,12 @@ class Customer(models.Model):
     phone_number = models.CharField(max_length=20)
     address = models.TextField(blank=True)
     
+    # Indexed lookups: digits-only phone and the portal account
+    phone_normalized = models.CharField(max_length=20, blank=True, db_index=True, editable=False)
+    user = models.OneToOneField(
+        User, on_delete=models.SET_NULL, null=True, blank=True, related_name='sales_customer'
+    )
+    
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
@@ -24,6 +53,32 @@ class Customer(models.Model):
     
     def __str__(self):
         return self.name
+    
+    def save(self, *args, **kwargs):
+        """Keep the normalized phone and name search tokens in step"""
+        self.phone_normalized = normalize_phone(self.phone_number)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and 'phone_number' in update_fields:
+            kwargs['update_fields'] = set(update_fields) | {'phone_normalized'}
+        super().save(*args, **kwargs)
+        if update_fields is None or 'name' in update_fields:
+            self.search_tokens.all().delete()
+            CustomerSearchToken.objects.bulk_create([
+                CustomerSearchToken(customer=self, token=token) for token in name_tokens(self.name)
+            ])
+
+
+class CustomerSearchToken(models.Model):
+    """One word of a customer name, for indexed prefix search"""
+    customer = models.ForeignKey(Customer, on_delete=models.CASCADE, related_name='search_tokens')
+    token = models.CharField(max_length=50)
+    
+    class Meta:
+        unique_together = ('customer', 'token')
+        indexes = [models.Index(fields=['token'])]
+    
+    def __str__(self):
+        return f"{self.token} -> {self.customer_id}"
 
 
 class SalesOrder(models.Model):
@@ -131,6 +186,21 @@ class ShoppingCart(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
     
+    @classmethod
+    def with_items(cls):
+        """
+        Carts with items, products and inventory loaded in one extra query
+        
+        The totals below and ShoppingCartSerializer read the prefetched
+        items, so a cart serializes in a constant number of queries.
+        """
+        return cls.objects.prefetch_related(
+            models.Prefetch(
+                'items',
+                queryset=CartItem.objects.select_related('product__inventory', 'reservation').order_by('id')
+            )
+        )
+    
     def get_total(self):
         """Get total price of all items in cart"""
         return sum(item.get_subtotal() for item in self.items.all())
@@ -144,7 +214,8 @@ class ShoppingCart(models.Model):
         return self.items.count()
     
     def clear(self):
-        """Clear all items from cart"""
+        """Clear all items from cart and release their stock holds"""
+        StockReservationService.release_cart_items(list(self.items.values_list('id', flat=True)))
         self.items.all().delete()
     
     def __str__(self):
@@ -165,18 +236,31 @@ class CartItem(models.Model):
     
     def get_price(self):
         """Get unit price of product"""
-        return self.product.price_per_piece or (self.product.price_per_board_foot * self.product.board_feet)
+        return self.product.price_per_piece or (
+            self.product.price_per_board_foot * self.product.board_feet_per_piece
+        ).quantize(Decimal('0.01'))
     
     def get_subtotal(self):
         """Get subtotal for this item"""
         return Decimal(str(self.quantity)) * self.get_price()
     
-    def is_in_stock(self):
-        """Check if product has enough inventory"""
+    def get_held_pieces(self):
+        """Pieces held for this item by its stock reservation"""
+        try:
+            return self.reservation.quantity_pieces
+        except ObjectDoesNotExist:
+            return 0
+    
+    def get_available_quantity(self):
+        """Pieces this item can have: free stock plus what it already holds"""
         inventory = getattr(self.product, 'inventory', None)
         if not inventory:
-            return False
-        return inventory.quantity_pieces >= self.quantity
+            return 0
+        return inventory.available_pieces + self.get_held_pieces()
+    
+    def is_in_stock(self):
+        """Check if product has enough inventory"""
+        return self.get_available_quantity() >= self.quantity
     
     def __str__(self):
         return f"{self.product.name} x {self.quantity}"
@@ -4,6 +4,9 @@ from django.contrib.auth import get_user_model
 
 User = get_user_model()
 
+# Notification types counted separately in the notification badge
+NOTIFICATION_ALERT_TYPES = ('ready_for_pickup', 'payment_completed', 'payment_pending', 'order_confirmed')
+
 
 class OrderNotification(models.Model):
     """Track notifications for sales orders - ready for pickup, payment status, etc"""
@@ -5,18 +5,15 @@ from django.shortcuts import render, redirect, get_object_or_404
 from django.contrib.auth.decorators import login_required
 from django.http import JsonResponse
 from django.views.decorators.http import require_POST
-from app_sales.models import Customer as SalesCustomer
 from app_sales.notification_models import OrderNotification, OrderConfirmation
-from app_sales.services import OrderConfirmationService
+from app_sales.services import OrderConfirmationService, CustomerService
 
 
 @login_required
 def customer_notifications(request):
     """Display all notifications for authenticated customer"""
     try:
-        customer = SalesCustomer.objects.filter(
-            email=request.user.email
-        ).first()
+        customer = CustomerService.get_for_request(request)
         
         if not customer:
             notifications = []
@@ -42,9 +39,7 @@ def customer_notifications(request):
 def customer_ready_orders(request):
     """Display orders ready for pickup"""
     try:
-        customer = SalesCustomer.objects.filter(
-            email=request.user.email
-        ).first()
+        customer = CustomerService.get_for_request(request)
         
         if not customer:
             ready_orders = []
@@ -76,9 +71,7 @@ def customer_ready_orders(request):
 def customer_dashboard(request):
     """Customer dashboard with order summary"""
     try:
-        customer = SalesCustomer.objects.filter(
-            email=request.user.email
-        ).first()
+        customer = CustomerService.get_for_request(request)
         
         if not customer:
             context = {
@@ -131,7 +124,7 @@ def mark_notification_read(request, notification_id):
         notification = OrderNotification.objects.get(id=notification_id)
         
         # Verify customer owns this notification
-        customer = SalesCustomer.objects.filter(email=request.user.email).first()
+        customer = CustomerService.get_for_request(request)
         if not customer or notification.customer != customer:
             return JsonResponse({'error': 'Unauthorized'}, status=403)
         
@@ -151,7 +144,7 @@ def mark_notification_read(request, notification_id):
 def mark_all_notifications_read(request):
     """Mark all notifications as read for customer"""
     try:
-        customer = SalesCustomer.objects.filter(email=request.user.email).first()
+        customer = CustomerService.get_for_request(request)
         
         if not customer:
             return JsonResponse({'count': 0})
@@ -183,7 +176,7 @@ def order_confirmation_detail(request, confirmation_id):
         ).get(id=confirmation_id)
         
         # Verify customer owns this order
-        customer = SalesCustomer.objects.filter(email=request.user.email).first()
+        customer = CustomerService.get_for_request(request)
         if not customer or confirmation.customer != customer:
             return redirect('customer-dashboard')
         
@@ -212,7 +205,7 @@ def confirm_order_pickup(request, confirmation_id):
         confirmation = OrderConfirmation.objects.get(id=confirmation_id)
         
         # Verify customer owns this order
-        customer = SalesCustomer.objects.filter(email=request.user.email).first()
+        customer = CustomerService.get_for_request(request)
         if not customer or confirmation.customer != customer:
             return JsonResponse({'error': 'Unauthorized'}, status=403)
         
@@ -243,21 +236,16 @@ def notification_badge_count(request):
         return JsonResponse({'count': 0})
     
     try:
-        customer = SalesCustomer.objects.filter(
-            email=request.user.email
-        ).first()
+        customer_id = CustomerService.get_customer_id(request)
         
-        if not customer:
+        if not customer_id:
             return JsonResponse({'count': 0})
         
-        count = OrderNotification.objects.filter(
-            customer=customer,
-            is_read=False
-        ).count()
+        counts = OrderConfirmationService.get_notification_counts(customer_id)
         
         return JsonResponse({
-            'count': count,
-            'customer_id': customer.id
+            'count': counts['notification_count'],
+            'customer_id': customer_id
         })
     except Exception as e:
         return JsonResponse({'count': 0, 'error': str(e)})
@@ -9,10 +9,11 @@ from django.db.models import Sum, Count
 from django.utils import timezone
 from datetime import timedelta
 from decimal import Decimal
-from app_sales.models import Customer, SalesOrder, SalesOrderItem, Receipt
+from app_sales.models import SalesOrder, SalesOrderItem, Receipt
 from app_sales.serializers import CustomerSerializer, SalesOrderSerializer, ReceiptSerializer
-from app_sales.services import SalesService
+from app_sales.services import SalesService, CustomerService
 from app_inventory.models import LumberProduct
+from app_inventory.search import product_index
 
 
 class POSViewSet(viewsets.ViewSet):
@@ -24,6 +25,9 @@ class POSViewSet(viewsets.ViewSet):
         """
         Search for customer by name or phone
         
+        Phone queries match the start of the number in any format
+        ('0917', '+63 917'); name queries match the start of each word.
+        
         Query params:
         - q: Search query (name or phone number)
         """
@@ -33,23 +37,21 @@ class POSViewSet(viewsets.ViewSet):
             return Response({'error': 'Query must be at least 2 characters'}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
-        customers = Customer.objects.filter(
-            name__icontains=query
-        ) | Customer.objects.filter(phone_number__icontains=query)
+        customers = CustomerService.search(query, limit=10)
         
         return Response([{
             'id': c.id,
             'name': c.name,
             'phone': c.phone_number
-        } for c in customers[:10]])
+        } for c in customers])
     
     @action(detail=False, methods=['get'])
     def search_product(self, request):
         """
-        Search for products by name or SKU
+        Search for products by name, SKU, category or dimensions
         
         Query params:
-        - q: Search query (product name or SKU)
+        - q: Search query (e.g. "mahogany", "LMB-001" or "2x4x8")
         """
         query = request.query_params.get('q', '')
         
@@ -57,14 +59,10 @@ class POSViewSet(viewsets.ViewSet):
             return Response({'error': 'Query must be at least 2 characters'}, 
                            status=status.HTTP_400_BAD_REQUEST)
         
-        products = LumberProduct.objects.filter(
-            is_active=True
-        ).filter(
-            name__icontains=query
-        ) | LumberProduct.objects.filter(
-            is_active=True,
-            sku__icontains=query
-        )
+        # Ranked IDs from the in-memory index, then one primary-key lookup
+        product_ids = product_index.search(query, limit=10)
+        found = LumberProduct.objects.select_related('category').in_bulk(product_ids)
+        products = [found[product_id] for product_id in product_ids if product_id in found]
         
         return Response([{
             'id': p.id,
@@ -75,7 +73,7 @@ class POSViewSet(viewsets.ViewSet):
             'board_feet': float(p.board_feet),
             'price_per_bf': float(p.price_per_board_foot),
             'price_per_piece': float(p.price_per_piece) if p.price_per_piece else None
-        } for p in products[:10]])
+        } for p in products])
     
     @action(detail=False, methods=['post'])
     def quick_checkout(self, request):
@@ -103,46 +101,15 @@ class POSViewSet(viewsets.ViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Create sales order
-            so = SalesService.create_sales_order(
+            # Walk-in sale: order, payment, stock out and pickup in one batch
+            so, receipt = SalesService.quick_checkout(
                 customer_id=customer_id,
                 items=items,
+                amount_tendered=amount_tendered,
                 payment_type=payment_type,
                 created_by=request.user
             )
             
-            # Ensure amount_paid does not exceed balance for the purpose of the SO record
-            # but we allow amount_tendered to be higher for change calculation.
-            order_total = (so.total_amount - so.discount_amount).quantize(Decimal('0.01'))
-            amount_tendered_decimal = Decimal(str(amount_tendered)).quantize(Decimal('0.01'))
-            amount_to_pay = min(order_total, amount_tendered_decimal)
-            
-            # Process payment
-            so, receipt = SalesService.process_payment(
-                sales_order_id=so.id,
-                amount_paid=amount_to_pay,
-                created_by=request.user
-            )
-            
-            # Update receipt with actual tendered amount if different
-            if Decimal(str(amount_tendered)) > amount_to_pay:
-                receipt.amount_tendered = Decimal(str(amount_tendered))
-                receipt.change = receipt.amount_tendered - (so.total_amount - so.discount_amount)
-                receipt.save()
-
-            # Auto-mark as Picked Up for POS transactions (Walk-in)
-            try:
-                from app_sales.services import OrderConfirmationService
-                # First ensure it has a confirmation record (created in create_sales_order)
-                # Then mark as ready and picked up
-                confirmation = so.confirmation
-                confirmation.mark_payment_complete()
-                confirmation.mark_ready_for_pickup() 
-                confirmation.mark_picked_up()
-            except Exception as e:
-                # Log error but don't fail transaction
-                print(f"Error auto-marking pickup for POS {so.so_number}: {e}")
-            
             return Response({
                 'status': 'success',
                 'sales_order': {
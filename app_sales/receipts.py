@@ -0,0 +1,309 @@
+"""
+Receipt rendering for counter printers (ESC/POS) and PDF
+
+Styles, table styles, font metrics and ESC/POS byte sequences are built
+once when the module is imported (at app start, see AppSalesConfig.ready),
+so rendering a receipt only lays out its own lines.
+"""
+from io import BytesIO
+from decimal import Decimal
+from django.utils import timezone
+from reportlab.lib import colors
+from reportlab.lib.enums import TA_CENTER
+from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
+from reportlab.lib.units import mm
+from reportlab.pdfbase.pdfmetrics import stringWidth
+from reportlab.platypus import SimpleDocTemplate, Table, TableStyle, Paragraph, Spacer, PageBreak
+from app_sales.models import Receipt, SalesOrder
+
+
+STORE_NAME = 'Lumber Management System'
+FOOTER_TEXT = 'Thank you for your purchase!'
+
+# 80 mm roll, Font A
+ESCPOS_LINE_WIDTH = 48
+
+# ESC/POS command bytes
+ESC_INIT = b'\x1b@'
+ESC_ALIGN_LEFT = b'\x1ba\x00'
+ESC_ALIGN_CENTER = b'\x1ba\x01'
+ESC_BOLD_ON = b'\x1bE\x01'
+ESC_BOLD_OFF = b'\x1bE\x00'
+ESC_DOUBLE_ON = b'\x1d!\x11'
+ESC_DOUBLE_OFF = b'\x1d!\x00'
+ESC_FEED_AND_CUT = b'\x1bd\x04\x1dV\x00'
+
+# Fixed receipt header, encoded once
+ESCPOS_HEADER = (
+    ESC_INIT + ESC_ALIGN_CENTER + ESC_DOUBLE_ON + STORE_NAME.encode('ascii') + b'\n'
+    + ESC_DOUBLE_OFF + b'OFFICIAL RECEIPT\n' + ESC_ALIGN_LEFT
+)
+ESCPOS_RULE = b'-' * ESCPOS_LINE_WIDTH + b'\n'
+ESCPOS_FOOTER = ESC_ALIGN_CENTER + FOOTER_TEXT.encode('ascii') + b'\n' + ESC_ALIGN_LEFT + ESC_FEED_AND_CUT
+
+# PDF page: 80 mm wide roll; long enough for typical receipts
+PDF_PAGE_SIZE = (80 * mm, 200 * mm)
+PDF_MARGIN = 4 * mm
+
+_SAMPLE_STYLES = getSampleStyleSheet()
+PDF_STYLES = {
+    'title': ParagraphStyle(
+        'ReceiptTitle', parent=_SAMPLE_STYLES['Heading2'], fontSize=11, leading=13,
+        alignment=TA_CENTER, spaceAfter=1 * mm
+    ),
+    'subtitle': ParagraphStyle(
+        'ReceiptSubtitle', parent=_SAMPLE_STYLES['Normal'], fontSize=7, leading=9, alignment=TA_CENTER
+    ),
+    'footer': ParagraphStyle(
+        'ReceiptFooter', parent=_SAMPLE_STYLES['Normal'], fontSize=7, leading=9,
+        alignment=TA_CENTER, spaceBefore=2 * mm
+    ),
+}
+PDF_INFO_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+])
+PDF_ITEMS_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('LINEBELOW', (0, 0), (-1, 0), 0.5, colors.black),
+    ('ALIGN', (1, 0), (-1, -1), 'RIGHT'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+])
+PDF_TOTALS_STYLE = TableStyle([
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 7),
+    ('ALIGN', (1, 0), (1, -1), 'RIGHT'),
+    ('LINEABOVE', (0, 0), (-1, 0), 0.5, colors.black),
+    ('FONTNAME', (0, 2), (-1, 2), 'Helvetica-Bold'),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 1),
+    ('TOPPADDING', (0, 0), (-1, -1), 1),
+    ('LEFTPADDING', (0, 0), (-1, -1), 0),
+    ('RIGHTPADDING', (0, 0), (-1, -1), 0),
+])
+_CONTENT_WIDTH = PDF_PAGE_SIZE[0] - 2 * PDF_MARGIN
+PDF_INFO_COLUMNS = [18 * mm, _CONTENT_WIDTH - 18 * mm]
+PDF_ITEMS_COLUMNS = [_CONTENT_WIDTH - 40 * mm, 10 * mm, 14 * mm, 16 * mm]
+PDF_TOTALS_COLUMNS = [_CONTENT_WIDTH - 24 * mm, 24 * mm]
+
+PAYMENT_LABELS = dict(SalesOrder.PAYMENT_CHOICES)
+
+# Load font metrics now rather than during the first receipt of the day
+for _font in ('Helvetica', 'Helvetica-Bold'):
+    stringWidth('0', _font, 7)
+
+
+def _money(value):
+    return f"{Decimal(value):,.2f}"
+
+
+class ReceiptRenderer:
+    """Render receipts as ESC/POS bytes or PDF"""
+
+    @staticmethod
+    def queryset():
+        """Receipts with everything a rendered receipt shows, in two queries"""
+        return Receipt.objects.select_related(
+            'sales_order__customer', 'created_by'
+        ).prefetch_related('sales_order__sales_order_items__product')
+
+    @staticmethod
+    def for_day(day=None):
+        """
+        Receipts issued on a day, oldest first
+
+        Args:
+            day: Date (default: today)
+
+        Returns:
+            QuerySet: Receipts ready for rendering
+        """
+        day = day or timezone.localdate()
+        return ReceiptRenderer.queryset().filter(created_at__date=day).order_by('created_at', 'id')
+
+    @staticmethod
+    def lines(receipt):
+        """
+        Plain-data view of a receipt shared by both output formats
+
+        Args:
+            receipt: Receipt from ReceiptRenderer.queryset()
+
+        Returns:
+            Dict: Header fields, item rows and totals
+        """
+        so = receipt.sales_order
+        cashier = receipt.created_by
+        return {
+            'receipt_number': receipt.receipt_number,
+            'so_number': so.so_number,
+            'date': timezone.localtime(receipt.created_at).strftime('%Y-%m-%d %H:%M'),
+            'customer': so.customer.name,
+            'cashier': (cashier.get_full_name() or cashier.username) if cashier else '',
+            'payment_type': PAYMENT_LABELS.get(so.payment_type, so.payment_type),
+            'items': [
+                (item.product.name, item.quantity_pieces, item.board_feet, item.unit_price, item.subtotal)
+                for item in so.sales_order_items.all()
+            ],
+            'total': so.total_amount,
+            'discount': so.discount_amount,
+            'amount_due': so.total_amount - so.discount_amount,
+            'tendered': receipt.amount_tendered,
+            'change': receipt.change,
+            'balance': so.balance,
+        }
+
+    @staticmethod
+    def render_escpos(receipt, width=ESCPOS_LINE_WIDTH):
+        """
+        Render one receipt as ESC/POS bytes for a thermal printer
+
+        Args:
+            receipt: Receipt from ReceiptRenderer.queryset()
+            width: Characters per line
+
+        Returns:
+            bytes: Printer-ready receipt, ending with a paper cut
+        """
+        data = ReceiptRenderer.lines(receipt)
+
+        def pair(label, value):
+            return f"{label}{value:>{width - len(label)}}"[:width]
+
+        text = [
+            pair('Receipt #', data['receipt_number']),
+            pair('Order #', data['so_number']),
+            pair('Date', data['date']),
+            pair('Customer ', data['customer'][:width - 9]),
+        ]
+        if data['cashier']:
+            text.append(pair('Cashier ', data['cashier'][:width - 8]))
+        body = '\n'.join(text) + '\n'
+
+        items = []
+        for name, quantity, board_feet, unit_price, subtotal in data['items']:
+            items.append(name[:width])
+            items.append(pair(f"  {quantity} pcs {board_feet} bf @ {_money(unit_price)}", _money(subtotal)))
+        items_text = '\n'.join(items) + '\n'
+
+        totals = [pair('Subtotal', _money(data['total']))]
+        if data['discount']:
+            totals.append(pair('Discount', '-' + _money(data['discount'])))
+        totals_text = '\n'.join(totals) + '\n'
+        due = pair('AMOUNT DUE', _money(data['amount_due'])) + '\n'
+        payment = '\n'.join([
+            pair('Payment', data['payment_type']),
+            pair('Tendered', _money(data['tendered'])),
+            pair('Change', _money(data['change'])),
+        ] + ([pair('Balance', _money(data['balance']))] if data['balance'] > 0 else [])) + '\n'
+
+        encode = ReceiptRenderer._encode
+        return b''.join([
+            ESCPOS_HEADER, encode(body), ESCPOS_RULE, encode(items_text), ESCPOS_RULE,
+            encode(totals_text), ESC_BOLD_ON, encode(due), ESC_BOLD_OFF, encode(payment),
+            ESCPOS_RULE, ESCPOS_FOOTER,
+        ])
+
+    @staticmethod
+    def iter_escpos(receipts, width=ESCPOS_LINE_WIDTH, chunk_size=200):
+        """
+        Stream many receipts as one ESC/POS job
+
+        Args:
+            receipts: Queryset from ReceiptRenderer.queryset() / for_day()
+            width: Characters per line
+            chunk_size: Receipts loaded per round trip
+
+        Yields:
+            bytes: One rendered receipt at a time
+        """
+        for receipt in receipts.iterator(chunk_size=chunk_size):
+            yield ReceiptRenderer.render_escpos(receipt, width=width)
+
+    @staticmethod
+    def render_pdf(receipts):
+        """
+        Render receipts into one PDF, one receipt per 80 mm page
+
+        Args:
+            receipts: Receipt or iterable of receipts from ReceiptRenderer.queryset()
+
+        Returns:
+            bytes: PDF document
+        """
+        if isinstance(receipts, Receipt):
+            receipts = [receipts]
+
+        buffer = BytesIO()
+        doc = SimpleDocTemplate(
+            buffer, pagesize=PDF_PAGE_SIZE, leftMargin=PDF_MARGIN, rightMargin=PDF_MARGIN,
+            topMargin=PDF_MARGIN, bottomMargin=PDF_MARGIN, title='Receipts'
+        )
+        elements = []
+        for receipt in receipts:
+            if elements:
+                elements.append(PageBreak())
+            elements.extend(ReceiptRenderer._pdf_elements(ReceiptRenderer.lines(receipt)))
+        if not elements:
+            elements.append(Paragraph('No receipts', PDF_STYLES['subtitle']))
+        doc.build(elements)
+        return buffer.getvalue()
+
+    @staticmethod
+    def _pdf_elements(data):
+        info = [
+            ['Receipt #', data['receipt_number']],
+            ['Order #', data['so_number']],
+            ['Date', data['date']],
+            ['Customer', data['customer']],
+        ]
+        if data['cashier']:
+            info.append(['Cashier', data['cashier']])
+
+        items = [['Item', 'Pcs', 'BF', 'Amount']] + [
+            [name[:28], str(quantity), str(board_feet), _money(subtotal)]
+            for name, quantity, board_feet, unit_price, subtotal in data['items']
+        ]
+
+        totals = [
+            ['Subtotal', _money(data['total'])],
+            ['Discount', '-' + _money(data['discount']) if data['discount'] else '0.00'],
+            ['Amount Due', _money(data['amount_due'])],
+            ['Payment', data['payment_type']],
+            ['Tendered', _money(data['tendered'])],
+            ['Change', _money(data['change'])],
+        ]
+        if data['balance'] > 0:
+            totals.append(['Balance', _money(data['balance'])])
+
+        info_table = Table(info, colWidths=PDF_INFO_COLUMNS)
+        info_table.setStyle(PDF_INFO_STYLE)
+        items_table = Table(items, colWidths=PDF_ITEMS_COLUMNS, repeatRows=1)
+        items_table.setStyle(PDF_ITEMS_STYLE)
+        totals_table = Table(totals, colWidths=PDF_TOTALS_COLUMNS)
+        totals_table.setStyle(PDF_TOTALS_STYLE)
+
+        return [
+            Paragraph(STORE_NAME, PDF_STYLES['title']),
+            Paragraph('Official Receipt', PDF_STYLES['subtitle']),
+            Spacer(1, 2 * mm),
+            info_table,
+            Spacer(1, 2 * mm),
+            items_table,
+            Spacer(1, 1 * mm),
+            totals_table,
+            Paragraph(FOOTER_TEXT, PDF_STYLES['footer']),
+        ]
+
+    @staticmethod
+    def _encode(text):
+        # Printer code pages lack most non-ASCII glyphs (including the peso sign)
+        return text.encode('ascii', errors='replace')
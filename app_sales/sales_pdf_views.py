@@ -17,6 +17,78 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_RIGHT
 from app_sales.models import SalesOrder, SalesOrderItem
 
 
+# Report styles are built once at import rather than per export / per order
+STYLES = getSampleStyleSheet()
+SUMMARY_TITLE_STYLE = ParagraphStyle(
+    'CustomTitle',
+    parent=STYLES['Heading1'],
+    fontSize=18,
+    textColor=colors.HexColor('#1e3a8a'),
+    spaceAfter=6,
+    alignment=TA_CENTER,
+)
+DETAILED_TITLE_STYLE = ParagraphStyle('CustomTitleDetailed', parent=SUMMARY_TITLE_STYLE, fontSize=16)
+ORDER_HEADER_STYLE = ParagraphStyle(
+    'OrderHeader',
+    parent=STYLES['Heading2'],
+    fontSize=12,
+    textColor=colors.HexColor('#1e40af'),
+    spaceAfter=6,
+)
+ITEMS_HEADER_STYLE = ParagraphStyle(
+    'ItemsHeader',
+    parent=STYLES['Heading3'],
+    fontSize=10,
+    textColor=colors.HexColor('#374151'),
+)
+SUMMARY_TOTALS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dbeafe')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+])
+SUMMARY_ORDERS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
+    ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
+    ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
+    ('GRID', (0, 0), (-1, -1), 1, colors.black),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+    ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),
+])
+ORDER_INFO_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f3f4f6')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+    ('VALIGN', (0, 0), (-1, -1), 'TOP'),
+])
+ORDER_ITEMS_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dbeafe')),
+    ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
+    ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+    ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, 0), 9),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+    ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
+    ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
+    ('FONTSIZE', (0, 1), (-1, -1), 8),
+])
+ORDER_SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f3f4f6')),
+    ('GRID', (0, 0), (-1, -1), 1, colors.grey),
+    ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
+    ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
+    ('FONTSIZE', (0, 0), (-1, -1), 9),
+])
+
+
 @login_required
 def sales_orders_export_preview(request):
     """Show preview of sales orders based on filters"""
@@ -141,26 +213,17 @@ def _generate_summary_pdf(buffer, orders, search_term, payment_type, date_from,
     """Generate summary PDF with table view"""
     
     doc = SimpleDocTemplate(buffer, pagesize=landscape(A4), topMargin=0.5*inch, bottomMargin=0.5*inch)
-    styles = getSampleStyleSheet()
     elements = []
     
     # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=18,
-        textColor=colors.HexColor('#1e3a8a'),
-        spaceAfter=6,
-        alignment=TA_CENTER,
-    )
-    elements.append(Paragraph('Sales Orders Report', title_style))
+    elements.append(Paragraph('Sales Orders Report', SUMMARY_TITLE_STYLE))
     
     # Report details
     report_info = f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
     if date_from or date_to:
         date_range = f"Date Range: {date_from or 'All'} to {date_to or 'All'}"
         report_info += f" | {date_range}"
-    elements.append(Paragraph(report_info, styles['Normal']))
+    elements.append(Paragraph(report_info, STYLES['Normal']))
     elements.append(Spacer(1, 0.15*inch))
     
     # Summary statistics
@@ -175,14 +238,7 @@ def _generate_summary_pdf(buffer, orders, search_term, payment_type, date_from,
          f'Paid: ₱{float(amount_paid):,.2f}', f'Balance: ₱{float(pending_balance):,.2f}']
     ]
     summary_table = Table(summary_data, colWidths=[2.5*inch, 2.5*inch, 2.5*inch, 2.5*inch])
-    summary_table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dbeafe')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-        ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 10),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-    ]))
+    summary_table.setStyle(SUMMARY_TOTALS_TABLE_STYLE)
     elements.append(summary_table)
     elements.append(Spacer(1, 0.2*inch))
     
@@ -207,19 +263,7 @@ def _generate_summary_pdf(buffer, orders, search_term, payment_type, date_from,
     
     # Create table
     table = Table(table_data, colWidths=[1.1*inch, 1.2*inch, 0.6*inch, 1*inch, 0.9*inch, 0.9*inch, 0.9*inch, 0.8*inch, 0.8*inch])
-    table.setStyle(TableStyle([
-        ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#1e3a8a')),
-        ('TEXTCOLOR', (0, 0), (-1, 0), colors.whitesmoke),
-        ('ALIGN', (0, 0), (-1, -1), 'CENTER'),
-        ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-        ('FONTSIZE', (0, 0), (-1, 0), 9),
-        ('BOTTOMPADDING', (0, 0), (-1, 0), 8),
-        ('BACKGROUND', (0, 1), (-1, -1), colors.beige),
-        ('GRID', (0, 0), (-1, -1), 1, colors.black),
-        ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.lightgrey]),
-        ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ('ALIGN', (3, 1), (-1, -1), 'RIGHT'),
-    ]))
+    table.setStyle(SUMMARY_ORDERS_TABLE_STYLE)
     
     elements.append(table)
     
@@ -231,23 +275,14 @@ def _generate_detailed_pdf(buffer, orders, search_term, payment_type, date_from,
     """Generate detailed PDF with individual sales order details"""
     
     doc = SimpleDocTemplate(buffer, pagesize=letter, topMargin=0.5*inch, bottomMargin=0.5*inch)
-    styles = getSampleStyleSheet()
     elements = []
     
     # Title
-    title_style = ParagraphStyle(
-        'CustomTitle',
-        parent=styles['Heading1'],
-        fontSize=16,
-        textColor=colors.HexColor('#1e3a8a'),
-        spaceAfter=6,
-        alignment=TA_CENTER,
-    )
-    elements.append(Paragraph('Sales Orders - Detailed Report', title_style))
+    elements.append(Paragraph('Sales Orders - Detailed Report', DETAILED_TITLE_STYLE))
     
     # Report details
     report_info = f"Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}"
-    elements.append(Paragraph(report_info, styles['Normal']))
+    elements.append(Paragraph(report_info, STYLES['Normal']))
     elements.append(Spacer(1, 0.2*inch))
     
     # Process each order
@@ -257,14 +292,7 @@ def _generate_detailed_pdf(buffer, orders, search_term, payment_type, date_from,
             elements.append(PageBreak())
         
         # Order header
-        order_header_style = ParagraphStyle(
-            'OrderHeader',
-            parent=styles['Heading2'],
-            fontSize=12,
-            textColor=colors.HexColor('#1e40af'),
-            spaceAfter=6,
-        )
-        elements.append(Paragraph(f'Sales Order: {order.so_number}', order_header_style))
+        elements.append(Paragraph(f'Sales Order: {order.so_number}', ORDER_HEADER_STYLE))
         
         # Order info
         info_data = [
@@ -273,24 +301,12 @@ def _generate_detailed_pdf(buffer, orders, search_term, payment_type, date_from,
             ['Email:', order.customer.email or '-', 'Address:', (order.customer.address or '-')[:30]],
         ]
         info_table = Table(info_data, colWidths=[1*inch, 2*inch, 1*inch, 2*inch])
-        info_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f3f4f6')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-            ('VALIGN', (0, 0), (-1, -1), 'TOP'),
-        ]))
+        info_table.setStyle(ORDER_INFO_TABLE_STYLE)
         elements.append(info_table)
         elements.append(Spacer(1, 0.15*inch))
         
         # Order items
-        items_header = ParagraphStyle(
-            'ItemsHeader',
-            parent=styles['Heading3'],
-            fontSize=10,
-            textColor=colors.HexColor('#374151'),
-        )
-        elements.append(Paragraph('Order Items', items_header))
+        elements.append(Paragraph('Order Items', ITEMS_HEADER_STYLE))
         
         items_data = [['Product', 'Qty (pcs)', 'Unit Price', 'Board Feet', 'Subtotal']]
         
@@ -304,17 +320,7 @@ def _generate_detailed_pdf(buffer, orders, search_term, payment_type, date_from,
             ])
         
         items_table = Table(items_data, colWidths=[2.5*inch, 0.8*inch, 1*inch, 0.9*inch, 1*inch])
-        items_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, 0), colors.HexColor('#dbeafe')),
-            ('TEXTCOLOR', (0, 0), (-1, 0), colors.HexColor('#1e40af')),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 9),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('ROWBACKGROUNDS', (0, 1), (-1, -1), [colors.white, colors.HexColor('#f9fafb')]),
-            ('ALIGN', (1, 1), (-1, -1), 'RIGHT'),
-            ('FONTSIZE', (0, 1), (-1, -1), 8),
-        ]))
+        items_table.setStyle(ORDER_ITEMS_TABLE_STYLE)
         elements.append(items_table)
         elements.append(Spacer(1, 0.15*inch))
         
@@ -330,18 +336,12 @@ def _generate_detailed_pdf(buffer, orders, search_term, payment_type, date_from,
         ]
         
         summary_table = Table(summary_data, colWidths=[2*inch, 2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (-1, -1), colors.HexColor('#f3f4f6')),
-            ('GRID', (0, 0), (-1, -1), 1, colors.grey),
-            ('FONTNAME', (0, 0), (0, -1), 'Helvetica-Bold'),
-            ('ALIGN', (0, 0), (-1, -1), 'RIGHT'),
-            ('FONTSIZE', (0, 0), (-1, -1), 9),
-        ]))
+        summary_table.setStyle(ORDER_SUMMARY_TABLE_STYLE)
         elements.append(summary_table)
         
         if order.notes:
             elements.append(Spacer(1, 0.1*inch))
-            elements.append(Paragraph(f'<b>Notes:</b> {order.notes}', styles['Normal']))
+            elements.append(Paragraph(f'<b>Notes:</b> {order.notes}', STYLES['Normal']))
     
     # Build PDF
     doc.build(elements)
@@ -84,8 +84,7 @@ class CartItemSerializer(serializers.ModelSerializer):
         return float(obj.get_subtotal())
     
     def get_available_quantity(self, obj):
-        inventory = getattr(obj.product, 'inventory', None)
-        return inventory.quantity_pieces if inventory else 0
+        return obj.get_available_quantity()
 
 
 class ShoppingCartSerializer(serializers.ModelSerializer):
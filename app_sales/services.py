@@ -1,14 +1,19 @@
 """
 Sales management services for Sales Orders, POS, and Receipts
 """
+import re
 from decimal import Decimal
+from django.core.cache import cache
 from django.db import transaction
+from django.db.models import Count, OuterRef, Subquery, Sum, Value
+from django.db.models.functions import Coalesce
 from django.utils import timezone
 from django.core.exceptions import ValidationError
-from app_sales.models import Customer, SalesOrder, SalesOrderItem, Receipt
-from app_inventory.models import LumberProduct, Inventory
+from app_sales.models import Customer, SalesOrder, SalesOrderItem, Receipt, name_tokens
+from app_inventory.models import Inventory, StockReservation, StockTransaction
 from app_inventory.services import InventoryService
-from app_sales.notification_models import OrderNotification, OrderConfirmation
+from app_sales.notification_models import OrderNotification, OrderConfirmation, NOTIFICATION_ALERT_TYPES
+from core.services import DocumentSequenceService
 
 
 class SalesService:
@@ -34,72 +39,35 @@ class SalesService:
         Raises:
             ValidationError: If validation fails
         """
-        if not items:
-            raise ValidationError("Sales order must have at least one item")
+        SalesService._validate_items(items)
         
         customer = Customer.objects.get(id=customer_id)
         
-        # Create sales order without SO number (will generate after)
-        so = SalesOrder.objects.create(
-            customer=customer,
-            payment_type=payment_type,
-            created_by=created_by,
-            order_source=order_source
-        )
-        
-        # Generate unique SO number
+        # Allocate SO number up front so the order is inserted once
         from datetime import datetime
         today = datetime.now().strftime('%Y%m%d')
-        prefix = f'SO-{today}-'
-        
-        # Get count of all orders created today
-        count = SalesOrder.objects.filter(
-            so_number__startswith=prefix
-        ).count() + 1
-        
-        so.so_number = f'{prefix}{count:04d}'
-        so.save()
-        
-        total_amount = Decimal('0')
+        so_number = DocumentSequenceService.next_number(
+            f'SO-{today}-', model=SalesOrder, field='so_number'
+        )
         
-        # Create line items and deduct stock
-        for item_data in items:
-            product_id = item_data.get('product_id')
-            quantity_pieces = item_data.get('quantity_pieces')
-            
-            if not product_id or not quantity_pieces:
-                raise ValidationError("Each item must have product_id and quantity_pieces")
-            
-            product = LumberProduct.objects.get(id=product_id)
-            
-            # Calculate board feet and price
-            board_feet = Decimal(str(product.calculate_board_feet(quantity_pieces)))
-            unit_price = product.price_per_board_foot
-            subtotal = board_feet * unit_price
-            
-            # Create line item
-            SalesOrderItem.objects.create(
-                sales_order=so,
-                product=product,
-                quantity_pieces=quantity_pieces,
-                board_feet=board_feet,
-                unit_price=unit_price,
-                subtotal=subtotal
-            )
-            
-            # Deduct from inventory
-            InventoryService.stock_out(
-                product_id=product_id,
-                quantity_pieces=quantity_pieces,
-                reason='sales',
-                created_by=created_by,
-                reference_id=so.so_number
-            )
-            
-            total_amount += subtotal
+        # Loads every product and inventory row of the order in one query,
+        # validates availability against it and deducts all lines in one batch
+        ledger_rows = InventoryService.stock_out_many(
+            items=items,
+            reason='sales',
+            created_by=created_by,
+            reference_id=so_number
+        )
+        lines, total_amount = SalesService._price_lines(items, ledger_rows)
         
-        # Set total amount
-        so.total_amount = total_amount
+        so = SalesOrder(
+            so_number=so_number,
+            customer=customer,
+            payment_type=payment_type,
+            created_by=created_by,
+            order_source=order_source,
+            total_amount=total_amount
+        )
         
         # Apply discount if eligible
         so.apply_discount()
@@ -111,6 +79,7 @@ class SalesService:
             so.confirmed_by = created_by
         
         so.save()
+        SalesService._create_items(so, lines)
         
         # Create order confirmation
         from datetime import datetime, timedelta
@@ -172,16 +141,13 @@ class SalesService:
         
         # Create receipt for THIS payment (not total)
         receipt = Receipt.objects.create(
+            receipt_number=SalesService._generate_receipt_number(),
             sales_order=so,
             amount_tendered=payment_amount,
             change=Decimal('0'),  # No change for partial payments
             created_by=created_by
         )
         
-        # Generate receipt number
-        receipt.receipt_number = SalesService._generate_receipt_number()
-        receipt.save()
-        
         # Mark payment in confirmation if exists
         try:
             OrderConfirmationService.mark_payment_received(sales_order_id=sales_order_id)
@@ -190,13 +156,168 @@ class SalesService:
         
         return so, receipt
     
+    @staticmethod
+    @transaction.atomic
+    def quick_checkout(customer_id, items, amount_tendered, payment_type='cash', created_by=None):
+        """
+        Walk-in POS checkout written as one atomic batch
+
+        Produces the same end state as create_sales_order + process_payment +
+        marking the confirmation paid, ready and picked up, but writes each
+        row once in its final state: one SO insert, bulk inserts for items,
+        ledger rows and notifications, one receipt and one confirmation.
+        The customer leaves with the goods, so no delivery row is created.
+
+        Args:
+            customer_id: Customer ID
+            items: List of dicts with 'product_id' and 'quantity_pieces'
+            amount_tendered: Cash handed over by the customer
+            payment_type: 'cash', 'partial', or 'credit'
+            created_by: Cashier
+
+        Returns:
+            Tuple: (SalesOrder, Receipt)
+
+        Raises:
+            ValidationError: If validation fails
+            ValueError: If any product has insufficient stock
+        """
+        SalesService._validate_items(items)
+
+        customer = Customer.objects.get(id=customer_id)
+        now = timezone.now()
+
+        from datetime import datetime, timedelta
+        today = datetime.now().strftime('%Y%m%d')
+        so_number = DocumentSequenceService.next_number(
+            f'SO-{today}-', model=SalesOrder, field='so_number'
+        )
+
+        # Validates and deducts stock; the ledger rows carry the locked products
+        ledger_rows = InventoryService.stock_out_many(
+            items=items,
+            reason='sales',
+            created_by=created_by,
+            reference_id=so_number
+        )
+
+        lines, total_amount = SalesService._price_lines(items, ledger_rows)
+
+        so = SalesOrder(
+            so_number=so_number,
+            customer=customer,
+            payment_type=payment_type,
+            created_by=created_by,
+            order_source='point_of_sale',
+            total_amount=total_amount,
+            is_confirmed=True,
+            confirmed_at=now,
+            confirmed_by=created_by
+        )
+        so.apply_discount()
+
+        # Pay at most the order total; anything above it is change
+        order_total = (so.total_amount - so.discount_amount).quantize(Decimal('0.01'))
+        tendered = Decimal(str(amount_tendered)).quantize(Decimal('0.01'))
+        so.amount_paid = min(order_total, tendered)
+        so.balance = so.total_amount - so.discount_amount - so.amount_paid
+        so.save()
+
+        SalesService._create_items(so, lines)
+
+        receipt = Receipt.objects.create(
+            receipt_number=SalesService._generate_receipt_number(),
+            sales_order=so,
+            amount_tendered=tendered,
+            change=max(tendered - order_total, Decimal('0')),
+            created_by=created_by
+        )
+
+        OrderConfirmation.objects.create(
+            sales_order=so,
+            customer=customer,
+            status='picked_up',
+            estimated_pickup_date=(now + timedelta(days=3)).date(),
+            is_payment_complete=True,
+            payment_completed_at=now,
+            ready_at=now,
+            picked_up_at=now,
+            created_by=created_by
+        )
+        OrderNotification.objects.bulk_create([
+            OrderNotification(
+                sales_order=so,
+                customer=customer,
+                notification_type='order_confirmed',
+                title=f"Order {so.so_number} Confirmed",
+                message=f"Your order {so.so_number} has been successfully created. "
+                       f"We will notify you when it's ready for pickup."
+            ),
+            OrderNotification(
+                sales_order=so,
+                customer=customer,
+                notification_type='ready_for_pickup',
+                title=f"Your Order {so.so_number} is Ready for Pickup!",
+                message=f"Good news! Your order {so.so_number} is now ready for pickup. "
+                       f"Please come to our store to collect your order. "
+                       f"Payment status: Completed"
+            ),
+        ])
+
+        return so, receipt
+
+    @staticmethod
+    def _validate_items(items):
+        """Reject empty orders and lines without a product or quantity"""
+        if not items:
+            raise ValidationError("Sales order must have at least one item")
+        for item_data in items:
+            if not item_data.get('product_id') or not item_data.get('quantity_pieces'):
+                raise ValidationError("Each item must have product_id and quantity_pieces")
+
+    @staticmethod
+    def _price_lines(items, ledger_rows):
+        """
+        Price order lines from the stock-out ledger rows
+
+        stock_out_many returns one ledger row per item, in order, with the
+        product already loaded, so no further product queries are needed.
+
+        Returns:
+            Tuple: ([(product, quantity_pieces, board_feet, subtotal)], total_amount)
+        """
+        lines = []
+        total_amount = Decimal('0')
+        for item_data, ledger_row in zip(items, ledger_rows):
+            product = ledger_row.product
+            subtotal = ledger_row.board_feet * product.price_per_board_foot
+            total_amount += subtotal
+            lines.append((product, int(item_data['quantity_pieces']), ledger_row.board_feet, subtotal))
+        return lines, total_amount
+
+    @staticmethod
+    def _create_items(so, lines):
+        """Insert all line items of an order with one bulk insert"""
+        return SalesOrderItem.objects.bulk_create([
+            SalesOrderItem(
+                sales_order=so,
+                product=product,
+                quantity_pieces=quantity_pieces,
+                board_feet=board_feet,
+                unit_price=product.price_per_board_foot,
+                subtotal=subtotal
+            )
+            for product, quantity_pieces, board_feet, subtotal in lines
+        ])
+
     @staticmethod
     def _generate_receipt_number():
         """Generate unique receipt number"""
         from datetime import datetime
         today = datetime.now().strftime('%Y%m%d')
-        count = Receipt.objects.filter(receipt_number__startswith=f'RCP-{today}').count() + 1
-        return f'RCP-{today}-{count:04d}'
+        return DocumentSequenceService.next_number(
+            f'RCP-{today}-', model=Receipt, field='receipt_number'
+        )
     
     @staticmethod
     def get_customer_account_summary(customer_id):
@@ -237,49 +358,123 @@ class SalesService:
         }
     
     @staticmethod
-    def validate_stock_availability(items):
+    def validate_stock_availability(items, cart=None):
         """
         Validate if sufficient stock is available for items
         
+        Stock held for shopping carts is not counted as available, except
+        the holds of ``cart`` itself, so a cart is never short of the pieces
+        it already holds. All inventory rows are read in one query.
+        
         Args:
             items: List of dicts with 'product_id' and 'quantity_pieces'
+            cart: ShoppingCart whose own holds count as available (optional)
             
         Returns:
             Dict: Validation result with product_id, available, requested, valid
         """
-        results = []
-        all_valid = True
+        levels = SalesService._stock_levels((item.get('product_id') for item in items), cart=cart)
+        return SalesService._check_stock(items, levels)
+    
+    @staticmethod
+    def validate_stock_availability_many(orders, taken=None):
+        """
+        Validate several orders against current stock at once
         
+        Each order is checked on its own against current availability, the
+        same way as validate_stock_availability, but inventory for every
+        order is read in a single query.
+        
+        Args:
+            orders: Dict of {order key: list of item dicts}
+            taken: {order key: {product_id: pieces}} already deducted from
+                stock for an order; added back to what that order may use
+            
+        Returns:
+            Dict: {order key: validation result}
+        """
+        levels = SalesService._stock_levels(
+            item.get('product_id') for items in orders.values() for item in items
+        )
+        results = {}
+        for key, items in orders.items():
+            own = (taken or {}).get(key)
+            if own:
+                order_levels = dict(levels)
+                for product_id, pieces in own.items():
+                    if product_id in levels:
+                        available, on_hand = levels[product_id]
+                        order_levels[product_id] = (available + pieces, on_hand + pieces)
+            else:
+                order_levels = levels
+            results[key] = SalesService._check_stock(items, order_levels)
+        return results
+    
+    @staticmethod
+    def _stock_levels(product_ids, cart=None):
+        """
+        {product_id: (available pieces, on-hand pieces)} from one query
+        
+        Pieces held by ``cart``'s own reservations are added back to what
+        is available.
+        """
+        product_ids = {SalesService._product_key(product_id) for product_id in product_ids} - {None}
+        if not product_ids:
+            return {}
+        inventories = Inventory.objects.filter(product_id__in=product_ids)
+        if cart is not None:
+            inventories = inventories.annotate(own_held=Coalesce(Subquery(
+                StockReservation.objects.filter(cart_item__cart=cart, product_id=OuterRef('product_id'))
+                .order_by().values('product_id').annotate(total=Sum('quantity_pieces')).values('total')
+            ), 0))
+        else:
+            inventories = inventories.annotate(own_held=Value(0))
+        return {
+            product_id: (min(max(on_hand - reserved + own_held, 0), on_hand), on_hand)
+            for product_id, on_hand, reserved, own_held in inventories.values_list(
+                'product_id', 'quantity_pieces', 'reserved_pieces', 'own_held'
+            )
+        }
+    
+    @staticmethod
+    def _product_key(product_id):
+        """Product IDs arrive as ints or numeric strings from JSON payloads"""
+        try:
+            return int(product_id)
+        except (TypeError, ValueError):
+            return None
+    
+    @staticmethod
+    def _check_stock(items, levels):
+        """Compare requested pieces with preloaded stock levels"""
+        results = []
         for item_data in items:
             product_id = item_data.get('product_id')
             quantity_pieces = item_data.get('quantity_pieces')
+            level = levels.get(SalesService._product_key(product_id))
             
-            try:
-                inventory = Inventory.objects.get(product_id=product_id)
-                available = inventory.quantity_pieces
-                valid = available >= quantity_pieces
-                
-                if not valid:
-                    all_valid = False
-                
-                results.append({
-                    'product_id': product_id,
-                    'available_pieces': available,
-                    'requested_pieces': quantity_pieces,
-                    'valid': valid
-                })
-            except Inventory.DoesNotExist:
-                all_valid = False
+            if level is None:
                 results.append({
                     'product_id': product_id,
                     'available_pieces': 0,
+                    'on_hand_pieces': 0,
                     'requested_pieces': quantity_pieces,
                     'valid': False,
                     'error': 'No inventory record'
                 })
+                continue
+            
+            available, on_hand = level
+            results.append({
+                'product_id': product_id,
+                'available_pieces': available,
+                'on_hand_pieces': on_hand,
+                'requested_pieces': quantity_pieces,
+                'valid': available >= quantity_pieces
+            })
         
         return {
-            'all_valid': all_valid,
+            'all_valid': all(result['valid'] for result in results),
             'items': results
         }
 
@@ -287,6 +482,144 @@ class SalesService:
 class OrderConfirmationService:
     """Service for managing order confirmations and notifications"""
     
+    NOTIFICATION_COUNTS_TIMEOUT = 300
+    INCOMING_COUNT_KEY = 'order_confirmations_incoming_count'
+    
+    @staticmethod
+    def notification_counts_key(customer_id):
+        return f"order_notification_counts_{customer_id}"
+    
+    @staticmethod
+    def get_notification_counts(customer_id):
+        """
+        Unread notification and pending order counts for a customer
+        
+        All counts come from one query of correlated COUNT subqueries and
+        are cached until an OrderNotification or OrderConfirmation of the
+        customer changes (see app_sales.signals).
+        
+        Args:
+            customer_id: ID of the customer
+            
+        Returns:
+            Dict: notification_count, one count per alert type,
+                  ready_pickups_count and payment_pending_count
+        """
+        key = OrderConfirmationService.notification_counts_key(customer_id)
+        counts = cache.get(key)
+        if counts is not None:
+            return counts
+        
+        def count_of(queryset):
+            return Coalesce(Subquery(
+                queryset.filter(customer=OuterRef('pk')).order_by().values('customer')
+                .annotate(total=Count('id')).values('total')
+            ), 0)
+        
+        unread = OrderNotification.objects.filter(is_read=False)
+        annotations = {
+            'notification_count': count_of(unread),
+            'ready_pickups_count': count_of(
+                OrderConfirmation.objects.filter(status='ready_for_pickup')
+            ),
+            'payment_pending_count': count_of(OrderConfirmation.objects.filter(
+                status__in=['confirmed', 'ready_for_pickup'], is_payment_complete=False
+            )),
+        }
+        for notification_type in NOTIFICATION_ALERT_TYPES:
+            annotations[notification_type] = count_of(unread.filter(notification_type=notification_type))
+        
+        counts = Customer.objects.filter(pk=customer_id).values(**annotations).first()
+        if counts is None:
+            counts = dict.fromkeys(annotations, 0)
+        cache.set(key, counts, OrderConfirmationService.NOTIFICATION_COUNTS_TIMEOUT)
+        return counts
+    
+    @staticmethod
+    def get_incoming_count():
+        """
+        Number of orders waiting for admin confirmation, cached
+        
+        Returns:
+            int: OrderConfirmation rows with status 'created'
+        """
+        count = cache.get(OrderConfirmationService.INCOMING_COUNT_KEY)
+        if count is None:
+            count = OrderConfirmation.objects.filter(status='created').count()
+            cache.set(
+                OrderConfirmationService.INCOMING_COUNT_KEY, count,
+                OrderConfirmationService.NOTIFICATION_COUNTS_TIMEOUT
+            )
+        return count
+    
+    @staticmethod
+    def invalidate_notification_counts(customer_ids=(), incoming=False):
+        """
+        Drop cached notification counts
+        
+        Bulk operations (bulk_create, queryset.update) do not fire model
+        signals, so callers using them invalidate explicitly.
+        
+        Args:
+            customer_ids: Customers whose counts changed
+            incoming: Also drop the admin incoming-orders count
+        """
+        keys = [OrderConfirmationService.notification_counts_key(cid) for cid in set(customer_ids) if cid]
+        if incoming:
+            keys.append(OrderConfirmationService.INCOMING_COUNT_KEY)
+        if keys:
+            cache.delete_many(keys)
+    
+    @staticmethod
+    def validate_queue_stock(statuses=('created',), confirmation_ids=None):
+        """
+        Check stock for every order in the confirmation queue at once
+        
+        Uses four queries however many orders are queued: confirmations,
+        their line items, the stock-out ledger rows of those orders and the
+        inventory rows of every product involved. Sales orders take their
+        stock when they are created, so each order is checked against
+        current stock plus the pieces the ledger shows were taken for it.
+        
+        Args:
+            statuses: Confirmation statuses to include (default: incoming orders)
+            confirmation_ids: Restrict to these confirmations (optional)
+            
+        Returns:
+            List[Dict]: Per order: confirmation_id, sales_order_id, so_number,
+                        all_valid and per-item results
+        """
+        confirmations = OrderConfirmation.objects.filter(status__in=statuses)
+        if confirmation_ids is not None:
+            confirmations = confirmations.filter(id__in=confirmation_ids)
+        confirmations = list(confirmations.order_by('created_at').values(
+            'id', 'sales_order_id', 'sales_order__so_number'
+        ))
+        
+        items_by_order = {confirmation['sales_order_id']: [] for confirmation in confirmations}
+        for item in SalesOrderItem.objects.filter(sales_order_id__in=items_by_order).order_by('id').values(
+            'sales_order_id', 'product_id', 'quantity_pieces'
+        ):
+            items_by_order[item.pop('sales_order_id')].append(item)
+        
+        # Pieces already deducted for each order (ledger rows carry the SO number)
+        order_by_number = {
+            confirmation['sales_order__so_number']: confirmation['sales_order_id'] for confirmation in confirmations
+        }
+        taken = {}
+        for row in StockTransaction.objects.filter(
+            transaction_type='stock_out', reference_id__in=order_by_number
+        ).values('reference_id', 'product_id').annotate(pieces=Sum('quantity_pieces')).order_by():
+            taken.setdefault(order_by_number[row['reference_id']], {})[row['product_id']] = row['pieces']
+        
+        results = SalesService.validate_stock_availability_many(items_by_order, taken=taken)
+        return [{
+            'confirmation_id': confirmation['id'],
+            'sales_order_id': confirmation['sales_order_id'],
+            'so_number': confirmation['sales_order__so_number'],
+            **results[confirmation['sales_order_id']],
+        } for confirmation in confirmations]
+    
     @staticmethod
     @transaction.atomic
     def create_order_confirmation(sales_order_id, estimated_pickup_date=None, created_by=None):
@@ -433,3 +766,162 @@ class OrderConfirmationService:
         )
         
         return confirmation
+
+
+class CustomerService:
+    """Indexed customer search and portal user -> customer resolution"""
+    
+    SESSION_KEY = 'sales_customer'
+    
+    @staticmethod
+    def search(query, limit=10):
+        """
+        Find customers by phone number or name prefix
+        
+        Digit-like queries match the start of the normalized phone number,
+        so '0917 12' and '+63 917 12' find the same customers. Other queries
+        match every word against the start of a word in the customer name.
+        Both use indexed range scans instead of icontains.
+        
+        Args:
+            query: Phone fragment or name words, e.g. '0917' or 'juan dela'
+            limit: Maximum number of customers to return
+            
+        Returns:
+            List[Customer]: Matching customers ordered by name
+        """
+        query = (query or '').strip()
+        customers = Customer.objects.all()
+        
+        if query and not re.sub(r'[\d\s()+\-.]', '', query):
+            digits = re.sub(r'\D', '', query)
+            if not digits:
+                return []
+            # Partial numbers get the same local-format prefix as stored ones
+            if digits.startswith('63') and len(digits) > 2:
+                digits = '0' + digits[2:]
+            elif digits.startswith('9'):
+                digits = '0' + digits
+            customers = customers.filter(
+                phone_normalized__gte=digits, phone_normalized__lt=digits + '\uffff'
+            )
+        else:
+            tokens = name_tokens(query)
+            if not tokens:
+                return []
+            for token in tokens:
+                customers = customers.filter(
+                    search_tokens__token__gte=token, search_tokens__token__lt=token + '\uffff'
+                )
+            customers = customers.distinct()
+        
+        return list(customers.order_by('name', 'id')[:limit])
+    
+    @staticmethod
+    def get_for_request(request):
+        """
+        Resolve the logged-in user's Customer record
+        
+        The result is memoized on the request and the customer ID is kept
+        in the session, so repeat page loads cost at most one primary-key
+        fetch. "No customer" is never stored in the session, so a record
+        created or linked later in the session is found on the next
+        request. Accounts created before the user link existed are matched
+        by email once and linked.
+        
+        Args:
+            request: HttpRequest with an authenticated user
+            
+        Returns:
+            Customer or None
+        """
+        if hasattr(request, '_sales_customer'):
+            return request._sales_customer
+        
+        user = request.user
+        customer = None
+        if user.is_authenticated:
+            cached = CustomerService._session_entry(request)
+            if cached is not None:
+                customer = Customer.objects.filter(id=cached[1], user=user).first()
+            if customer is None:
+                customer = Customer.objects.filter(user=user).first()
+            if customer is None and user.email:
+                customer = Customer.objects.filter(email=user.email, user__isnull=True).order_by('created_at').first()
+                if customer is not None:
+                    CustomerService.link_user(customer, user)
+            CustomerService.remember(request, customer)
+        
+        request._sales_customer = customer
+        return customer
+    
+    @staticmethod
+    def get_customer_id(request):
+        """
+        ID of the logged-in user's Customer record
+        
+        Served from the request or session when known, falling back to
+        get_for_request otherwise.
+        
+        Args:
+            request: HttpRequest
+            
+        Returns:
+            int or None
+        """
+        if not hasattr(request, '_sales_customer'):
+            cached = CustomerService._session_entry(request)
+            if cached is not None:
+                return cached[1]
+        customer = CustomerService.get_for_request(request)
+        return customer.id if customer else None
+    
+    @staticmethod
+    def link_user(customer, user):
+        """
+        Attach a portal account to a customer record
+        
+        Args:
+            customer: Customer instance
+            user: CustomUser instance
+            
+        Returns:
+            Customer: The linked customer
+        """
+        if customer.user_id != user.pk:
+            customer.user = user
+            customer.save(update_fields=['user', 'updated_at'])
+        return customer
+    
+    @staticmethod
+    def remember(request, customer):
+        """
+        Cache the resolved customer on the request and in the session
+        
+        A missing customer is only memoized on the request; any session
+        entry is dropped so the next request looks the user up again.
+        
+        Args:
+            request: HttpRequest
+            customer: Customer instance or None
+        """
+        request._sales_customer = customer
+        session = getattr(request, 'session', None)
+        if session is None or not request.user.is_authenticated:
+            return
+        if customer is None:
+            session.pop(CustomerService.SESSION_KEY, None)
+            return
+        value = [request.user.pk, customer.id]
+        if session.get(CustomerService.SESSION_KEY) != value:
+            session[CustomerService.SESSION_KEY] = value
+    
+    @staticmethod
+    def _session_entry(request):
+        """[user_id, customer_id] from the session if it belongs to this user"""
+        session = getattr(request, 'session', None)
+        cached = session.get(CustomerService.SESSION_KEY) if session is not None else None
+        # Entries without a customer predate the rule against caching "none"
+        if cached and cached[0] == request.user.pk and cached[1] is not None:
+            return cached
+        return None
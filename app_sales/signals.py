@@ -0,0 +1,16 @@
+from django.db.models.signals import post_save, post_delete
+from django.dispatch import receiver
+from django.db import transaction
+from app_sales.notification_models import OrderNotification, OrderConfirmation
+from app_sales.services import OrderConfirmationService
+
+
+@receiver([post_save, post_delete], sender=OrderNotification)
+@receiver([post_save, post_delete], sender=OrderConfirmation)
+def invalidate_notification_counts(sender, instance, **kwargs):
+    """Drop the customer's cached badge counts once the change is committed"""
+    customer_id = instance.customer_id
+    incoming = sender is OrderConfirmation
+    transaction.on_commit(
+        lambda: OrderConfirmationService.invalidate_notification_counts([customer_id], incoming=incoming)
+    )
@@ -1,3 +1,543 @@
-from django.test import TestCase
+import importlib
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import connection
+from django.test import RequestFactory, TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from django.utils import timezone
+from app_inventory.models import Inventory, LumberProduct, StockReservation, StockTransaction
+from app_inventory.reservations import StockReservationService
+from app_inventory.tests import make_product
+from app_sales.models import (
+    CartItem, Customer, Receipt, SalesOrder, SalesOrderItem, ShoppingCart, name_tokens, normalize_phone
+)
+from app_sales.context_processors import order_notifications
+from app_sales.notification_models import OrderConfirmation, OrderNotification
+from app_sales.receipts import ESC_FEED_AND_CUT, ESC_INIT, ReceiptRenderer
+from app_sales.services import CustomerService, OrderConfirmationService, SalesService
+from core.models import CustomUser
 
-# Create your tests here.
+
+def make_customer(name='Walk-in Customer', phone_number='09170000000', **kwargs):
+    return Customer.objects.create(name=name, phone_number=phone_number, **kwargs)
+
+
+class CreateSalesOrderTests(TestCase):
+    """SalesService.create_sales_order"""
+
+    def setUp(self):
+        self.customer = make_customer()
+        self.products = [make_product(f'LMB-00{i}', pieces=20) for i in range(5)]
+
+    def test_items_are_priced_from_board_feet_and_stock_deducted(self):
+        so = SalesService.create_sales_order(
+            customer_id=self.customer.id,
+            items=[
+                {'product_id': self.products[0].id, 'quantity_pieces': 3},
+                {'product_id': self.products[1].id, 'quantity_pieces': 1},
+            ]
+        )
+
+        items = {item.product_id: item for item in SalesOrderItem.objects.filter(sales_order=so)}
+        self.assertEqual(items[self.products[0].id].board_feet, Decimal('16.00'))
+        self.assertEqual(items[self.products[0].id].subtotal, Decimal('160.00'))
+        self.assertEqual(so.total_amount, Decimal('160.00') + Decimal('5.33') * 10)
+        self.assertTrue(so.is_confirmed)
+        self.assertEqual(Inventory.objects.get(product=self.products[0]).quantity_pieces, 17)
+        self.assertTrue(OrderConfirmation.objects.filter(sales_order=so, status='created').exists())
+
+    def test_insufficient_stock_creates_nothing(self):
+        with self.assertRaisesMessage(ValueError, 'Available: 20, Requested: 21'):
+            SalesService.create_sales_order(
+                customer_id=self.customer.id,
+                items=[
+                    {'product_id': self.products[0].id, 'quantity_pieces': 1},
+                    {'product_id': self.products[1].id, 'quantity_pieces': 21},
+                ]
+            )
+
+        self.assertFalse(SalesOrder.objects.exists())
+        self.assertEqual(Inventory.objects.get(product=self.products[0]).quantity_pieces, 20)
+
+    def test_invalid_items_are_rejected(self):
+        for items in ([], [{'product_id': self.products[0].id}], [{'quantity_pieces': 2}]):
+            with self.assertRaises(ValidationError):
+                SalesService.create_sales_order(customer_id=self.customer.id, items=items)
+
+    def test_query_count_does_not_grow_with_lines(self):
+        # The first order of the day also seeds the document sequences
+        SalesService.create_sales_order(
+            customer_id=self.customer.id, items=[{'product_id': self.products[0].id, 'quantity_pieces': 1}]
+        )
+        with CaptureQueriesContext(connection) as one_line:
+            SalesService.create_sales_order(
+                customer_id=self.customer.id, items=[{'product_id': self.products[0].id, 'quantity_pieces': 1}]
+            )
+        with CaptureQueriesContext(connection) as five_lines:
+            SalesService.create_sales_order(
+                customer_id=self.customer.id,
+                items=[{'product_id': product.id, 'quantity_pieces': 1} for product in self.products]
+            )
+
+        self.assertEqual(len(one_line), len(five_lines))
+
+
+class QuickCheckoutTests(TestCase):
+    """SalesService.quick_checkout"""
+
+    def setUp(self):
+        self.customer = make_customer()
+        self.product = make_product(pieces=10)
+
+    def test_checkout_pays_deducts_and_closes_the_order(self):
+        so, receipt = SalesService.quick_checkout(
+            customer_id=self.customer.id,
+            items=[{'product_id': self.product.id, 'quantity_pieces': 3}],
+            amount_tendered=Decimal('1000')
+        )
+
+        order_total = so.total_amount - so.discount_amount
+        self.assertEqual(so.total_amount, Decimal('16.00') * self.product.price_per_board_foot)
+        self.assertEqual(so.amount_paid, order_total)
+        self.assertEqual(so.balance, Decimal('0'))
+        self.assertEqual(receipt.change, Decimal('1000') - order_total)
+        self.assertEqual(OrderConfirmation.objects.get(sales_order=so).status, 'picked_up')
+        self.assertEqual(Inventory.objects.get(product=self.product).quantity_pieces, 7)
+        self.assertEqual(StockTransaction.objects.get(reference_id=so.so_number).quantity_pieces, 3)
+
+    def test_oversell_rolls_back_every_write(self):
+        with self.assertRaises(ValueError):
+            SalesService.quick_checkout(
+                customer_id=self.customer.id,
+                items=[{'product_id': self.product.id, 'quantity_pieces': 11}],
+                amount_tendered=Decimal('1000')
+            )
+
+        self.assertFalse(SalesOrder.objects.exists())
+        self.assertFalse(Receipt.objects.exists())
+        self.assertEqual(Inventory.objects.get(product=self.product).quantity_pieces, 10)
+
+
+class BenchmarkPosCheckoutCommandTests(TestCase):
+    """benchmark_pos_checkout management command"""
+
+    def test_benchmark_leaves_no_rows_behind(self):
+        existing = make_customer(name='POS Checkout Benchmark')
+        products_before = LumberProduct.objects.count()
+
+        out = StringIO()
+        call_command('benchmark_pos_checkout', runs=2, lines=2, stdout=out)
+
+        self.assertIn('Benchmark complete', out.getvalue())
+        self.assertEqual(list(Customer.objects.all()), [existing])
+        self.assertEqual(LumberProduct.objects.count(), products_before)
+        self.assertFalse(SalesOrder.objects.exists())
+        self.assertFalse(StockTransaction.objects.exists())
+
+        # The rolled-back run released its document numbers
+        customer = make_customer(phone_number='09171111111')
+        so, receipt = SalesService.quick_checkout(
+            customer_id=customer.id,
+            items=[{'product_id': make_product(pieces=5).id, 'quantity_pieces': 1}],
+            amount_tendered=Decimal('1000')
+        )
+        self.assertTrue(so.so_number.endswith('-0001'))
+        self.assertTrue(receipt.receipt_number.endswith('-0001'))
+
+
+class CustomerServiceTests(TestCase):
+    """Indexed customer search and request -> customer resolution"""
+
+    def setUp(self):
+        self.juan = make_customer(name='Juan Dela Cruz', phone_number='+63 917 123 4567')
+        self.maria = make_customer(name='Maria Santos', phone_number='0918 765 4321')
+
+    def request_for(self, user, session=None):
+        request = RequestFactory().get('/')
+        request.user = user
+        request.session = {} if session is None else session
+        return request
+
+    def test_search_by_phone_prefix_or_name_words(self):
+        self.assertEqual(CustomerService.search('0917 12'), [self.juan])
+        self.assertEqual(CustomerService.search('+63 917'), [self.juan])
+        self.assertEqual(CustomerService.search('dela ju'), [self.juan])
+        self.assertEqual(CustomerService.search('santos'), [self.maria])
+        self.assertEqual(CustomerService.search('pedro'), [])
+
+    def test_migration_helpers_match_the_live_ones(self):
+        migration = importlib.import_module('app_sales.migrations.0014_customer_search_index')
+        for phone in ('+63 917 123 4567', '9171234567', '0917-123-4567', '', None):
+            self.assertEqual(migration.normalize_phone(phone), normalize_phone(phone))
+        for name in ('Juan  Dela Cruz', "O'Neil Lumber Co.", '', None):
+            self.assertEqual(migration.name_tokens(name), name_tokens(name))
+
+    def test_customer_is_linked_by_email_and_remembered(self):
+        user = CustomUser.objects.create_user('juan', email='juan@example.com', password='pass')
+        self.juan.email = 'juan@example.com'
+        self.juan.save()
+        session = {}
+
+        self.assertEqual(CustomerService.get_for_request(self.request_for(user, session)), self.juan)
+        self.juan.refresh_from_db()
+        self.assertEqual(self.juan.user, user)
+        self.assertEqual(session[CustomerService.SESSION_KEY], [user.pk, self.juan.id])
+        self.assertEqual(CustomerService.get_customer_id(self.request_for(user, session)), self.juan.id)
+
+    def test_missing_customer_is_not_cached_in_the_session(self):
+        user = CustomUser.objects.create_user('pedro', email='pedro@example.com', password='pass')
+        session = {CustomerService.SESSION_KEY: [user.pk, None]}
+
+        self.assertIsNone(CustomerService.get_for_request(self.request_for(user, session)))
+        self.assertNotIn(CustomerService.SESSION_KEY, session)
+
+        # A customer created later in the same session is found on the next request
+        pedro = make_customer(name='Pedro Reyes', phone_number='09190000000', email='pedro@example.com')
+        self.assertEqual(CustomerService.get_customer_id(self.request_for(user, session)), pedro.id)
+
+
+class OrderNotificationCountsTests(TestCase):
+    """Cached notification counts and the lazy order_notifications context"""
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user('buyer', email='buyer@example.com', password='pass')
+        self.customer = make_customer(email='buyer@example.com', user=self.user)
+        self.order = SalesOrder.objects.create(customer=self.customer, payment_type='cash', so_number='SO-20260101-0001')
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderConfirmation.objects.create(sales_order=self.order, customer=self.customer, status='ready_for_pickup')
+            OrderNotification.objects.create(
+                sales_order=self.order, customer=self.customer, notification_type='ready_for_pickup',
+                title='Ready', message='Ready for pickup'
+            )
+
+    def request(self, user):
+        request = RequestFactory().get('/')
+        request.user = user
+        request.session = {}
+        return request
+
+    def test_counts_come_from_one_query_and_are_cached(self):
+        with self.assertNumQueries(1):
+            counts = OrderConfirmationService.get_notification_counts(self.customer.id)
+        with self.assertNumQueries(0):
+            OrderConfirmationService.get_notification_counts(self.customer.id)
+
+        self.assertEqual(counts['notification_count'], 1)
+        self.assertEqual(counts['ready_for_pickup'], 1)
+        self.assertEqual(counts['ready_pickups_count'], 1)
+        self.assertEqual(counts['payment_pending_count'], 1)
+
+    def test_saves_invalidate_the_customer_counts(self):
+        OrderConfirmationService.get_notification_counts(self.customer.id)
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderNotification.objects.filter(customer=self.customer).get().delete()
+            confirmation = self.order.confirmation
+            confirmation.is_payment_complete = True
+            confirmation.save()
+
+        counts = OrderConfirmationService.get_notification_counts(self.customer.id)
+        self.assertEqual((counts['notification_count'], counts['payment_pending_count']), (0, 0))
+
+    def test_incoming_count_is_invalidated_by_new_confirmations(self):
+        self.assertEqual(OrderConfirmationService.get_incoming_count(), 0)
+        other = SalesOrder.objects.create(customer=self.customer, payment_type='cash', so_number='SO-20260101-0002')
+        with self.captureOnCommitCallbacks(execute=True):
+            OrderConfirmation.objects.create(sales_order=other, customer=self.customer)
+        self.assertEqual(OrderConfirmationService.get_incoming_count(), 1)
+
+    def test_context_costs_nothing_until_used(self):
+        with self.assertNumQueries(0):
+            context = order_notifications(self.request(self.user))
+        self.assertEqual(context['notification_count'], 1)
+        self.assertTrue(context['has_ready_pickup_notifications'])
+        self.assertTrue(context['has_payment_notifications'])
+        self.assertEqual(context['ready_pickups'][0]['order_number'], 'SO-20260101-0001')
+
+    def test_anonymous_users_get_empty_values_without_queries(self):
+        context = order_notifications(self.request(AnonymousUser()))
+        with self.assertNumQueries(0):
+            self.assertEqual(context['notification_count'], 0)
+            self.assertEqual(list(context['notifications']), [])
+            self.assertEqual(context['admin_incoming_count'], 0)
+
+
+class ShoppingCartApiTests(TestCase):
+    """Cart endpoints serialize from one prefetched item query"""
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user('shopper', password='pass')
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+        self.products = [make_product(f'LMB-00{i}', pieces=50) for i in range(6)]
+
+    def add(self, product, quantity=1):
+        return self.client.post('/api/cart/add_item/', {'product_id': product.id, 'quantity': quantity}, format='json')
+
+    def test_totals_cover_every_item(self):
+        self.add(self.products[0], 2)
+        data = self.add(self.products[1], 3).json()
+
+        unit_price = Decimal('53.33')  # 5.333333 bf x 10.00, rounded per piece
+        self.assertEqual(Decimal(str(data['total_items'])), 5)
+        self.assertEqual(data['item_count'], 2)
+        self.assertEqual(Decimal(str(data['total'])), unit_price * 5)
+
+    def test_my_cart_query_count_does_not_grow_with_items(self):
+        self.add(self.products[0])
+        with CaptureQueriesContext(connection) as one_item:
+            self.client.get('/api/cart/my_cart/')
+        for product in self.products[1:]:
+            self.add(product)
+        with CaptureQueriesContext(connection) as six_items:
+            response = self.client.get('/api/cart/my_cart/')
+
+        self.assertEqual(len(response.json()['items']), 6)
+        self.assertEqual(len(one_item), len(six_items))
+
+    def test_add_item_query_count_does_not_grow_with_items(self):
+        with CaptureQueriesContext(connection) as first:
+            self.add(self.products[0])
+        for product in self.products[1:5]:
+            self.add(product)
+        with CaptureQueriesContext(connection) as sixth:
+            self.add(self.products[5])
+        self.assertEqual(len(first), len(sixth))
+
+    def test_add_item_rejects_bad_requests(self):
+        self.assertEqual(self.add(self.products[0], 51).status_code, 400)
+        self.assertEqual(self.add(self.products[0], 0).status_code, 400)
+        self.assertEqual(
+            self.client.post('/api/cart/add_item/', {'product_id': 9999}, format='json').status_code, 404
+        )
+        self.assertFalse(CartItem.objects.exists())
+
+    def test_prefetched_cart_totals_need_no_queries(self):
+        self.add(self.products[0], 2)
+        self.add(self.products[1], 1)
+        cart = ShoppingCart.with_items().get(user=self.user)
+        with self.assertNumQueries(0):
+            self.assertEqual(cart.get_total_items(), 3)
+            self.assertEqual(cart.get_item_count(), 2)
+            self.assertEqual(cart.get_total(), Decimal('53.33') * 3)
+
+
+class StockReservationTests(TestCase):
+    """Cart holds and the availability checks that read them"""
+
+    def setUp(self):
+        self.product = make_product(pieces=10)
+        self.shopper = CustomUser.objects.create_user('shopper', password='pass')
+        self.other = CustomUser.objects.create_user('other', password='pass')
+
+    def hold(self, user, quantity):
+        cart, _ = ShoppingCart.objects.get_or_create(user=user)
+        item = CartItem.objects.create(cart=cart, product=self.product, quantity=quantity)
+        StockReservationService.hold_cart_item(item)
+        return cart, item
+
+    def available(self):
+        return Inventory.objects.get(product=self.product).available_pieces
+
+    def test_holds_reduce_available_stock_and_reject_overbooking(self):
+        self.hold(self.shopper, 8)
+        self.assertEqual(self.available(), 2)
+        with self.assertRaisesMessage(ValidationError, 'Available: 2'):
+            self.hold(self.other, 3)
+        self.assertEqual(self.available(), 2)
+
+    def test_a_cart_validates_against_its_own_holds(self):
+        cart, _ = self.hold(self.shopper, 8)
+        items = [{'product_id': self.product.id, 'quantity_pieces': 8}]
+
+        own = SalesService.validate_stock_availability(items, cart=cart)
+        self.assertTrue(own['all_valid'])
+        self.assertEqual(own['items'][0]['available_pieces'], 10)
+
+        others = SalesService.validate_stock_availability(items, cart=ShoppingCart.objects.get_or_create(user=self.other)[0])
+        self.assertFalse(others['all_valid'])
+        self.assertEqual(others['items'][0]['available_pieces'], 2)
+        self.assertFalse(SalesService.validate_stock_availability(items)['all_valid'])
+
+    def test_validate_stock_endpoint_counts_the_callers_holds(self):
+        self.hold(self.shopper, 8)
+        client = APIClient()
+        client.force_authenticate(self.shopper)
+
+        response = client.post(
+            '/api/sales-orders/validate_stock/',
+            {'items': [{'product_id': self.product.id, 'quantity_pieces': 8}]},
+            format='json'
+        )
+
+        self.assertTrue(response.json()['all_valid'])
+
+    def test_expired_holds_are_released_in_bulk(self):
+        _, item = self.hold(self.shopper, 4)
+        self.hold(self.other, 3)
+        StockReservation.objects.filter(cart_item=item).update(expires_at=timezone.now() - timedelta(minutes=1))
+
+        result = StockReservationService.expire_holds()
+
+        self.assertEqual(result, {'expired': 1, 'pieces': 4})
+        self.assertEqual(self.available(), 7)
+
+    def test_cascade_deletes_release_their_holds(self):
+        cart, _ = self.hold(self.shopper, 4)
+        self.hold(self.other, 3)
+
+        cart.delete()
+        self.assertEqual(self.available(), 7)
+        self.other.delete()
+        self.assertEqual(self.available(), 10)
+        self.assertFalse(StockReservation.objects.exists())
+
+    def test_released_holds_are_not_released_twice(self):
+        _, item = self.hold(self.shopper, 4)
+        self.hold(self.other, 3)
+
+        self.assertEqual(StockReservationService.release_cart_items([item.id]), 4)
+        item.delete()
+        self.assertEqual(Inventory.objects.get(product=self.product).reserved_pieces, 3)
+
+    def test_pos_sales_ignore_cart_holds(self):
+        # Holds only gate the storefront; a walk-in sale of stock on hand goes through
+        self.hold(self.shopper, 8)
+        SalesService.quick_checkout(
+            customer_id=make_customer().id,
+            items=[{'product_id': self.product.id, 'quantity_pieces': 10}],
+            amount_tendered=Decimal('1000')
+        )
+        self.assertEqual(self.available(), 0)
+
+
+class ConfirmationQueueStockTests(TestCase):
+    """OrderConfirmationService.validate_queue_stock"""
+
+    def setUp(self):
+        self.customer = make_customer()
+        self.product = make_product(pieces=10)
+
+    def order(self, pieces):
+        return SalesService.create_sales_order(
+            customer_id=self.customer.id,
+            items=[{'product_id': self.product.id, 'quantity_pieces': pieces}],
+            order_source='customer_order'
+        )
+
+    def test_order_that_took_the_last_pieces_is_valid(self):
+        so = self.order(10)
+
+        [result] = OrderConfirmationService.validate_queue_stock()
+
+        self.assertEqual(result['sales_order_id'], so.id)
+        self.assertTrue(result['all_valid'])
+        self.assertEqual(result['items'][0]['available_pieces'], 10)
+
+    def test_each_order_only_gets_its_own_pieces_back(self):
+        self.order(6)
+        self.order(4)
+        results = OrderConfirmationService.validate_queue_stock()
+        self.assertEqual([result['items'][0]['available_pieces'] for result in results], [6, 4])
+        self.assertTrue(all(result['all_valid'] for result in results))
+
+    def test_pieces_beyond_what_was_taken_are_checked_against_stock(self):
+        so = self.order(8)
+        # Order edited to more pieces than were deducted when it was placed
+        SalesOrderItem.objects.filter(sales_order=so).update(quantity_pieces=13)
+
+        [result] = OrderConfirmationService.validate_queue_stock()
+
+        self.assertFalse(result['all_valid'])
+        self.assertEqual(result['items'][0]['available_pieces'], 10)
+
+    def test_orders_without_ledger_rows_get_nothing_back(self):
+        so = self.order(4)
+        StockTransaction.objects.filter(reference_id=so.so_number).delete()
+        Inventory.objects.filter(product=self.product).update(quantity_pieces=3)
+
+        [result] = OrderConfirmationService.validate_queue_stock()
+
+        self.assertFalse(result['all_valid'])
+        self.assertEqual(result['items'][0]['available_pieces'], 3)
+
+    def test_query_count_does_not_grow_with_the_queue(self):
+        self.order(1)
+        with self.assertNumQueries(4):
+            OrderConfirmationService.validate_queue_stock()
+        for _ in range(3):
+            self.order(1)
+        with self.assertNumQueries(4):
+            self.assertEqual(len(OrderConfirmationService.validate_queue_stock()), 4)
+
+    def test_other_statuses_are_excluded(self):
+        so = self.order(10)
+        OrderConfirmation.objects.filter(sales_order=so).update(status='picked_up')
+        self.assertEqual(OrderConfirmationService.validate_queue_stock(), [])
+
+
+class ReceiptRendererTests(TestCase):
+    """ESC/POS and PDF receipt rendering and the receipt endpoints"""
+
+    def setUp(self):
+        self.cashier = CustomUser.objects.create_user('cashier', password='pass', first_name='Rosa', last_name='Cruz')
+        customer = make_customer(name='Juan Dela Cruz')
+        self.product = make_product(pieces=50, name='Narra 2x4x8')
+        self.so, self.receipt = SalesService.quick_checkout(
+            customer_id=customer.id,
+            items=[{'product_id': self.product.id, 'quantity_pieces': 3}],
+            amount_tendered=Decimal('200'),
+            created_by=self.cashier
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.cashier)
+
+    def test_escpos_receipt_shows_items_totals_and_cuts(self):
+        receipt = ReceiptRenderer.queryset().get(pk=self.receipt.pk)
+        with self.assertNumQueries(0):
+            output = ReceiptRenderer.render_escpos(receipt)
+
+        self.assertTrue(output.startswith(ESC_INIT))
+        self.assertTrue(output.endswith(ESC_FEED_AND_CUT))
+        text = output.decode('ascii')
+        self.assertIn(self.receipt.receipt_number, text)
+        self.assertIn('Cashier', text)
+        self.assertIn('Rosa Cruz', text)
+        self.assertIn('3 pcs 16.00 bf @ 10.00', text)
+        self.assertIn('Change', text)
+        self.assertTrue(all(len(line) <= 48 for line in text.split('\n') if '\x1b' not in line and '\x1d' not in line))
+
+    def test_non_ascii_text_is_replaced_for_the_printer(self):
+        LumberProduct.objects.filter(pk=self.product.pk).update(name='Piña Lumber')
+        output = ReceiptRenderer.render_escpos(ReceiptRenderer.queryset().get(pk=self.receipt.pk))
+        self.assertIn(b'Pi?a Lumber', output)
+
+    def test_render_endpoint_returns_pdf_or_escpos(self):
+        url = f'/api/receipts/{self.receipt.pk}/render/'
+
+        pdf = self.client.get(url)
+        self.assertEqual(pdf['Content-Type'], 'application/pdf')
+        self.assertTrue(pdf.content.startswith(b'%PDF'))
+
+        escpos = self.client.get(url, {'output': 'escpos'})
+        self.assertEqual(escpos['Content-Type'], 'application/octet-stream')
+        self.assertIn(self.receipt.receipt_number.encode(), escpos.content)
+
+        self.assertEqual(self.client.get(f'/api/receipts/{self.receipt.pk + 100}/render/').status_code, 404)
+
+    def test_reprint_streams_a_days_receipts(self):
+        today = timezone.localdate().isoformat()
+        response = self.client.get('/api/receipts/reprint/', {'date': today, 'output': 'escpos'})
+
+        content = b''.join(response.streaming_content)
+        self.assertEqual(content.count(ESC_FEED_AND_CUT), 1)
+        self.assertIn(self.receipt.receipt_number.encode(), content)
+
+        self.assertTrue(self.client.get('/api/receipts/reprint/', {'date': '2000-01-01'}).content.startswith(b'%PDF'))
+        self.assertEqual(self.client.get('/api/receipts/reprint/', {'date': 'yesterday'}).status_code, 400)
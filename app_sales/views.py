@@ -4,13 +4,15 @@ from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
 from django.db import transaction
 from django.db.models import Sum, Count, Q, F
+from django.http import HttpResponse, StreamingHttpResponse, Http404
 from django.utils import timezone
 from django.core.exceptions import ValidationError
 from datetime import datetime, timedelta
 from decimal import Decimal
-from app_sales.models import Customer, SalesOrder, SalesOrderItem, Receipt
+from app_sales.models import Customer, SalesOrder, SalesOrderItem, Receipt, ShoppingCart
 from app_sales.serializers import CustomerSerializer, SalesOrderSerializer, SalesOrderItemSerializer, ReceiptSerializer
 from app_sales.services import SalesService
+from app_sales.receipts import ReceiptRenderer
 
 
 class CustomerViewSet(viewsets.ModelViewSet):
@@ -136,7 +138,9 @@ class SalesOrderViewSet(viewsets.ModelViewSet):
         if not items:
             return Response({'error': 'items are required'}, status=status.HTTP_400_BAD_REQUEST)
         
-        validation = SalesService.validate_stock_availability(items)
+        # The caller's own cart holds count as available to them
+        cart = ShoppingCart.objects.filter(user=request.user).first()
+        validation = SalesService.validate_stock_availability(items, cart=cart)
         return Response(validation)
     
     @action(detail=True, methods=['post'])
@@ -259,3 +263,50 @@ class ReceiptViewSet(viewsets.ModelViewSet):
             return Response(serializer.data)
         except Receipt.DoesNotExist:
             return Response({'error': 'Receipt not found'}, status=status.HTTP_404_NOT_FOUND)
+    
+    @action(detail=True, methods=['get'])
+    def render(self, request, pk=None):
+        """
+        Render one receipt for printing
+        
+        Query params:
+            output: 'pdf' (default) or 'escpos' for thermal printers
+        """
+        receipt = ReceiptRenderer.queryset().filter(pk=pk).first()
+        if receipt is None:
+            raise Http404
+        
+        if request.query_params.get('output') == 'escpos':
+            response = HttpResponse(ReceiptRenderer.render_escpos(receipt), content_type='application/octet-stream')
+            response['Content-Disposition'] = f'attachment; filename="{receipt.receipt_number}.bin"'
+            return response
+        
+        response = HttpResponse(ReceiptRenderer.render_pdf(receipt), content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="{receipt.receipt_number}.pdf"'
+        return response
+    
+    @action(detail=False, methods=['get'])
+    def reprint(self, request):
+        """
+        Reprint a day's receipts as one document
+        
+        Query params:
+            date: YYYY-MM-DD (default: today)
+            output: 'pdf' (default) or 'escpos'; ESC/POS is streamed receipt by receipt
+        """
+        day = timezone.localdate()
+        if request.query_params.get('date'):
+            try:
+                day = datetime.strptime(request.query_params['date'], '%Y-%m-%d').date()
+            except ValueError:
+                return Response({'error': 'date must be YYYY-MM-DD'}, status=status.HTTP_400_BAD_REQUEST)
+        
+        receipts = ReceiptRenderer.for_day(day)
+        if request.query_params.get('output') == 'escpos':
+            response = StreamingHttpResponse(ReceiptRenderer.iter_escpos(receipts), content_type='application/octet-stream')
+            response['Content-Disposition'] = f'attachment; filename="receipts-{day}.bin"'
+            return response
+        
+        response = HttpResponse(ReceiptRenderer.render_pdf(receipts), content_type='application/pdf')
+        response['Content-Disposition'] = f'inline; filename="receipts-{day}.pdf"'
+        return response
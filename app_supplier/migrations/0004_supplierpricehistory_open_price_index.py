@@ -0,0 +1,18 @@
+# Generated by Django 5.2.18 on 2026-10-18 12:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app_inventory', '0010_lumberproduct_board_feet_per_piece'),
+        ('app_supplier', '0003_merge_20251213_1143'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='supplierpricehistory',
+            index=models.Index(fields=['supplier', 'product', 'valid_to'], name='app_supplie_supplie_200dd2_idx'),
+        ),
+    ]
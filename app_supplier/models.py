@@ -99,6 +99,7 @@ class SupplierPriceHistory(models.Model):
     class Meta:
         verbose_name_plural = 'Supplier Price Histories'
         ordering = ['-valid_from']
+        indexes = [models.Index(fields=['supplier', 'product', 'valid_to'])]
     
     def __str__(self):
         return f"{self.supplier.company_name} - {self.product.name}"
@@ -0,0 +1,70 @@
+"""
+Supplier services for price history versioning
+"""
+from decimal import Decimal
+from django.db import transaction
+from django.utils import timezone
+from app_supplier.models import SupplierPriceHistory
+
+
+class SupplierPriceHistoryService:
+    """Write supplier price history only when a price actually changes"""
+
+    @staticmethod
+    @transaction.atomic
+    def record_prices(supplier_id, prices, as_of=None):
+        """
+        Version the open price rows for a supplier in one pass
+
+        Unchanged prices are skipped. Every changed product is closed out with
+        a single UPDATE and the new rows are written with one bulk insert, so a
+        whole PO costs at most three queries however many lines it has.
+
+        Args:
+            supplier_id: Supplier ID
+            prices: {product_id: price_per_unit}, or (product_id, price) pairs
+                where the last price for a product wins
+            as_of: Date the new prices take effect (default: today)
+
+        Returns:
+            int: Number of new price history rows written
+        """
+        latest = {}
+        for product_id, price in (prices.items() if hasattr(prices, 'items') else prices):
+            if price is None or price == '':
+                continue
+            latest[int(product_id)] = Decimal(str(price)).quantize(Decimal('0.01'))
+        if not supplier_id or not latest:
+            return 0
+
+        current = dict(
+            SupplierPriceHistory.objects.filter(
+                supplier_id=supplier_id,
+                product_id__in=latest.keys(),
+                valid_to__isnull=True
+            ).values_list('product_id', 'price_per_unit')
+        )
+        changed = {
+            product_id: price
+            for product_id, price in latest.items()
+            if product_id not in current or Decimal(str(current[product_id])) != price
+        }
+        if not changed:
+            return 0
+
+        as_of = as_of or timezone.now().date()
+        SupplierPriceHistory.objects.filter(
+            supplier_id=supplier_id,
+            product_id__in=changed.keys(),
+            valid_to__isnull=True
+        ).update(valid_to=as_of)
+        SupplierPriceHistory.objects.bulk_create([
+            SupplierPriceHistory(
+                supplier_id=supplier_id,
+                product_id=product_id,
+                price_per_unit=price,
+                valid_from=as_of
+            )
+            for product_id, price in changed.items()
+        ])
+        return len(changed)
@@ -1,3 +1,118 @@
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from django.contrib.auth import get_user_model
+from django.db import connection, DatabaseError
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from app_inventory.models import LumberCategory, LumberProduct
+from app_inventory.services import InventoryService
+from app_supplier.models import Supplier, PurchaseOrder, SupplierPriceHistory
+from app_supplier.services import SupplierPriceHistoryService
 
-# Create your tests here.
+
+class SupplierPriceHistoryServiceTests(TestCase):
+    """SupplierPriceHistoryService.record_prices"""
+
+    def setUp(self):
+        self.supplier = Supplier.objects.create(company_name='Sierra Lumber', contact_person='Ana', phone_number='0917')
+        category = LumberCategory.objects.create(name='Softwood')
+        self.products = [
+            LumberProduct.objects.create(
+                name=f'Lumber {i}', category=category, sku=f'LMB-00{i}', thickness=Decimal('2'),
+                width=Decimal('4'), length=Decimal('8'), price_per_board_foot=Decimal('10.00')
+            )
+            for i in range(3)
+        ]
+
+    def open_prices(self):
+        return dict(SupplierPriceHistory.objects.filter(
+            supplier=self.supplier, valid_to__isnull=True
+        ).values_list('product_id', 'price_per_unit'))
+
+    def test_first_prices_open_a_row_per_product(self):
+        written = SupplierPriceHistoryService.record_prices(
+            self.supplier.id, {self.products[0].id: '50', self.products[1].id: Decimal('61.5')}, as_of=date(2026, 1, 5)
+        )
+
+        self.assertEqual(written, 2)
+        self.assertEqual(self.open_prices(), {self.products[0].id: Decimal('50.00'), self.products[1].id: Decimal('61.50')})
+
+    def test_unchanged_price_is_skipped(self):
+        SupplierPriceHistoryService.record_prices(self.supplier.id, {self.products[0].id: '50.00'})
+
+        self.assertEqual(SupplierPriceHistoryService.record_prices(self.supplier.id, {self.products[0].id: 50}), 0)
+        self.assertEqual(SupplierPriceHistory.objects.count(), 1)
+
+    def test_changed_price_closes_the_open_row(self):
+        product = self.products[0]
+        SupplierPriceHistoryService.record_prices(self.supplier.id, {product.id: '50.00'}, as_of=date(2026, 1, 5))
+        SupplierPriceHistoryService.record_prices(self.supplier.id, {product.id: '55.00'}, as_of=date(2026, 2, 1))
+
+        rows = list(SupplierPriceHistory.objects.filter(product=product).order_by('valid_from').values_list(
+            'price_per_unit', 'valid_from', 'valid_to'
+        ))
+        self.assertEqual(rows, [
+            (Decimal('50.00'), date(2026, 1, 5), date(2026, 2, 1)),
+            (Decimal('55.00'), date(2026, 2, 1), None),
+        ])
+
+    def test_last_price_for_a_repeated_product_wins(self):
+        product = self.products[0]
+        SupplierPriceHistoryService.record_prices(self.supplier.id, [(product.id, '50'), (product.id, '52')])
+        self.assertEqual(self.open_prices(), {product.id: Decimal('52.00')})
+
+    def test_missing_supplier_or_prices_write_nothing(self):
+        self.assertEqual(SupplierPriceHistoryService.record_prices(None, {self.products[0].id: '50'}), 0)
+        self.assertEqual(SupplierPriceHistoryService.record_prices(self.supplier.id, {self.products[0].id: None}), 0)
+        self.assertFalse(SupplierPriceHistory.objects.exists())
+
+    def test_query_count_does_not_grow_with_lines(self):
+        with CaptureQueriesContext(connection) as one_line:
+            SupplierPriceHistoryService.record_prices(self.supplier.id, {self.products[0].id: '50'})
+        with CaptureQueriesContext(connection) as two_lines:
+            SupplierPriceHistoryService.record_prices(
+                self.supplier.id, {self.products[1].id: '40', self.products[2].id: '45'}
+            )
+        self.assertEqual(len(one_line), len(two_lines))
+
+    def test_stock_in_records_a_changed_cost_only(self):
+        product = self.products[0]
+        InventoryService.stock_in(product.id, 5, supplier_id=self.supplier.id, cost_per_unit=Decimal('50.00'), reference_id='PO-1')
+        InventoryService.stock_in(product.id, 5, supplier_id=self.supplier.id, cost_per_unit=Decimal('50.00'), reference_id='PO-2')
+        InventoryService.stock_in(product.id, 5, supplier_id=self.supplier.id, cost_per_unit=Decimal('48.00'), reference_id='PO-3')
+
+        self.assertEqual(SupplierPriceHistory.objects.filter(product=product).count(), 2)
+        self.assertEqual(self.open_prices(), {product.id: Decimal('48.00')})
+
+
+class PurchaseOrderCreateTests(TestCase):
+    """PO numbering on create through the API"""
+
+    def setUp(self):
+        self.supplier = Supplier.objects.create(company_name='Sierra Lumber', contact_person='Ana', phone_number='0917')
+        self.client = APIClient()
+        self.client.force_authenticate(get_user_model().objects.create_user(username='buyer', password='x'))
+
+    def create(self):
+        return self.client.post('/api/purchase-orders/', {
+            'supplier': self.supplier.id, 'expected_delivery_date': '2026-11-01'
+        }, format='json')
+
+    def test_po_is_inserted_with_its_number(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.create()
+
+        self.assertEqual(response.status_code, 201)
+        self.assertRegex(response.json()['po_number'], r'^PO-\d{8}-0001$')
+        self.assertFalse([q for q in queries if q['sql'].startswith('UPDATE "app_supplier_purchaseorder"')])
+        self.assertEqual(PurchaseOrder.objects.get().po_number, response.json()['po_number'])
+
+    def test_failed_insert_releases_the_number(self):
+        with mock.patch.object(PurchaseOrder, 'save', side_effect=DatabaseError('disk full')):
+            with self.assertRaises(DatabaseError):
+                self.create()
+
+        response = self.create()
+        self.assertTrue(response.json()['po_number'].endswith('-0001'))
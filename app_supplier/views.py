@@ -2,6 +2,7 @@ from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from django.db import transaction
 from django.utils import timezone
 from datetime import datetime
 from app_supplier.models import Supplier, PurchaseOrder, PurchaseOrderItem, SupplierPriceHistory
@@ -10,6 +11,7 @@ from app_supplier.serializers import (
     PurchaseOrderItemSerializer, SupplierPriceHistorySerializer
 )
 from app_inventory.services import InventoryService
+from core.services import DocumentSequenceService
 
 
 class SupplierViewSet(viewsets.ModelViewSet):
@@ -63,16 +65,18 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
     serializer_class = PurchaseOrderSerializer
     permission_classes = [IsAuthenticated]
     
+    @transaction.atomic
     def perform_create(self, serializer):
-        po = serializer.save(created_by=self.request.user)
-        po.po_number = self._generate_po_number()
-        po.save()
+        # Allocate first so the PO is inserted with its number and a failed
+        # insert rolls the counter back with it
+        serializer.save(created_by=self.request.user, po_number=self._generate_po_number())
     
     def _generate_po_number(self):
         """Generate unique purchase order number"""
         today = datetime.now().strftime('%Y%m%d')
-        count = PurchaseOrder.objects.filter(po_number__startswith=f'PO-{today}').count() + 1
-        return f'PO-{today}-{count:04d}'
+        return DocumentSequenceService.next_number(
+            f'PO-{today}-', model=PurchaseOrder, field='po_number'
+        )
     
     @action(detail=True, methods=['post'])
     def mark_received(self, request, pk=None):
@@ -84,20 +88,28 @@ class PurchaseOrderViewSet(viewsets.ModelViewSet):
                            status=status.HTTP_400_BAD_REQUEST)
         
         try:
-            # Auto-convert PO items to stock in
-            for po_item in po.po_items.all():
-                InventoryService.stock_in(
-                    product_id=po_item.product_id,
-                    quantity_pieces=po_item.quantity_pieces,
+            with transaction.atomic():
+                # Auto-convert PO items to stock in as one batch, so price
+                # history is versioned once for the whole PO
+                po_items = list(po.po_items.select_related('product'))
+                InventoryService.stock_in_many(
+                    [
+                        {
+                            'product_id': po_item.product_id,
+                            'quantity_pieces': po_item.quantity_pieces,
+                            'cost_per_unit': po_item.cost_per_unit,
+                            'reference_id': po.po_number,
+                        }
+                        for po_item in po_items
+                    ],
                     supplier_id=po.supplier_id,
-                    cost_per_unit=po_item.cost_per_unit,
                     created_by=request.user,
-                    reference_id=po.po_number
+                    products={po_item.product_id: po_item.product for po_item in po_items}
                 )
-            
-            po.status = 'received'
-            po.received_at = timezone.now()
-            po.save()
+                
+                po.status = 'received'
+                po.received_at = timezone.now()
+                po.save()
             
             serializer = self.get_serializer(po)
             return Response({
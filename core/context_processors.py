@@ -1,16 +1,19 @@
-from core.models import CustomUser
+from django.utils.functional import SimpleLazyObject
+from core.services import PendingRegistrationService
 
 
 def pending_registrations_count(request):
-    """Add pending registrations count to context for admin users"""
-    pending_count = 0
-    
-    if request.user.is_authenticated and request.user.is_admin():
-        pending_count = CustomUser.objects.filter(
-            user_type='customer',
-            is_approved=False
-        ).count()
+    """
+    Add pending registrations count to context for admin users
+
+    The count is lazy and cached, so pages that don't show it (and
+    non-admin users) cost no query.
+    """
+    def get_pending_count():
+        if request.user.is_authenticated and request.user.is_admin():
+            return PendingRegistrationService.get_count()
+        return 0
     
     return {
-        'pending_count': pending_count,
+        'pending_count': SimpleLazyObject(get_pending_count),
     }
@@ -4,7 +4,8 @@ from django.contrib.auth.decorators import login_required
 from django.contrib import messages
 from django.db.models import Q, Sum, Count
 from app_inventory.models import LumberProduct, LumberCategory, Inventory
-from app_sales.models import Customer as SalesCustomer, SalesOrder
+from app_sales.models import SalesOrder
+from app_sales.services import CustomerService
 
 
 @login_required
@@ -52,7 +53,7 @@ def customer_browse_products(request):
     total_spent = 0
     
     try:
-        sales_customer = SalesCustomer.objects.filter(email=request.user.email).first()
+        sales_customer = CustomerService.get_for_request(request)
         if sales_customer:
             sales_orders = sales_customer.sales_orders.all().order_by('-created_at')[:5]
             stats = sales_customer.sales_orders.aggregate(
@@ -123,7 +124,7 @@ def customer_my_orders(request):
     order_count = 0
     
     try:
-        sales_customer = SalesCustomer.objects.filter(email=request.user.email).first()
+        sales_customer = CustomerService.get_for_request(request)
         if sales_customer:
             sales_orders = sales_customer.sales_orders.all().order_by('-created_at')
             stats = sales_customer.sales_orders.aggregate(
@@ -156,11 +157,10 @@ def customer_order_detail(request, order_id):
     if not request.user.is_customer():
         return redirect('dashboard')
     
-    # Try to find the order linked to this customer's email
     sales_order = get_object_or_404(SalesOrder, id=order_id)
     
-    # Verify the order belongs to a customer with the same email
-    if sales_order.customer.email != request.user.email:
+    # Verify the order belongs to this user's customer record
+    if sales_order.customer_id != CustomerService.get_customer_id(request):
         return redirect('customer-dashboard')
     
     # Get customer profile
@@ -192,7 +192,7 @@ def customer_profile(request):
     total_spent = 0
     
     try:
-        sales_customer = SalesCustomer.objects.filter(email=request.user.email).first()
+        sales_customer = CustomerService.get_for_request(request)
         if sales_customer:
             stats = sales_customer.sales_orders.aggregate(
                 total=Sum('total_amount'),
@@ -231,7 +231,7 @@ def customer_shopping_cart(request):
             from app_inventory.models import LumberProduct
             
             # Get the order
-            order = SalesOrder.objects.get(id=edit_order_id, customer__email=request.user.email)
+            order = SalesOrder.objects.get(id=edit_order_id, customer_id=CustomerService.get_customer_id(request))
             
             # Check if order is confirmed
             if order.is_confirmed:
@@ -242,7 +242,7 @@ def customer_shopping_cart(request):
             cart, created = ShoppingCart.objects.get_or_create(user=request.user)
             
             # Clear existing cart items
-            cart.items.all().delete()
+            cart.clear()
             
             # Add order items to cart
             for order_item in order.sales_order_items.all():
@@ -97,3 +97,18 @@ class CustomerProfile(models.Model):
 
     def __str__(self):
         return f"{self.user.get_full_name()} - Customer"
+
+
+class DocumentSequence(models.Model):
+    """Per-prefix counter used to allocate gap-free document numbers"""
+    prefix = models.CharField(max_length=50, unique=True)
+    last_value = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['prefix']
+        verbose_name = 'Document Sequence'
+        verbose_name_plural = 'Document Sequences'
+
+    def __str__(self):
+        return f"{self.prefix}{self.last_value}"
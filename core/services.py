@@ -0,0 +1,120 @@
+"""
+Shared services: document number allocation, registration counters
+"""
+from django.core.cache import cache
+from django.db import transaction, IntegrityError
+from django.db.models import F
+from core.models import DocumentSequence, CustomUser
+
+
+class DocumentSequenceService:
+    """Allocate SO, receipt, delivery and PO numbers from per-prefix counters"""
+    
+    @staticmethod
+    def next_number(prefix, width=4, model=None, field=None):
+        """
+        Allocate the next document number for a prefix
+        
+        Args:
+            prefix: Number prefix, e.g. 'SO-20241208-'
+            width: Zero-padded width of the numeric suffix
+            model: Model holding existing numbers (used once to seed a new prefix)
+            field: Field on model holding the document number
+            
+        Returns:
+            str: Document number, e.g. 'SO-20241208-0001'
+        """
+        return DocumentSequenceService.next_numbers(prefix, 1, width=width, model=model, field=field)[0]
+    
+    @staticmethod
+    @transaction.atomic
+    def next_numbers(prefix, count, width=4, model=None, field=None):
+        """
+        Pre-allocate a block of consecutive document numbers
+        
+        The counter row is bumped with a single UPDATE ... SET last_value =
+        last_value + count, which row-locks it until the surrounding transaction
+        ends. Concurrent callers queue on that lock instead of scanning the
+        document table, and a rolled-back transaction releases its numbers, so
+        the sequence stays gap-free.
+        
+        Args:
+            prefix: Number prefix, e.g. 'RCP-20241208-'
+            count: How many numbers to allocate
+            width: Zero-padded width of the numeric suffix
+            model: Model holding existing numbers (used once to seed a new prefix)
+            field: Field on model holding the document number
+            
+        Returns:
+            List[str]: Allocated document numbers in order
+        """
+        if count < 1:
+            return []
+        
+        if not DocumentSequenceService._increment(prefix, count):
+            seed = DocumentSequenceService._seed_value(prefix, model, field)
+            try:
+                with transaction.atomic():
+                    DocumentSequence.objects.create(prefix=prefix, last_value=seed + count)
+            except IntegrityError:
+                # Another transaction created the counter first; queue on its lock
+                DocumentSequenceService._increment(prefix, count)
+        
+        last_value = DocumentSequence.objects.filter(prefix=prefix).values_list('last_value', flat=True).get()
+        first_value = last_value - count + 1
+        return [f'{prefix}{value:0{width}d}' for value in range(first_value, last_value + 1)]
+    
+    @staticmethod
+    def _increment(prefix, count):
+        """Bump an existing counter; returns False if the prefix has no counter yet"""
+        return DocumentSequence.objects.filter(prefix=prefix).update(
+            last_value=F('last_value') + count
+        ) > 0
+    
+    @staticmethod
+    def _seed_value(prefix, model, field):
+        """
+        Highest number already issued for a prefix before it had a counter
+        
+        Runs once per prefix so numbers created before the counter existed
+        are never reissued.
+        """
+        if model is None or field is None:
+            return 0
+        
+        # Compared as numbers: as text '...-9999' sorts above '...-10000'
+        suffixes = [
+            number[len(prefix):]
+            for number in model.objects.filter(**{f'{field}__startswith': prefix}).values_list(field, flat=True)
+        ]
+        numeric = [int(suffix) for suffix in suffixes if suffix.isdigit()]
+        return max(numeric) if numeric else len(suffixes)
+
+
+class PendingRegistrationService:
+    """Cached count of customer registrations awaiting admin approval"""
+    
+    CACHE_KEY = 'pending_registrations_count'
+    CACHE_TIMEOUT = 600
+    
+    @staticmethod
+    def get_count():
+        """
+        Number of unapproved customer accounts
+        
+        Cached until a customer registers, is approved or is deleted
+        (see core.signals).
+        
+        Returns:
+            int: Pending registration count
+        """
+        count = cache.get(PendingRegistrationService.CACHE_KEY)
+        if count is None:
+            count = CustomUser.objects.filter(user_type='customer', is_approved=False).count()
+            cache.set(PendingRegistrationService.CACHE_KEY, count, PendingRegistrationService.CACHE_TIMEOUT)
+        return count
+    
+    @staticmethod
+    def invalidate():
+        """Drop the cached count so the next read recounts"""
+        cache.delete(PendingRegistrationService.CACHE_KEY)
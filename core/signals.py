@@ -1,7 +1,12 @@
 """Signal handlers for core app"""
-from django.db.models.signals import post_save
+from django.db import transaction
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from core.models import CustomUser
+from core.services import PendingRegistrationService
+
+# Fields that decide whether an account counts as a pending registration
+REGISTRATION_FIELDS = {'user_type', 'is_approved'}
 
 
 @receiver(post_save, sender=CustomUser)
@@ -9,3 +14,21 @@ def user_created(sender, instance, created, **kwargs):
     """Handle user creation"""
     if created:
         print(f"User {instance.username} created with role: {instance.role}")
+
+
+@receiver(post_save, sender=CustomUser)
+def registration_changed(sender, instance, created, update_fields=None, **kwargs):
+    """Recount pending registrations when a customer registers or is approved"""
+    if update_fields is not None and not REGISTRATION_FIELDS.intersection(update_fields):
+        # e.g. the last_login update on every login
+        return
+    if created and instance.user_type != 'customer':
+        return
+    transaction.on_commit(PendingRegistrationService.invalidate)
+
+
+@receiver(post_delete, sender=CustomUser)
+def registration_removed(sender, instance, **kwargs):
+    """Rejected registrations are deleted outright"""
+    if instance.user_type == 'customer' and not instance.is_approved:
+        transaction.on_commit(PendingRegistrationService.invalidate)
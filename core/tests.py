@@ -1,3 +1,109 @@
-from django.test import TestCase
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.db import transaction
+from django.test import RequestFactory, TestCase
+from app_sales.models import Customer, SalesOrder
+from core.context_processors import pending_registrations_count
+from core.models import CustomUser, DocumentSequence
+from core.services import DocumentSequenceService, PendingRegistrationService
 
-# Create your tests here.
+
+class DocumentSequenceServiceTests(TestCase):
+    """Per-prefix document number allocation"""
+
+    def test_numbers_are_consecutive_per_prefix(self):
+        self.assertEqual(DocumentSequenceService.next_number('SO-20250101-'), 'SO-20250101-0001')
+        self.assertEqual(DocumentSequenceService.next_number('SO-20250101-'), 'SO-20250101-0002')
+        self.assertEqual(DocumentSequenceService.next_number('RCP-20250101-'), 'RCP-20250101-0001')
+
+    def test_block_allocation_reserves_consecutive_numbers(self):
+        DocumentSequenceService.next_number('DLV-20250101-')
+        numbers = DocumentSequenceService.next_numbers('DLV-20250101-', 3)
+
+        self.assertEqual(numbers, ['DLV-20250101-0002', 'DLV-20250101-0003', 'DLV-20250101-0004'])
+        self.assertEqual(DocumentSequence.objects.get(prefix='DLV-20250101-').last_value, 4)
+        self.assertEqual(DocumentSequenceService.next_numbers('DLV-20250101-', 0), [])
+
+    def test_new_prefix_is_seeded_from_existing_documents(self):
+        customer = Customer.objects.create(name='Walk-in', phone_number='09170000000')
+        SalesOrder.objects.create(customer=customer, payment_type='cash', so_number='SO-20250101-0007')
+
+        number = DocumentSequenceService.next_number('SO-20250101-', model=SalesOrder, field='so_number')
+
+        self.assertEqual(number, 'SO-20250101-0008')
+
+    def test_seed_compares_suffixes_wider_than_the_width_as_numbers(self):
+        customer = Customer.objects.create(name='Walk-in', phone_number='09170000000')
+        for so_number in ('SO-20250101-9999', 'SO-20250101-10000', 'SO-20250101-0042'):
+            SalesOrder.objects.create(customer=customer, payment_type='cash', so_number=so_number)
+
+        number = DocumentSequenceService.next_number('SO-20250101-', model=SalesOrder, field='so_number')
+
+        self.assertEqual(number, 'SO-20250101-10001')
+
+    def test_rolled_back_allocation_releases_its_numbers(self):
+        DocumentSequenceService.next_number('PO-20250101-')
+        try:
+            with transaction.atomic():
+                DocumentSequenceService.next_number('PO-20250101-')
+                raise RuntimeError('order failed')
+        except RuntimeError:
+            pass
+
+        self.assertEqual(DocumentSequenceService.next_number('PO-20250101-'), 'PO-20250101-0002')
+
+
+class PendingRegistrationCountTests(TestCase):
+    """Cached pending registrations count and its context processor"""
+
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user('boss', password='pass', role='admin', is_staff=True)
+
+    def register(self, username):
+        with self.captureOnCommitCallbacks(execute=True):
+            return CustomUser.objects.create_user(username, password='pass', user_type='customer')
+
+    def test_count_is_cached_until_a_customer_registers(self):
+        self.register('first')
+        self.assertEqual(PendingRegistrationService.get_count(), 1)
+        with self.assertNumQueries(0):
+            PendingRegistrationService.get_count()
+
+        self.register('second')
+        self.assertEqual(PendingRegistrationService.get_count(), 2)
+
+    def test_approval_and_rejection_invalidate(self):
+        first = self.register('first')
+        second = self.register('second')
+        PendingRegistrationService.get_count()
+
+        with self.captureOnCommitCallbacks(execute=True):
+            first.is_approved = True
+            first.save(update_fields=['is_approved'])
+        self.assertEqual(PendingRegistrationService.get_count(), 1)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            second.delete()
+        self.assertEqual(PendingRegistrationService.get_count(), 0)
+
+    def test_unrelated_saves_keep_the_cache(self):
+        first = self.register('first')
+        PendingRegistrationService.get_count()
+        with self.captureOnCommitCallbacks(execute=True) as callbacks:
+            first.save(update_fields=['last_login'])
+            CustomUser.objects.create_user('clerk', password='pass')
+        self.assertEqual(callbacks, [])
+
+    def test_context_is_lazy_and_admin_only(self):
+        self.register('first')
+        request = RequestFactory().get('/')
+
+        request.user = self.admin
+        with self.assertNumQueries(0):
+            context = pending_registrations_count(request)
+        self.assertEqual(context['pending_count'], 1)
+
+        request.user = AnonymousUser()
+        with self.assertNumQueries(0):
+            self.assertEqual(pending_registrations_count(request)['pending_count'], 0)
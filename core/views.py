@@ -86,7 +86,8 @@ def customer_dashboard(request):
     
     print(f"DEBUG: Rendering customer dashboard", file=sys.stderr)
     
-    from app_sales.models import SalesOrder, Customer as SalesCustomer
+    from app_sales.models import SalesOrder
+    from app_sales.services import CustomerService
     from django.db.models import Sum, Count
     
     # Get customer's sales orders if they have a linked customer record
@@ -96,7 +97,7 @@ def customer_dashboard(request):
     
     try:
         # Try to find customer record by email
-        sales_customer = SalesCustomer.objects.filter(email=request.user.email).first()
+        sales_customer = CustomerService.get_for_request(request)
         if sales_customer:
             sales_orders = sales_customer.sales_orders.all().order_by('-created_at')[:10]
             stats = sales_customer.sales_orders.aggregate(